@@ -14,15 +14,22 @@ from app.models.content import ContentItem
 from openai import OpenAI
 import yaml
 
+from llm_budget import BudgetExceeded, plan_call
+from llm_ledger import track, usage_fields
+from prompts import get_prompt
+
 init_db()
 
 TEMPLATES_PATH = os.path.join(ROOT_DIR, "automations", "pack_templates.yaml")
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4.1-mini")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 POSTS_PER_TOPIC = int(os.environ.get("AUTO_POSTS_PER_TOPIC", "1"))
+BLOGPOST_MAX_TOKENS = 1400
 
 client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 
+BLOGPOST_PROMPT = get_prompt("blogpost")
+
 
 def load_templates() -> List[Dict[str, Any]]:
     if not os.path.isfile(TEMPLATES_PATH):
@@ -54,33 +61,29 @@ def generate_article_markdown(template: Dict[str, Any]) -> Dict[str, str]:
 
     guidance = "\n".join(guidance_lines)
 
-    user_prompt = (
-        "Schreibe ein eigenständiges technisches Micro-Tutorial in Markdown "
-        "für Entwickler:innen mit mittlerem Niveau.\n\n"
-        "Sprache: Deutsch.\n"
-        "Länge: ca. 600–900 Wörter.\n"
-        "Struktur:\n"
-        "- Eine einzige H1-Überschrift als Titel.\n"
-        "- Problem erklären.\n"
-        "- Konkrete Codebeispiele.\n"
-        "- Kurze Zusammenfassung am Ende.\n"
-        "Fokus: praxisnah, keine theoretische Vorlesung.\n\n"
-        f"{guidance}\n\n"
-        "Gib NUR den Artikel in Markdown aus, ohne weitere Erklärungen."
-    )
+    # Statische Anweisungen zuerst, Thema/Keywords am Ende (siehe prompts.py)
+    user_prompt = BLOGPOST_PROMPT.render(guidance=guidance)
 
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": "Du bist Senior-Entwickler:in und schreibst klare, praxisnahe Tutorials.",
-            },
-            {"role": "user", "content": user_prompt},
-        ],
-        max_tokens=1400,
-        temperature=0.7,
+    # Budget: kurz vor dem Limit billigeres Modell / kürzerer Post, danach BudgetExceeded
+    model, max_tokens = plan_call(
+        OPENAI_MODEL, user_prompt, BLOGPOST_MAX_TOKENS, system_prompt=BLOGPOST_PROMPT.system
     )
+
+    with track("openai", model, call="blogpost") as rec:
+        rec["prompt_version"] = BLOGPOST_PROMPT.id
+        resp = client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": BLOGPOST_PROMPT.system,
+                },
+                {"role": "user", "content": user_prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=0.7,
+        )
+        rec.update(usage_fields(resp.usage))
     content = (resp.choices[0].message.content or "").strip()
 
     lines = content.splitlines()
@@ -141,6 +144,9 @@ def run():
             try:
                 md = generate_article_markdown(template)
                 create_content_item(md["title"], md["body_md"], template)
+            except BudgetExceeded as exc:
+                print(f"[auto_generate_blogposts] Stopping: {exc}")
+                return
             except Exception as exc:
                 print(f"[auto_generate_blogposts] Error for topic={topic} run={i+1}: {exc}")
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# automations/benchmark_import_time.py
+"""
+Import-Zeit-Benchmark für die LLM-Library und die Stage-Skripte.
+
+run_weekly_cycle.py startet bulk_generate / quality_filter als Subprozesse –
+jeder Start zahlt den Import von llm_client & Co. erneut. openai, httpx und
+requests werden deshalb erst beim ersten Call geladen; dieser Benchmark
+misst per `python -X importtime` die kumulierte Import-Zeit jedes Moduls
+(Median über mehrere Läufe, ohne Interpreter-Start/site) und prüft:
+
+- Budget: IMPORT_TIME_BUDGET_MS pro Modul (Default: 150 ms)
+- keins der schweren Pakete (openai, httpx, requests) wird beim Import geladen
+
+Usage (aus dem Repo-Root):
+
+    python automations/benchmark_import_time.py [--runs 5] [--budget-ms 150] [module ...]
+
+Exit-Code 1, wenn ein Modul das Budget reißt oder ein schweres Paket lädt.
+Zum Vergleich: mit eagerem openai-Import lag `import llm_client` bei ~700 ms.
+"""
+import os
+import sys
+import json
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+AUTOMATIONS_DIR = Path(__file__).resolve().parent
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "150"))
+
+DEFAULT_MODULES = ["llm_client", "llm_batch", "bulk_generate", "quality_filter"]
+HEAVY_MODULES = ["openai", "httpx", "requests"]
+
+
+def _arg(name: str, default: Any) -> Any:
+    if name in sys.argv:
+        return type(default)(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def measure_once(module: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Ein frischer Interpreter: (kumulierte ms, langsamste direkte Imports, geladene schwere Pakete).
+    """
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=AUTOMATIONS_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = None
+    children: List[Tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Header-Zeile
+        # " name" = Top-Level, "   name" = direkter Import, ...
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0 and name == module:
+            total_us = float(cumulative)
+        elif depth == 1:
+            # Kinder stehen in -X importtime VOR ihrem Parent
+            children.append((name, float(cumulative) / 1000.0))
+
+    if total_us is None:
+        raise RuntimeError(f"No importtime entry for {module!r}")
+    heavy_loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    slowest = sorted(children, key=lambda c: c[1], reverse=True)[:3]
+    return total_us / 1000.0, slowest, heavy_loaded
+
+
+def measure(module: str, runs: int) -> Dict[str, Any]:
+    samples = []
+    slowest: List[Tuple[str, float]] = []
+    heavy_loaded: List[str] = []
+    for _ in range(max(1, runs)):
+        total_ms, slowest, heavy_loaded = measure_once(module)
+        samples.append(total_ms)
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(samples), 1),
+        "max_ms": round(max(samples), 1),
+        "slowest": slowest,
+        "heavy_loaded": heavy_loaded,
+    }
+
+
+def main() -> None:
+    runs = _arg("--runs", 5)
+    budget_ms = _arg("--budget-ms", IMPORT_TIME_BUDGET_MS)
+    skip = {"--runs", "--budget-ms"}
+    args = sys.argv[1:]
+    modules = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] not in skip)]
+    modules = modules or DEFAULT_MODULES
+
+    failed = False
+    header = f"{'module':<18} {'median_ms':>9} {'max_ms':>8} {'budget':>7}  slowest imports"
+    print(header)
+    print("-" * len(header))
+    for module in modules:
+        result = measure(module, runs)
+        over = result["median_ms"] > budget_ms
+        slowest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in result["slowest"])
+        print(
+            f"{module:<18} {result['median_ms']:>9.1f} {result['max_ms']:>8.1f} "
+            f"{'FAIL' if over else 'ok':>7}  {slowest}"
+        )
+        if result["heavy_loaded"]:
+            print(f"{'':<18} eagerly imports: {', '.join(result['heavy_loaded'])}")
+        failed = failed or over or bool(result["heavy_loaded"])
+
+    print()
+    print(f"[benchmark_import_time] budget {budget_ms:.0f} ms/module, {runs} run(s) each: "
+          + ("FAILED" if failed else "ok"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
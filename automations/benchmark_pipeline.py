@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# automations/benchmark_pipeline.py
+"""
+End-to-End-Durchsatz-Benchmark: bulk_generate -> quality_filter -> sync_microsites
+gegen den lokalen Mock (mock_llm_server), ohne API-Kosten.
+
+Alles läuft in einem Temp-Verzeichnis mit synthetischen Fragen; Repo-Daten
+werden nicht angefasst. Ausgegeben werden Artikel/Stunde sowie Wall-Time und
+p50/p95-Latenz der LLM-Calls pro Stage (aus dem Telemetrie-Ledger).
+
+Usage (aus dem Repo-Root):
+
+    python automations/benchmark_pipeline.py [--questions 50] [--concurrency 8]
+                                             [--local-hosts 1] [--pipelined]
+                                             [--out bench.json] [--keep]
+
+Mock-Verhalten (Latenz-Verteilung, Fehlerrate, ...) über die MOCK_LLM_*-ENV,
+siehe mock_llm_server.py.
+
+--local-hosts N startet N Mock-Hosts für die Drafts (LOCAL_LLM_ENDPOINTS,
+je `concurrency` Slots). Mit MOCK_LLM_MAX_PARALLEL simuliert jeder Host eine
+begrenzte GPU – drafts/hour sollte dann etwa linear mit N wachsen:
+
+    MOCK_LLM_MAX_PARALLEL=2 python automations/benchmark_pipeline.py --concurrency 2 --local-hosts 3
+
+--pipelined läuft die drei Stages überlappend über content_pipeline.py; die
+LLM-Spalten bleiben pro Stage, wall_s gibt es dann nur gesamt (total_s).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from mock_llm_server import MockLLMServer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tags zyklisch verteilt, damit sync_microsites auch die Microsites beschreibt
+SYNTHETIC_TAGS = [
+    ["python", "pandas"],
+    ["fastapi", "api"],
+    ["rag", "embedding"],
+    ["docker", "kubernetes"],
+    ["airflow", "automation"],
+]
+
+STAGES = ["bulk_generate", "quality_filter", "sync_microsites"]
+
+
+def _arg(name: str, default: Any) -> Any:
+    if name in sys.argv:
+        return type(default)(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def write_synthetic_questions(raw_dir: Path, today_str: str, count: int) -> None:
+    day_dir = raw_dir / today_str
+    day_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        qid = f"bench_{i:04d}"
+        payload = {
+            "id": qid,
+            "question": f"How do I fix intermittent failure #{i} in a production service?",
+            "tags": SYNTHETIC_TAGS[i % len(SYNTHETIC_TAGS)],
+            "source": "benchmark",
+        }
+        (day_dir / f"{qid}.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
+def _point_stages_at(work_dir: Path, modules: Dict[str, Any]) -> None:
+    """
+    Biegt alle Ein-/Ausgabeverzeichnisse der Stages ins Temp-Verzeichnis um.
+    """
+    bulk_generate = modules["bulk_generate"]
+    quality_filter = modules["quality_filter"]
+    sync_microsites = modules["sync_microsites"]
+
+    raw_dir = work_dir / "data" / "raw_questions"
+    drafts_dir = work_dir / "drafts" / "local"
+    selected_dir = work_dir / "drafts" / "selected"
+
+    bulk_generate.RAW_QUESTIONS_DIR = raw_dir
+    bulk_generate.DRAFTS_DIR = drafts_dir
+    quality_filter.DRAFTS_DIR = drafts_dir
+    quality_filter.SELECTED_DIR = selected_dir
+    quality_filter.SOCIAL_QUEUE_DIR = work_dir / "data" / "social_queue"
+    sync_microsites.SELECTED_DIR = selected_dir
+    sync_microsites.RAW_QUESTIONS_DIR = raw_dir
+    sync_microsites.MAIN_SITE_CONTENT_DIR = work_dir / "site" / "content" / "blog"
+    sync_microsites.MICROSITE_DIRS = {
+        slug: work_dir / f"site-{slug}" / "content" / "blog" for slug in sync_microsites.MICROSITE_DIRS
+    }
+    modules["llm_checkpoint"].CHECKPOINT_DIR = work_dir / "data" / "checkpoints"
+    modules["llm_batch"].BATCH_DIR = work_dir / "data" / "batches"
+    modules["llm_budget"].BUDGET_DIR = work_dir / "data" / "llm_budget"
+
+
+def _count_md(path: Path) -> int:
+    return len(list(path.rglob("*.md"))) if path.exists() else 0
+
+
+def run_benchmark(
+    questions: int,
+    concurrency: int,
+    work_dir: Path,
+    local_hosts: int = 1,
+    pipelined: bool = False,
+) -> Dict[str, Any]:
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    server = MockLLMServer().start()
+    extra_hosts = [MockLLMServer().start() for _ in range(max(0, local_hosts - 1))]
+
+    # Muss vor dem Import von llm_client & Co. gesetzt sein (Config beim Import)
+    os.environ.update(server.env())
+    if extra_hosts:
+        os.environ["LOCAL_LLM_ENDPOINTS"] = ",".join(
+            f"{host.base_url}/api/generate|1|{concurrency}" for host in [server] + extra_hosts
+        )
+    os.environ.update({
+        "LLM_CONCURRENCY": str(concurrency),
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_LEDGER_ENABLED": "true",
+        "LLM_LEDGER_PATH": str(work_dir / "data" / "llm_ledger" / "calls.jsonl"),
+    })
+
+    import bulk_generate
+    import content_pipeline
+    import llm_batch
+    import llm_budget
+    import llm_checkpoint
+    import llm_ledger
+    import quality_filter
+    import sync_microsites
+
+    modules = {
+        "bulk_generate": bulk_generate,
+        "quality_filter": quality_filter,
+        "sync_microsites": sync_microsites,
+        "content_pipeline": content_pipeline,
+        "llm_checkpoint": llm_checkpoint,
+        "llm_batch": llm_batch,
+        "llm_budget": llm_budget,
+    }
+    _point_stages_at(work_dir, modules)
+    write_synthetic_questions(bulk_generate.RAW_QUESTIONS_DIR, today, questions)
+
+    # Stage-Logs nur bei Warnungen, sonst übertönen sie den Report
+    for name in STAGES + ["content_pipeline", "llm_client", "llm_tokens", "httpx"]:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    stage_times: Dict[str, float] = {}
+    started = time.monotonic()
+    try:
+        for stage_name in ["content_pipeline"] if pipelined else STAGES:
+            logger.info(f"[benchmark] Running {stage_name} ...")
+            stage_started = time.monotonic()
+            with llm_ledger.stage(stage_name):
+                modules[stage_name].main()
+            stage_times[stage_name] = time.monotonic() - stage_started
+    finally:
+        for host in [server] + extra_hosts:
+            host.stop()
+    total = time.monotonic() - started
+
+    drafts = _count_md(bulk_generate.DRAFTS_DIR / today)
+    selected = _count_md(quality_filter.SELECTED_DIR / today)
+    published = _count_md(sync_microsites.MAIN_SITE_CONTENT_DIR)
+
+    calls = {row["stage"]: row for row in llm_ledger.summarize(llm_ledger.read_entries(), "stage")}
+    stages: List[Dict[str, Any]] = []
+    for stage_name in STAGES:
+        row = calls.get(stage_name, {})
+        stages.append({
+            "stage": stage_name,
+            "wall_s": round(stage_times[stage_name], 2) if stage_name in stage_times else None,
+            "llm_calls": row.get("calls", 0),
+            "llm_errors": row.get("errors", 0),
+            "llm_p50_s": row.get("p50_s"),
+            "llm_p95_s": row.get("p95_s"),
+        })
+
+    return {
+        "questions": questions,
+        "concurrency": concurrency,
+        "local_hosts": local_hosts,
+        "pipelined": pipelined,
+        "mock": {k: str(v) for k, v in server.httpd.mock_config.items()},
+        "drafts": drafts,
+        "selected": selected,
+        "published": published,
+        "total_s": round(total, 2),
+        "drafts_per_hour": round(drafts / total * 3600, 1) if total > 0 else None,
+        "articles_per_hour": round(published / total * 3600, 1) if total > 0 else None,
+        "stages": stages,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print()
+    print(
+        f"[benchmark] {report['questions']} questions, concurrency {report['concurrency']}, "
+        f"{report['local_hosts']} local host(s), "
+        f"{'pipelined' if report['pipelined'] else 'stage by stage'}, "
+        f"mock latency {report['mock']['latency_dist']} ~{report['mock']['latency_ms']}ms, "
+        f"error rate {report['mock']['error_rate']}"
+    )
+    print(
+        f"[benchmark] drafts {report['drafts']}, selected {report['selected']}, "
+        f"published {report['published']} in {report['total_s']}s"
+    )
+    print(
+        f"[benchmark] drafts/hour: {report['drafts_per_hour']}, "
+        f"articles/hour: {report['articles_per_hour']}"
+    )
+    print()
+    header = f"{'stage':<18} {'wall_s':>8} {'llm_calls':>9} {'errors':>6} {'p50_s':>7} {'p95_s':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in report["stages"]:
+        p50 = f"{row['llm_p50_s']:.2f}" if row["llm_p50_s"] is not None else "-"
+        p95 = f"{row['llm_p95_s']:.2f}" if row["llm_p95_s"] is not None else "-"
+        wall = f"{row['wall_s']:.2f}" if row["wall_s"] is not None else "-"
+        print(
+            f"{row['stage']:<18} {wall:>8} {row['llm_calls']:>9} "
+            f"{row['llm_errors']:>6} {p50:>7} {p95:>7}"
+        )
+
+
+def main() -> None:
+    questions = _arg("--questions", 50)
+    concurrency = _arg("--concurrency", int(os.getenv("LLM_CONCURRENCY", "8")))
+    local_hosts = _arg("--local-hosts", 1)
+    pipelined = "--pipelined" in sys.argv
+    out_path = _arg("--out", "")
+    keep = "--keep" in sys.argv
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    try:
+        report = run_benchmark(questions, concurrency, work_dir, local_hosts, pipelined)
+    finally:
+        if keep:
+            logger.info(f"[benchmark] Kept work dir: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(report)
+    if out_path:
+        Path(out_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info(f"[benchmark] Report saved -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
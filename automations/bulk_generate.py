@@ -1,11 +1,37 @@
 # automations/bulk_generate.py
+"""
+Tägliche Draft-Generierung: data/raw_questions/<date>/*.json -> drafts/local/<date>/<id>.md
+
+Idempotent: ein vorhandener Draft, dessen Header-Prompt-Hash
+(llm_client.draft_prompt_hash) zur aktuellen Frage passt, wird übersprungen –
+ein Re-Run nach einem Crash generiert nur fehlende, abgebrochene (.part) oder
+veraltete Drafts. Drafts werden atomar geschrieben, ein *.md ist also immer
+vollständig.
+
+    python automations/bulk_generate.py [--batch] [--force]
+
+--force generiert alle Drafts des Tages neu.
+"""
 import os
+import sys
 import json
 import logging
 from pathlib import Path
 from datetime import datetime, timezone
 
-from llm_client import generate_local_article
+from llm_client import (
+    ARTICLE_SYSTEM_PROMPT,
+    build_article_prompt,
+    draft_header,
+    draft_prompt_hash,
+    generate_articles_bulk,
+    parse_draft_header,
+    warm_up_local_llm,
+)
+from llm_batch import BatchError, make_request, run_batch
+from llm_budget import BudgetExceeded
+from llm_checkpoint import Checkpoint
+from generation_scheduler import rank
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,6 +41,14 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 RAW_QUESTIONS_DIR = BASE_DIR / "data" / "raw_questions"
 DRAFTS_DIR = BASE_DIR / "drafts" / "local"
 
+# Parallele Drafts; Default: Summe der Host-Limits aus LOCAL_LLM_ENDPOINTS,
+# sonst LLM_CONCURRENCY (siehe llm_client.local_llm_concurrency)
+CONCURRENCY = int(os.getenv("BULK_GENERATE_CONCURRENCY", "0")) or None
+# Drafts schon während der Generierung nach drafts/local/<date>/<id>.md.part streamen
+STREAM_DRAFTS = os.getenv("BULK_GENERATE_STREAM", "false").lower() == "true"
+# Höchstens so viele Drafts pro Lauf (nach Wert sortiert, siehe generation_scheduler); 0 = alle
+MAX_ITEMS = int(os.getenv("BULK_GENERATE_MAX_ITEMS", "0"))
+
 
 def load_questions_for_today(today_str: str):
     """
@@ -48,22 +82,75 @@ def save_draft(question_id: str, content_md: str, today_str: str):
     out_dir = DRAFTS_DIR / today_str
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / f"{question_id}.md"
-    with out_path.open("w", encoding="utf-8") as fh:
+    # Atomar (tmp + os.replace): ein Crash hinterlässt nie einen halben Draft
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as fh:
         fh.write(content_md)
+    os.replace(tmp_path, out_path)
     logger.info(f"[bulk_generate] Saved draft -> {out_path}")
 
 
-def main():
-    # timezone-aware replacement für datetime.utcnow()
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    logger.info(f"[bulk_generate] Starting for {today}")
-
+def draft_is_complete(question_id: str, question_text: str, today_str: str, checkpoint: Checkpoint) -> bool:
+    """
+    True, wenn drafts/local/<date>/<id>.md existiert und zum aktuellen Prompt passt.
+    Drafts ohne Prompt-Hash (ältere Läufe) zählen nur mit "done" im Checkpoint.
+    """
+    path = DRAFTS_DIR / today_str / f"{question_id}.md"
+    if not path.exists():
+        return False
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            header = parse_draft_header(fh.readline())
+    except OSError as e:
+        logger.warning(f"[bulk_generate] Could not read {path}, regenerating: {e}")
+        return False
+
+    prompt_hash = header.get("prompt")
+    if not prompt_hash:
+        return checkpoint.is_done(question_id)
+    if prompt_hash != draft_prompt_hash(question_id, question_text):
+        logger.info(f"[bulk_generate] Draft {question_id} was generated from another prompt, regenerating.")
+        return False
+    return True
+
+
+def generate_via_batch(pending, today_str: str):
+    """
+    Offline-Batch-Modus: alle Drafts als ein Batch-Job über GPT.
+    Rückgabe wie generate_articles_bulk(): Liste von (question_id, article_md | Exception).
+    """
+    requests = [
+        make_request(qid, build_article_prompt(qid, qtext), system_prompt=ARTICLE_SYSTEM_PROMPT)
+        for qid, qtext in pending
+    ]
+    contents = run_batch("bulk_generate", requests)
+
+    results = []
+    for qid, qtext in pending:
+        content = contents[qid]
+        if not isinstance(content, Exception):
+            content = draft_header("gpt-batch", prompt_hash=draft_prompt_hash(qid, qtext)) + content
+            save_draft(qid, content, today_str)
+        results.append((qid, content))
+    return results
+
+
+def plan_drafts(today: str, force: bool = False):
+    """
+    Kandidaten des Tages (nach Wert sortiert) und die davon noch zu
+    generierenden Drafts (höchstens BULK_GENERATE_MAX_ITEMS).
+    Rückgabe: (candidates, pending, deferred, checkpoint) – Listen von
+    (question_id, question_text); deferred = wegen des Limits auf später verschoben.
+    """
+    checkpoint = Checkpoint("bulk_generate", today)
     questions = load_questions_for_today(today)
     if not questions:
-        logger.warning("[bulk_generate] No questions found. Exiting.")
-        return
+        return [], [], [], checkpoint
 
-    generated_count = 0
+    # Wertvollste Themen (Pack-Umsatz) zuerst statt Dateinamen-Reihenfolge
+    questions = rank(questions, lambda q: q.get("tags"))
+
+    candidates = []
     for q in questions:
         qid = q.get("id") or q.get("question_id")
         qtext = q.get("question") or q.get("title") or ""
@@ -72,20 +159,97 @@ def main():
             logger.warning(f"[bulk_generate] Skipping invalid question: {q}")
             continue
 
-        try:
-            logger.info(f"[bulk_generate] Generating draft for {qid} ...")
-            article_md = generate_local_article(
-                question_id=qid,
-                question_text=qtext,
-                engine_label="local-llm",
-            )
+        candidates.append((qid, qtext))
+
+    # Re-Run am selben Tag: nur fehlende, abgebrochene oder veraltete Drafts
+    if force:
+        pending = list(candidates)
+        logger.info(f"[bulk_generate] --force: regenerating all {len(pending)} drafts.")
+    else:
+        pending = [
+            (qid, qtext)
+            for qid, qtext in candidates
+            if not draft_is_complete(qid, qtext, today, checkpoint)
+        ]
+    skipped_count = len(candidates) - len(pending)
+    if skipped_count:
+        logger.info(f"[bulk_generate] Resuming: {skipped_count} drafts already on disk, {len(pending)} left.")
+    deferred = []
+    if MAX_ITEMS and len(pending) > MAX_ITEMS:
+        logger.info(f"[bulk_generate] Limiting to the {MAX_ITEMS} most valuable of {len(pending)} pending drafts.")
+        pending, deferred = pending[:MAX_ITEMS], pending[MAX_ITEMS:]
+    return candidates, pending, deferred, checkpoint
+
+
+def main(batch: bool = False, force: bool = False):
+    # timezone-aware replacement für datetime.utcnow()
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    logger.info(f"[bulk_generate] Starting for {today}")
+
+    candidates, pending, deferred, checkpoint = plan_drafts(today, force)
+    deferred_count = len(deferred)
+    skipped_count = len(candidates) - len(pending) - deferred_count
+    if not candidates:
+        logger.warning("[bulk_generate] No questions found. Exiting.")
+        return
+    if not pending:
+        logger.info(f"[bulk_generate] Nothing left to generate (skipped: {skipped_count}).")
+        return
+
+    checkpoint.mark_in_flight(qid for qid, _ in pending)
+
+    def on_done(qid: str, article_md: str) -> None:
+        # Beim Streaming liegt der Draft schon auf der Platte
+        if not STREAM_DRAFTS:
             save_draft(qid, article_md, today)
+        checkpoint.mark_done(qid)
+
+    if batch:
+        logger.info(f"[bulk_generate] Submitting {len(pending)} drafts as batch ...")
+        try:
+            results = generate_via_batch(pending, today)
+        except (BudgetExceeded, BatchError) as e:
+            # Items bleiben offen und werden beim nächsten Lauf nachgeholt
+            logger.error(f"[bulk_generate] Batch failed: {e}")
+            return
+    else:
+        # Modell(e) einmal vorab laden, statt den Cold Start im ersten Draft zu bezahlen
+        warm_up_local_llm()
+        logger.info(f"[bulk_generate] Generating {len(pending)} drafts (stream={STREAM_DRAFTS}) ...")
+        results = generate_articles_bulk(
+            pending,
+            concurrency=CONCURRENCY,
+            on_done=on_done,
+            engine_label="local-llm",
+            stream_dir=DRAFTS_DIR / today if STREAM_DRAFTS else None,
+        )
+
+    generated_count = 0
+    over_budget_count = 0
+    for qid, result in results:
+        if isinstance(result, BudgetExceeded):
+            # Lokal nicht erreichbar und kein Budget mehr für den GPT-Fallback
+            over_budget_count += 1
+            checkpoint.mark_failed(qid, result)
+        elif isinstance(result, Exception):
+            logger.error(f"[bulk_generate] Error for {qid}: {result}")
+            checkpoint.mark_failed(qid, result)
+        else:
             generated_count += 1
-        except Exception as e:
-            logger.error(f"[bulk_generate] Error for {qid}: {e}")
+            if not checkpoint.is_done(qid):
+                checkpoint.mark_done(qid)
 
-    logger.info(f"[bulk_generate] Done. Generated drafts: {generated_count}")
+    if over_budget_count:
+        logger.warning(
+            f"[bulk_generate] {over_budget_count} drafts not generated: LLM budget exhausted "
+            f"(see llm_budget.py), they stay pending for the next run."
+        )
+    logger.info(
+        f"[bulk_generate] Done. Generated drafts: {generated_count}, "
+        f"failed: {len(pending) - generated_count}, skipped (already on disk): {skipped_count}, "
+        f"deferred (BULK_GENERATE_MAX_ITEMS): {deferred_count}"
+    )
 
 
 if __name__ == "__main__":
-    main()
+    main(batch="--batch" in sys.argv, force="--force" in sys.argv)
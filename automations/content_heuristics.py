@@ -0,0 +1,180 @@
+# automations/content_heuristics.py
+"""
+Strukturelle Features und heuristischer Pre-Score für Markdown-Artikel –
+ohne LLM, in Mikrosekunden.
+
+Genutzt von:
+- qa_check_content.static_checks (Issue-Liste für den QA-Report)
+- quality_filter (Kaskade: strukturell schlechte Drafts ohne GPT verwerfen;
+  optional Fast-Track ohne GPT-Score, siehe PRESCORE_ACCEPT_ABOVE)
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Höchster erreichbarer heuristic_score – den erreicht schon jeder Draft, der
+# nur die vom Prompt verlangte Struktur einhält
+HEURISTIC_MAX_SCORE = 9.5
+
+# Pre-Score-Bänder (0–10): darunter verwerfen, ab dann ohne GPT übernehmen.
+# Struktur beweist nur "schlecht", nie "exzellent" -> Fast-Track per Default aus (0)
+PRESCORE_REJECT_BELOW = float(os.getenv("QUALITY_PRESCORE_REJECT_BELOW", "3.0"))
+PRESCORE_ACCEPT_ABOVE = float(os.getenv("QUALITY_PRESCORE_ACCEPT_ABOVE", "0"))
+
+REJECT = "reject"
+FAST_TRACK = "fast_track"
+GPT = "gpt"
+
+_ENGINE_HEADER_RE = re.compile(r"^\s*<!--.*?-->\s*", re.DOTALL)
+_FENCE_RE = re.compile(r"^(```|~~~)")
+_LIST_RE = re.compile(r"^\s*([-*+]|\d+\.)\s+")
+_LINK_RE = re.compile(r"\[[^\]]+\]\([^)]+\)")
+
+# Abschnitte, die der Draft-Prompt explizit verlangt
+_EXPECTED_SECTIONS = {
+    "pitfalls": re.compile(r"pitfall|common (errors|mistakes)", re.IGNORECASE),
+    "best_practices": re.compile(r"best practice", re.IGNORECASE),
+    "conclusion": re.compile(r"conclusion|summary|wrap[- ]up", re.IGNORECASE),
+}
+
+
+def extract_features(article_md: str) -> Dict[str, Any]:
+    """
+    Zählt Struktur-Merkmale eines Markdown-Artikels (Engine-Header wird ignoriert).
+    """
+    body = _ENGINE_HEADER_RE.sub("", article_md or "", count=1)
+
+    features: Dict[str, Any] = {
+        "chars": len(body.strip()),
+        "words": 0,
+        "title": None,
+        "h1": 0,
+        "h2": 0,
+        "h3": 0,
+        "code_blocks": 0,
+        "code_lines": 0,
+        "list_items": 0,
+        "links": len(_LINK_RE.findall(body)),
+    }
+    headings: List[str] = []
+    in_block = False
+
+    for line in body.splitlines():
+        stripped = line.strip()
+        if _FENCE_RE.match(stripped):
+            if not in_block:
+                features["code_blocks"] += 1
+            in_block = not in_block
+            continue
+        if in_block:
+            features["code_lines"] += 1
+            continue
+
+        features["words"] += len(stripped.split())
+        if stripped.startswith("### "):
+            features["h3"] += 1
+            headings.append(stripped[4:])
+        elif stripped.startswith("## "):
+            features["h2"] += 1
+            headings.append(stripped[3:])
+        elif stripped.startswith("# "):
+            features["h1"] += 1
+            if features["title"] is None:
+                features["title"] = stripped[2:].strip()
+        elif _LIST_RE.match(line):
+            features["list_items"] += 1
+
+    for name, pattern in _EXPECTED_SECTIONS.items():
+        features[f"has_{name}"] = any(pattern.search(h) for h in headings)
+
+    return features
+
+
+def structural_issues(title: str, body_md: str) -> List[str]:
+    """
+    Lesbare Liste struktureller Probleme (Titel-Länge, Body-Länge, Code, Überschriften).
+    """
+    issues: List[str] = []
+    title = (title or "").strip()
+    body = (body_md or "").strip()
+
+    if len(title) < 20:
+        issues.append("Title is very short (< 20 characters).")
+    if len(title) > 120:
+        issues.append("Title is quite long (> 120 characters).")
+    if len(body) < 300:
+        issues.append("Body seems very short (< 300 characters).")
+    if "```" not in body:
+        issues.append(
+            "No code block found (```), consider adding at least one code example."
+        )
+    if "# " not in body and "## " not in body:
+        issues.append(
+            "No headings found in body, consider structuring with # / ## headings."
+        )
+    return issues
+
+
+def heuristic_score(features: Dict[str, Any]) -> float:
+    """
+    Grober Qualitäts-Score 0–10 aus den Features:
+
+    - Länge (bis 3.0): ab 600 Wörtern voll, unter 150 nichts
+    - H2-Abschnitte (bis 2.0): ab 3 voll
+    - Code (bis 2.0): 1.5 für einen Block, 2.0 ab zwei
+    - erwartete Abschnitte Pitfalls/Best Practices/Fazit (je 0.5)
+    - H1-Titel (0.5), Listen (0.5), überlange Artikel (> 4000 Wörter) -1.0
+    """
+    words = features.get("words", 0)
+    score = 0.0
+
+    if words >= 600:
+        score += 3.0
+    elif words > 150:
+        score += 3.0 * (words - 150) / 450
+    if words > 4000:
+        score -= 1.0
+
+    score += min(features.get("h2", 0), 3) / 3 * 2.0
+
+    code_blocks = features.get("code_blocks", 0)
+    if code_blocks >= 2:
+        score += 2.0
+    elif code_blocks == 1:
+        score += 1.5
+
+    score += 0.5 * sum(1 for name in _EXPECTED_SECTIONS if features.get(f"has_{name}"))
+
+    if features.get("title"):
+        score += 0.5
+    if features.get("list_items", 0) >= 2:
+        score += 0.5
+
+    return round(max(0.0, min(10.0, score)), 2)
+
+
+def classify(
+    score: float,
+    reject_below: Optional[float] = None,
+    accept_above: Optional[float] = None,
+) -> str:
+    """
+    REJECT / FAST_TRACK / GPT je nach Band (Defaults aus QUALITY_PRESCORE_*);
+    accept_above 0 = kein Fast-Track.
+    """
+    reject_below = PRESCORE_REJECT_BELOW if reject_below is None else reject_below
+    accept_above = PRESCORE_ACCEPT_ABOVE if accept_above is None else accept_above
+    if score < reject_below:
+        return REJECT
+    if accept_above and score >= accept_above:
+        return FAST_TRACK
+    return GPT
+
+
+def prescore(article_md: str) -> Dict[str, Any]:
+    """
+    Features + Score + Entscheidung in einem Schritt.
+    """
+    features = extract_features(article_md)
+    score = heuristic_score(features)
+    return {"features": features, "score": score, "decision": classify(score)}
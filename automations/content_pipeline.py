@@ -0,0 +1,222 @@
+# automations/content_pipeline.py
+"""
+Pipelined-Modus für bulk_generate -> quality_filter -> sync_microsites in
+einem Prozess: Drafts werden gescored, während die nächsten noch generiert
+werden, ausgewählte Drafts gehen direkt an den Microsite-Writer. Die
+Laufzeit ist damit ungefähr die der langsamsten Stufe statt der Summe.
+
+- Generierung wie bulk_generate (plan_drafts: Rang, Resume, --force,
+  BULK_GENERATE_MAX_ITEMS); schon vorhandene Drafts kommen zuerst in die Queue
+- fertige Drafts landen in einer begrenzten asyncio.Queue
+  (PIPELINE_QUEUE_SIZE); ist sie voll, warten die Generatoren (Backpressure)
+- PIPELINE_SCORE_WORKERS Worker scoren per Einzel-Review wie quality_filter
+  ohne Batch-Scoring (Pre-Score, Score + Snippets, Checkpoint)
+- Auswahl online: ein Draft über QUALITY_MIN_SCORE wird sofort übernommen
+  und veröffentlicht, bis QUALITY_TOP_N erreicht ist. Anders als im
+  Stufenbetrieb sind das die ersten TOP_N über der Schwelle in
+  Generierungs-Reihenfolge (= Wert-Rang aus generation_scheduler), nicht die
+  global besten TOP_N. Fast-getrackte Drafts (nur heuristischer Score, siehe
+  QUALITY_PRESCORE_ACCEPT_ABOVE) bekommen erst am Ende die übrigen Plätze.
+
+LLM-Calls laufen im Ledger/Budget weiter unter den Stages bulk_generate und
+quality_filter.
+
+    python automations/content_pipeline.py [--force]
+"""
+import os
+import sys
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import bulk_generate
+import quality_filter
+from content_heuristics import REJECT
+from llm_client import (
+    LLM_CONCURRENCY,
+    agenerate_local_article,
+    gather_bounded,
+    local_llm_concurrency,
+    run_async,
+    warm_up_local_llm,
+)
+from llm_checkpoint import Checkpoint
+from llm_ledger import stage
+from sync_microsites import publish_draft
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fertige, noch nicht gescorte Drafts im Speicher (Backpressure für die Generierung)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# Parallele Scoring-Worker; Default: QUALITY_CONCURRENCY, sonst LLM_CONCURRENCY
+PIPELINE_SCORE_WORKERS = int(os.getenv("PIPELINE_SCORE_WORKERS", "0")) or None
+
+
+def _worker_counts() -> Tuple[int, int]:
+    """
+    (parallele Generierungen, Scoring-Worker).
+    """
+    gen_limit = bulk_generate.CONCURRENCY or local_llm_concurrency()
+    score_workers = PIPELINE_SCORE_WORKERS or quality_filter.CONCURRENCY or LLM_CONCURRENCY
+    return gen_limit, max(1, score_workers)
+
+
+async def arun(today: str, force: bool = False) -> Dict[str, int]:
+    """
+    Ein kompletter Pipeline-Lauf für `today`. Rückgabe: Zähler für den Report.
+    """
+    candidates, pending, deferred, gen_checkpoint = bulk_generate.plan_drafts(today, force)
+    review_checkpoint = Checkpoint("quality_filter", today)
+    not_on_disk = {qid for qid, _ in pending + deferred}
+    on_disk = [qid for qid, _ in candidates if qid not in not_on_disk]
+
+    gen_limit, score_workers = _worker_counts()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+    drafts_dir = bulk_generate.DRAFTS_DIR / today
+    counts = {
+        "generated": 0,
+        "generation_failed": 0,
+        "skipped": len(on_disk),
+        "deferred": len(deferred),
+        "scored": 0,
+        "review_failed": 0,
+        "selected": 0,
+        "publish_failed": 0,
+    }
+    all_snippets: List[Dict[str, Any]] = []
+    fast_tracked: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    async def select(item, score) -> None:
+        # Platz vor dem ersten await reservieren, sonst überholen sich die Worker bei TOP_N
+        counts["selected"] += 1
+        try:
+            # Datei-I/O nicht im Event-Loop – der blockiert sonst Generatoren und Worker
+            await asyncio.to_thread(quality_filter.save_selected_draft, item, today)
+            await asyncio.to_thread(publish_draft, item, today)
+        except Exception as e:
+            logger.error(f"[content_pipeline] Error publishing {item['id']}: {e}")
+            counts["selected"] -= 1
+            counts["publish_failed"] += 1
+
+    async def generate(q):
+        qid, qtext = q
+        stream_to = drafts_dir / f"{qid}.md" if bulk_generate.STREAM_DRAFTS else None
+        with stage("bulk_generate"):
+            article_md = await agenerate_local_article(qid, qtext, "local-llm", stream_to)
+        if not bulk_generate.STREAM_DRAFTS:
+            bulk_generate.save_draft(qid, article_md, today)
+        gen_checkpoint.mark_done(qid)
+        # Wartet, solange die Queue voll ist
+        await queue.put({"id": qid, "path": drafts_dir / f"{qid}.md", "content": article_md})
+        return article_md
+
+    async def produce():
+        try:
+            for qid in on_disk:
+                path = drafts_dir / f"{qid}.md"
+                content = await asyncio.to_thread(path.read_text, encoding="utf-8")
+                await queue.put({"id": qid, "path": path, "content": content})
+
+            if pending:
+                gen_checkpoint.mark_in_flight(qid for qid, _ in pending)
+                logger.info(
+                    f"[content_pipeline] Generating {len(pending)} drafts "
+                    f"({gen_limit} parallel, {score_workers} scoring workers) ..."
+                )
+                results = await gather_bounded(pending, generate, gen_limit)
+                for (qid, _), result in zip(pending, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"[content_pipeline] Error generating {qid}: {result}")
+                        gen_checkpoint.mark_failed(qid, result)
+                        counts["generation_failed"] += 1
+                    else:
+                        counts["generated"] += 1
+        finally:
+            for _ in range(score_workers):
+                await queue.put(None)
+
+    async def review(item) -> None:
+        qid = item["id"]
+        if review_checkpoint.is_done(qid, quality_filter.draft_version(item)):
+            cached = review_checkpoint.result(qid)
+            score, snippets = cached["score"], cached["snippets"]
+        elif quality_filter.run_prescore(item) == REJECT:
+            logger.info(f"[content_pipeline] Rejected {qid} by pre-score {item['prescore']['score']}")
+            score, snippets = quality_filter.heuristic_score(item), []
+            review_checkpoint.mark_done(
+                qid, {"score": score, "snippets": snippets}, version=quality_filter.draft_version(item)
+            )
+        else:
+            review_checkpoint.mark_in_flight([qid])
+            try:
+                with stage("quality_filter"):
+                    score, snippets = await quality_filter.areview_draft(item, today, review_checkpoint)
+            except Exception as e:
+                logger.error(f"[content_pipeline] Error scoring {qid}: {e}")
+                review_checkpoint.mark_failed(qid, e)
+                counts["review_failed"] += 1
+                return
+
+        counts["scored"] += 1
+        all_snippets.extend(snippets or [])
+        if not quality_filter.is_selectable(score):
+            return
+        if score.get("source") == "heuristic":
+            # Heuristik und GPT-Score sind nicht vergleichbar -> nach den GPT-gescorten
+            fast_tracked.append((item, score))
+            return
+        if counts["selected"] >= quality_filter.TOP_N:
+            logger.info(
+                f"[content_pipeline] {qid} passed with {score['overall_score']}, "
+                f"but QUALITY_TOP_N ({quality_filter.TOP_N}) is already reached"
+            )
+            return
+        await select(item, score)
+
+    async def consume():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            # Ein kaputter Draft (z.B. im Pre-Score) darf den Worker nicht beenden
+            try:
+                await review(item)
+            except Exception as e:
+                logger.error(f"[content_pipeline] Error processing {item['id']}: {e}")
+                counts["review_failed"] += 1
+
+    if pending:
+        # Modell(e) einmal vorab laden, statt den Cold Start im ersten Draft zu bezahlen
+        with stage("bulk_generate"):
+            await asyncio.to_thread(warm_up_local_llm)
+    await asyncio.gather(produce(), *(consume() for _ in range(score_workers)))
+
+    fast_tracked.sort(key=lambda entry: entry[1]["overall_score"], reverse=True)
+    for item, score in fast_tracked[:max(0, quality_filter.TOP_N - counts["selected"])]:
+        await select(item, score)
+
+    if all_snippets:
+        quality_filter.save_social_queue(all_snippets, today)
+    return counts
+
+
+def main(force: bool = False):
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    logger.info(f"[content_pipeline] Starting for {today}")
+
+    gen_limit, score_workers = _worker_counts()
+    counts = run_async(lambda: arun(today, force), gen_limit + score_workers)
+
+    logger.info(
+        f"[content_pipeline] Done. Generated: {counts['generated']} "
+        f"(failed: {counts['generation_failed']}, already on disk: {counts['skipped']}, "
+        f"deferred: {counts['deferred']}), scored: {counts['scored']} "
+        f"(failed: {counts['review_failed']}), selected + published: {counts['selected']} "
+        f"(failed: {counts['publish_failed']})"
+    )
+
+
+if __name__ == "__main__":
+    main(force="--force" in sys.argv)
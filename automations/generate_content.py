@@ -13,6 +13,11 @@ from app.models.content import RawQuestion, ContentItem
 # NEW OpenAI client import
 from openai import OpenAI
 
+from generation_scheduler import rank
+from llm_ledger import track, usage_fields
+from llm_stream_guard import STREAM_GUARD_RETRIES, StreamAborted, new_guard
+from prompts import get_prompt
+
 # init DB tables (in case web app didn't run first)
 init_db()
 
@@ -20,55 +25,78 @@ init_db()
 client = OpenAI()
 
 MAX_ITEMS_PER_RUN = 5  # balanced mode
+# So viele neue Fragen werden nach Wert sortiert, bevor MAX_ITEMS_PER_RUN greift
+SCHEDULER_CANDIDATES = int(os.getenv("GENERATE_CONTENT_CANDIDATES", "200"))
 
-TUTORIAL_SYSTEM_PROMPT = (
-    "You are a senior Python backend engineer and educator. "
-    "Create clear, practical micro-tutorials in Markdown."
-)
-
-
-def build_user_prompt(raw: RawQuestion) -> str:
-    return f"""
-I will give you a developer question. Create a micro-tutorial that:
-
-1. Has an H1 title.
-2. Short intro focusing on the problem.
-3. Has sections: "Why this happens", "Step-by-step solution",
-   "Example variation", "Common errors & fixes", "Cheat sheet summary".
-4. Include at least one full code example.
-5. Keep it under 1200 words.
+# Prompt verlangt < 1200 Wörter; deutlich darüber wird der Stream abgebrochen
+TUTORIAL_MAX_TOKENS = int(os.getenv("TUTORIAL_MAX_TOKENS", "3000"))
 
-Question title:
-{raw.title}
+TUTORIAL_PROMPT = get_prompt("tutorial")
+TUTORIAL_SYSTEM_PROMPT = TUTORIAL_PROMPT.system
 
-Question body:
-{raw.body}
 
-Return Markdown only.
-""".strip()
+def build_user_prompt(raw: RawQuestion) -> str:
+    return TUTORIAL_PROMPT.render(title=raw.title, body=raw.body)
+
+
+def _stream_markdown(model: str, user_prompt: str) -> str:
+    guard = new_guard(max_tokens=TUTORIAL_MAX_TOKENS)
+    parts = []
+
+    with track("openai", model, call="tutorial") as rec:
+        rec["prompt_version"] = TUTORIAL_PROMPT.id
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": TUTORIAL_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.4,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    rec.update(usage_fields(chunk.usage))
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                if text and guard:
+                    guard.feed(text)
+                parts.append(text)
+        except StreamAborted as e:
+            rec["outcome"] = "aborted"
+            rec["abort_reason"] = e.reason
+            rec["completion_tokens"] = guard.tokens
+            stream.close()
+            raise
+
+    return "".join(parts)
 
 
 def generate_markdown(raw: RawQuestion) -> str:
     user_prompt = build_user_prompt(raw)
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-    resp = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-        messages=[
-            {"role": "system", "content": TUTORIAL_SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.4,
-    )
-
-    return resp.choices[0].message.content
+    # Gestreamt, damit ein ausufernder Output früh abbricht statt bezahlt zu werden
+    attempts = 1 + STREAM_GUARD_RETRIES
+    for attempt in range(1, attempts + 1):
+        try:
+            return _stream_markdown(model, user_prompt)
+        except StreamAborted as e:
+            print(f"[generate_content] {e} (attempt {attempt}/{attempts})")
+            if attempt == attempts:
+                raise
 
 
 def run():
     with get_session() as session:
         q = select(RawQuestion).where(RawQuestion.status == "new").limit(
-            MAX_ITEMS_PER_RUN
+            SCHEDULER_CANDIDATES
         )
-        raws = session.exec(q).all()
+        # Wertvollste Themen (Pack-Umsatz) zuerst, dann erst das Limit
+        raws = rank(session.exec(q).all(), lambda raw: raw.tags)[:MAX_ITEMS_PER_RUN]
 
         if not raws:
             print("[generate_content] No new RawQuestion rows.")
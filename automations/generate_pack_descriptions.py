@@ -24,9 +24,12 @@ from datetime import datetime, timezone
 from typing import Any, Dict
 import textwrap
 
-import requests
 import yaml
 
+from llm_cache import cached_completion
+from llm_client import get_http_session, http_timeout
+from llm_ledger import track, usage_fields
+
 ROOT_DIR = Path(__file__).resolve().parents[1]
 SITE_DIR = ROOT_DIR / "site"
 PACKS_DIR = SITE_DIR / "static" / "packs"
@@ -70,18 +73,19 @@ def call_openai(prompt: str) -> str:
         "Authorization": f"Bearer {OPENAI_API_KEY}",
         "Content-Type": "application/json",
     }
+    system_prompt = (
+        "You are a concise copywriter. "
+        "Write a compelling 3–4 sentence product description for a digital pack. "
+        "Target: intermediate developers / engineers. "
+        "Tone: friendly, clear, slightly opinionated, no marketing fluff. "
+        "Output plain text, no markdown headings or bullet lists."
+    )
     payload = {
         "model": OPENAI_MODEL,
         "messages": [
             {
                 "role": "system",
-                "content": (
-                    "You are a concise copywriter. "
-                    "Write a compelling 3–4 sentence product description for a digital pack. "
-                    "Target: intermediate developers / engineers. "
-                    "Tone: friendly, clear, slightly opinionated, no marketing fluff. "
-                    "Output plain text, no markdown headings or bullet lists."
-                ),
+                "content": system_prompt,
             },
             {
                 "role": "user",
@@ -92,10 +96,23 @@ def call_openai(prompt: str) -> str:
         "temperature": 0.7,
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
-    return data["choices"][0]["message"]["content"].strip()
+    def _request() -> str:
+        with track("openai", OPENAI_MODEL, call="pack_description") as rec:
+            resp = get_http_session().post(url, headers=headers, json=payload, timeout=http_timeout(60))
+            resp.raise_for_status()
+            data = resp.json()
+            rec.update(usage_fields(data.get("usage")))
+        return data["choices"][0]["message"]["content"].strip()
+
+    return cached_completion(
+        _request,
+        engine="openai",
+        model=OPENAI_MODEL,
+        prompt=prompt,
+        system_prompt=system_prompt,
+        temperature=0.7,
+        max_tokens=260,
+    )
 
 
 def build_prompt(pack: dict, template: Dict[str, Any] | None) -> str:
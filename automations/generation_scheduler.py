@@ -0,0 +1,115 @@
+# automations/generation_scheduler.py
+"""
+Wertbasierte Reihenfolge für die Generierung: Fragen zu Themen, die sich
+verkaufen, kommen zuerst dran – wenn Budget oder Item-Limit den Lauf
+begrenzen, trifft es die Themen ohne Umsatz.
+
+Erwarteter Wert einer Frage = Umsatz der besten Pack-Kategorie ihrer Tags:
+
+- data/metrics/sales_by_pack.json: {pack_slug: {"total_amount": <cents>, ...}}
+- Pack -> Kategorie: Slug-Präfix ("python-data-pack-2025-w49" -> python-data),
+  sonst die Slug-Wörter über pack_categories.PACK_CATEGORY_MAP
+  ("ai-rag-pack-1" -> rag -> rag-ai)
+- Frage -> Kategorien: Tags über PACK_CATEGORY_MAP (categorize_post)
+
+Fragen ohne Umsatz-Signal behalten ihre ursprüngliche Reihenfolge hinter den
+anderen (stabile Sortierung).
+"""
+import os
+import re
+import json
+import logging
+from pathlib import Path
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from pack_categories import PACK_CATEGORY_MAP, categorize_post
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+GENERATION_SCHEDULER_ENABLED = os.getenv("GENERATION_SCHEDULER_ENABLED", "true").lower() == "true"
+SALES_BY_PACK_PATH = Path(os.getenv("SALES_BY_PACK_PATH", BASE_DIR / "data" / "metrics" / "sales_by_pack.json"))
+
+PACK_CATEGORIES = set(PACK_CATEGORY_MAP.values())
+
+T = TypeVar("T")
+
+
+def pack_categories(pack_slug: str) -> List[str]:
+    """
+    Kategorien eines Packs anhand seines Slugs.
+    """
+    slug = (pack_slug or "").lower()
+    for category in PACK_CATEGORIES:
+        if slug == category or slug.startswith(f"{category}-"):
+            return [category]
+    return categorize_post(re.split(r"[-_]", slug))
+
+
+def load_category_revenue(path: Optional[Path] = None) -> Dict[str, float]:
+    """
+    Umsatz (kleinste Währungseinheit) pro Pack-Kategorie aus sales_by_pack.json.
+    Fehlt die Datei, ist das Ergebnis leer – die Reihenfolge bleibt dann unverändert.
+    """
+    path = Path(path or SALES_BY_PACK_PATH)
+    if not path.exists():
+        return {}
+    try:
+        sales = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"[generation_scheduler] Could not read {path}: {e}")
+        return {}
+
+    revenue: Dict[str, float] = defaultdict(float)
+    for pack_slug, stats in sales.items():
+        categories = pack_categories(pack_slug)
+        if not categories:
+            logger.info(f"[generation_scheduler] No category for pack {pack_slug!r}, ignoring its sales")
+            continue
+        amount = float((stats or {}).get("total_amount") or 0)
+        for category in categories:
+            revenue[category] += amount
+    return dict(revenue)
+
+
+def _tag_list(tags: Any) -> List[str]:
+    # Raw-Question-JSON: Liste; RawQuestion.tags (DB): kommagetrennter String
+    if isinstance(tags, str):
+        return [t.strip() for t in tags.split(",") if t.strip()]
+    return list(tags or [])
+
+
+def expected_value(tags: Any, revenue: Dict[str, float]) -> float:
+    """
+    Umsatz der wertvollsten Kategorie, in die die Tags fallen (0 = kein Signal).
+    """
+    return max((revenue.get(c, 0.0) for c in categorize_post(_tag_list(tags))), default=0.0)
+
+
+def rank(
+    items: List[T],
+    tags_of: Callable[[T], Any],
+    revenue: Optional[Dict[str, float]] = None,
+) -> List[T]:
+    """
+    Sortiert Items absteigend nach expected_value(tags_of(item)); bei
+    gleichem Wert bleibt die Eingabe-Reihenfolge. Mit
+    GENERATION_SCHEDULER_ENABLED=false oder ohne Sales-Daten unverändert.
+    """
+    if not GENERATION_SCHEDULER_ENABLED or not items:
+        return list(items)
+    revenue = load_category_revenue() if revenue is None else revenue
+    if not revenue:
+        return list(items)
+
+    values = [expected_value(tags_of(item), revenue) for item in items]
+    order = sorted(range(len(items)), key=lambda i: -values[i])
+    valued = sum(1 for v in values if v > 0)
+    top = ", ".join(f"{c}={v:.0f}" for c, v in sorted(revenue.items(), key=lambda kv: -kv[1])[:3])
+    logger.info(
+        f"[generation_scheduler] Ranked {len(items)} items by pack revenue ({top}): "
+        f"{valued} with a revenue signal, {len(items) - valued} without"
+    )
+    return [items[i] for i in order]
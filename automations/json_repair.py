@@ -0,0 +1,255 @@
+# automations/json_repair.py
+"""
+Tolerantes Parsen von JSON-Mode-Antworten.
+
+Ein json.loads-Fehler wirft sonst eine bereits bezahlte Completion weg. Hier
+wird erst lokal repariert, und nur wenn das nicht reicht, darf der Aufrufer
+einen billigen "fix this JSON"-Call nachschieben (fixer).
+
+Lokale Reparaturen (nur wenn das JSON nicht direkt parsebar ist):
+- Code-Fences (```json ... ```) und Text vor/nach dem JSON entfernen
+- Single-Quotes, Python-Literale (True/False/None), Trailing Commas,
+  rohe Zeilenumbrüche in Strings
+- abgeschnittenes JSON: zurück bis zum letzten vollständigen Element
+  (nie ein halber String, nie ein halbes verschachteltes Objekt) und offene
+  Arrays/Objekte schließen
+
+Mit validate (z.B. "Score hat alle Dimensionen") zählt ein Ergebnis nur,
+wenn es vollständig ist – ein lokal "repariertes", aber abgeschnittenes
+Objekt geht dann an den fixer bzw. scheitert, statt still Felder zu verlieren.
+
+Zähler (stats(), Log bei Prozessende): parsed (direkt), repaired (lokal),
+refixed (per fixer-Call), failed.
+"""
+import re
+import json
+import atexit
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# So viele Schnittpunkte (von hinten) werden bei abgeschnittenem JSON probiert
+_MAX_TRUNCATION_CUTS = 50
+
+_FENCE_RE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+_decoder = json.JSONDecoder()
+_counts: Counter = Counter()
+_counts_lock = threading.Lock()
+
+
+class JSONRepairError(ValueError):
+    """
+    Weder direkt noch nach lokaler Reparatur (bzw. fixer-Call) parsebar.
+    """
+
+
+def _count(key: str) -> None:
+    with _counts_lock:
+        _counts[key] += 1
+
+
+def stats() -> Dict[str, int]:
+    with _counts_lock:
+        return {key: _counts[key] for key in ("parsed", "repaired", "refixed", "failed")}
+
+
+def _log_stats_at_exit() -> None:
+    counts = stats()
+    if counts["repaired"] or counts["refixed"] or counts["failed"]:
+        logger.info(f"[json_repair] Stats: {counts}")
+
+
+atexit.register(_log_stats_at_exit)
+
+
+def _strip_fence(text: str) -> str:
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def _normalize(text: str) -> str:
+    """
+    Single-Quotes -> Double-Quotes, Python-Literale -> JSON, Trailing Commas
+    und rohe Zeilenumbrüche in Strings raus. Endet nach dem ersten
+    vollständigen Top-Level-Wert (Rest ist Begleittext).
+    """
+    out: List[str] = []
+    quote = None        # aktives String-Zeichen (' oder ")
+    escaped = False
+    depth = 0
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if escaped:
+                # \' ist in JSON kein gültiges Escape
+                out.append("'" if ch == "'" else "\\" + ch)
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch != "\r":
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            depth += 1
+            out.append(ch)
+        elif ch in "}]":
+            # Trailing Comma vor der schließenden Klammer entfernen
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            out.append(ch)
+            depth -= 1
+            if depth <= 0:
+                break
+        elif ch.isalpha():
+            word = re.match(r"[A-Za-z_]+", text[i:]).group(0)
+            out.append(_PY_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _close_truncated(text: str) -> Tuple[bool, Any]:
+    """
+    Abgeschnittenes JSON: an Element-Grenzen (Komma, öffnende/schließende
+    Klammer) von hinten nach vorne kürzen und die offenen Klammern schließen.
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            cuts.append((i + 1, tuple(stack)))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, tuple(stack)))
+        elif ch == ",":
+            cuts.append((i, tuple(stack)))
+    if not in_string:
+        cuts.append((len(text), tuple(stack)))
+
+    for pos, open_brackets in reversed(cuts[-_MAX_TRUNCATION_CUTS:]):
+        # Verschachtelte Objekte nur ganz oder gar nicht (kein Snippet ohne "text",
+        # kein Score ohne Dimensionen) – halb bleiben darf nur der Top-Level-Wert
+        if len(open_brackets) > 1 and open_brackets[-1] == "{":
+            continue
+        candidate = text[:pos].rstrip().rstrip(",") + "".join(_CLOSERS[b] for b in reversed(open_brackets))
+        try:
+            return True, json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return False, None
+
+
+def repair_json(raw: str) -> Any:
+    """
+    Nur lokale Reparatur (ohne Zähler); wirft JSONRepairError.
+    """
+    text = _strip_fence(raw or "").strip()
+    starts = [pos for pos in (text.find("{"), text.find("[")) if pos >= 0]
+    if not starts:
+        raise JSONRepairError("No JSON object or array in response.")
+    text = text[min(starts):]
+
+    normalized = _normalize(text)
+    for candidate in (text, normalized):
+        try:
+            # raw_decode ignoriert Begleittext nach dem JSON
+            return _decoder.raw_decode(candidate)[0]
+        except json.JSONDecodeError:
+            continue
+
+    ok, value = _close_truncated(normalized)
+    if ok:
+        return value
+    raise JSONRepairError(f"Could not repair JSON (starts with {text[:80]!r}).")
+
+
+def _validated(value: Any, validate: Optional[Callable[[Any], bool]], step: str) -> Any:
+    if validate is not None and not validate(value):
+        raise JSONRepairError(f"JSON ({step}) lacks required fields: {json.dumps(value)[:200]}")
+    return value
+
+
+def parse_json(
+    raw: str,
+    fixer: Optional[Callable[[str], str]] = None,
+    label: str = "json_repair",
+    validate: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    json.loads -> lokale Reparatur -> fixer(raw) (z.B. billiger GPT-Call, der
+    das reparierte JSON als Text liefert). Jede Stufe muss validate(value)
+    bestehen, sonst geht es mit der nächsten weiter. Wirft JSONRepairError,
+    wenn alles scheitert.
+
+    fixer meldet Transportfehler als JSONRepairError; alles andere (z.B.
+    llm_budget.BudgetExceeded) geht unverändert an den Aufrufer, damit die
+    Stage aufhört statt den Draft als Parse-Fehler zu verbuchen.
+    """
+    error: Exception = JSONRepairError("No JSON.")
+    try:
+        value = _validated(json.loads(raw), validate, "parsed")
+        _count("parsed")
+        return value
+    except (TypeError, json.JSONDecodeError, JSONRepairError) as e:
+        error = e
+
+    if not isinstance(error, JSONRepairError):
+        # Syntaktisch kaputt -> lokal reparieren; unvollständig -> nur noch fixer
+        try:
+            value = _validated(repair_json(raw), validate, "repaired")
+            _count("repaired")
+            logger.info(f"[{label}] Repaired malformed JSON locally.")
+            return value
+        except JSONRepairError as e:
+            error = e
+
+    if fixer is not None:
+        try:
+            value = _validated(repair_json(fixer(raw)), validate, "refixed")
+            _count("refixed")
+            logger.warning(f"[{label}] Malformed JSON fixed by follow-up call.")
+            return value
+        except JSONRepairError as e:
+            error = e
+
+    _count("failed")
+    logger.error(f"[{label}] JSON parse error ({error}). Raw: {raw}")
+    raise JSONRepairError(str(error)) from None
@@ -0,0 +1,301 @@
+# automations/llm_batch.py
+"""
+Offline-Batch-Modus für LLM-Stages, die nicht latenzkritisch sind.
+
+Ablauf pro Stage:
+1. Stage baut Requests (custom_id + Chat-Completions-Body) -> make_request()
+2. run_batch() schreibt sie nach data/batches/<stage>/<timestamp>/requests.jsonl
+3. Das Backend nimmt die Datei an (submit), wird gepollt (status) und liefert
+   eine Output-JSONL im OpenAI-Batch-Format (results)
+4. run_batch() gibt {custom_id: content | Exception} zurück, die Stage verteilt
+   die Ergebnisse auf ihre Outputs
+
+Backends (LLM_BATCH_BACKEND):
+- "openai": OpenAI Batch API (/v1/chat/completions, 24h-Fenster)
+- "local":  dateibasierter Stand-in; arbeitet die Requests im Hintergrund über
+            llm_client ab (oder über einen eigenen responder, z.B. in Tests)
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import llm_client
+from llm_budget import plan_batch
+from llm_ledger import record_call
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BATCH_DIR = BASE_DIR / "data" / "batches"
+
+LLM_BATCH_BACKEND = os.getenv("LLM_BATCH_BACKEND", "openai")
+LLM_BATCH_POLL_INTERVAL = float(os.getenv("LLM_BATCH_POLL_INTERVAL", "30"))
+LLM_BATCH_MAX_WAIT = float(os.getenv("LLM_BATCH_MAX_WAIT", str(24 * 3600)))
+
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+# Status-Werte wie bei der OpenAI Batch API
+DONE_STATES = {"completed"}
+FAILED_STATES = {"failed", "expired", "cancelled"}
+
+
+class BatchError(RuntimeError):
+    """
+    Batch ist fehlgeschlagen, abgelaufen oder hat das Zeitlimit überschritten.
+    """
+
+
+def make_request(
+    custom_id: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    temperature: float = 0.3,
+    response_format: Optional[Dict[str, Any]] = None,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Eine Zeile der Request-JSONL (OpenAI-Batch-Format).
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+
+    body: Dict[str, Any] = {
+        "model": model or llm_client.OPENAI_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+    }
+    if response_format:
+        body["response_format"] = response_format
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+
+    return {"custom_id": custom_id, "method": "POST", "url": CHAT_ENDPOINT, "body": body}
+
+
+class OpenAIBatchBackend:
+    name = "openai"
+
+    def _client(self):
+        client = llm_client.get_openai_client()
+        if client is None:
+            raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
+        return client
+
+    def submit(self, request_file: Path) -> str:
+        client = self._client()
+        with request_file.open("rb") as fh:
+            uploaded = client.files.create(file=fh, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self._client().batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str, out_path: Path) -> Path:
+        client = self._client()
+        batch = client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.append(client.files.content(file_id).text.strip())
+        out_path.write_text("\n".join(line for line in lines if line) + "\n", encoding="utf-8")
+        return out_path
+
+
+class LocalFileBatchBackend:
+    """
+    Stand-in ohne Batch-API: Requests werden in einem Hintergrund-Thread
+    abgearbeitet, das Ergebnis landet als output.jsonl neben der Request-Datei.
+
+    responder(body) -> Antworttext oder kompletter Chat-Completion-Body (dict,
+    inkl. usage). Default: synchroner Chat-Call über llm_client; dessen usage
+    landet im Output, damit run_batch() die Tokens im Ledger/Budget verbucht.
+    """
+
+    name = "local"
+
+    def __init__(self, responder: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self.responder = responder or self._chat_responder
+        self._jobs: Dict[str, Path] = {}
+
+    @staticmethod
+    def _chat_responder(body: Dict[str, Any]) -> Dict[str, Any]:
+        # Echte (bezahlte) Calls -> Body wie bei der Batch-API, mit usage
+        return llm_client._openai_chat(**body).model_dump(exclude_none=True)
+
+    def _output_path(self, batch_id: str) -> Path:
+        return self._jobs[batch_id].with_name("output.jsonl")
+
+    def submit(self, request_file: Path) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        self._jobs[batch_id] = request_file
+        threading.Thread(target=self._process, args=(batch_id,), daemon=True).start()
+        return batch_id
+
+    def _process(self, batch_id: str) -> None:
+        request_file = self._jobs[batch_id]
+        out_lines = []
+        for line in request_file.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            req = json.loads(line)
+            entry: Dict[str, Any] = {"id": f"req_{uuid.uuid4().hex[:12]}", "custom_id": req["custom_id"]}
+            try:
+                answer = self.responder(req["body"])
+                if not isinstance(answer, dict):
+                    answer = {"choices": [{"index": 0, "message": {"role": "assistant", "content": answer}}]}
+                entry["response"] = {"status_code": 200, "body": answer}
+                entry["error"] = None
+            except Exception as e:
+                entry["response"] = None
+                entry["error"] = {"code": type(e).__name__, "message": str(e)}
+            out_lines.append(json.dumps(entry, ensure_ascii=False))
+
+        # Erst komplett schreiben, dann umbenennen -> status() sieht nie eine halbe Datei
+        out_path = self._output_path(batch_id)
+        tmp_path = out_path.with_suffix(".tmp")
+        tmp_path.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, out_path)
+
+    def status(self, batch_id: str) -> str:
+        return "completed" if self._output_path(batch_id).exists() else "in_progress"
+
+    def results(self, batch_id: str, out_path: Path) -> Path:
+        src = self._output_path(batch_id)
+        if src != out_path:
+            out_path.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+        return out_path
+
+
+def get_backend(name: Optional[str] = None):
+    name = name or LLM_BATCH_BACKEND
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        return LocalFileBatchBackend()
+    raise ValueError(f"Unknown LLM_BATCH_BACKEND: {name!r} (expected 'openai' or 'local')")
+
+
+def parse_output_file(path: Path) -> Dict[str, Any]:
+    """
+    Liest eine Batch-Output-JSONL -> {custom_id: content | Exception}.
+    """
+    results: Dict[str, Any] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        cid = entry.get("custom_id")
+        error = entry.get("error")
+        response = entry.get("response") or {}
+        if error or response.get("status_code", 200) >= 400:
+            message = (error or {}).get("message") or json.dumps(response.get("body"))
+            results[cid] = BatchError(f"Batch item {cid} failed: {message}")
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[cid] = (content or "").strip()
+        except (KeyError, IndexError, TypeError) as e:
+            results[cid] = BatchError(f"Batch item {cid} has unexpected format: {e}")
+    return results
+
+
+def output_usage(path: Path) -> Dict[str, int]:
+    """
+    Summiert die Token-Usage aller Antworten einer Batch-Output-JSONL.
+    """
+    totals = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        usage = ((json.loads(line).get("response") or {}).get("body") or {}).get("usage") or {}
+        totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        totals["completion_tokens"] += usage.get("completion_tokens") or 0
+        totals["cached_tokens"] += (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    return totals
+
+
+def run_batch(
+    stage: str,
+    requests: List[Dict[str, Any]],
+    backend=None,
+    poll_interval: Optional[float] = None,
+    max_wait: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Serialisiert, submitted und pollt einen Batch; liefert {custom_id: content | Exception}.
+    custom_ids ohne Ergebnis bekommen eine BatchError. Vor dem Submit wird der
+    ganze Batch gegen das LLM-Budget geprüft (ggf. degradiert oder BudgetExceeded).
+    """
+    if not requests:
+        return {}
+
+    backend = backend or get_backend()
+    plan_batch(requests, stage, engine=f"{backend.name}-batch")
+    poll_interval = LLM_BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+    max_wait = LLM_BATCH_MAX_WAIT if max_wait is None else max_wait
+
+    run_dir = BATCH_DIR / stage / datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    run_dir.mkdir(parents=True, exist_ok=True)
+    request_file = run_dir / "requests.jsonl"
+    with request_file.open("w", encoding="utf-8") as fh:
+        for req in requests:
+            fh.write(json.dumps(req, ensure_ascii=False) + "\n")
+
+    batch_id = backend.submit(request_file)
+    (run_dir / "batch.json").write_text(
+        json.dumps({"batch_id": batch_id, "backend": backend.name, "count": len(requests)}, indent=2),
+        encoding="utf-8",
+    )
+    logger.info(f"[llm_batch] {stage}: submitted {len(requests)} requests as {batch_id} ({backend.name})")
+
+    started = time.monotonic()
+    while True:
+        status = backend.status(batch_id)
+        if status in DONE_STATES:
+            break
+        if status in FAILED_STATES:
+            raise BatchError(f"Batch {batch_id} ended with status {status!r}")
+        if time.monotonic() - started > max_wait:
+            raise BatchError(f"Batch {batch_id} not finished after {max_wait:.0f}s (status {status!r})")
+        logger.info(f"[llm_batch] {stage}: {batch_id} is {status}, next poll in {poll_interval:g}s")
+        time.sleep(poll_interval)
+
+    output_file = backend.results(batch_id, run_dir / "output.jsonl")
+    results = parse_output_file(output_file)
+
+    for req in requests:
+        cid = req["custom_id"]
+        if cid not in results:
+            results[cid] = BatchError(f"Batch item {cid} missing from output")
+
+    failed = sum(1 for r in results.values() if isinstance(r, Exception))
+    record_call(
+        call="batch",
+        engine=f"{backend.name}-batch",
+        model=requests[0]["body"].get("model", llm_client.OPENAI_MODEL),
+        latency_s=time.monotonic() - started,
+        outcome="ok" if not failed else "partial",
+        stage=stage,
+        items=len(requests),
+        failed=failed,
+        **output_usage(output_file),
+    )
+    logger.info(
+        f"[llm_batch] {stage}: {batch_id} done in {time.monotonic() - started:.0f}s, "
+        f"{len(results) - failed} ok, {failed} failed"
+    )
+    return results
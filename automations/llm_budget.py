@@ -0,0 +1,434 @@
+# automations/llm_budget.py
+"""
+Kosten-Budget für LLM-Calls pro Stage und pro Tag.
+
+Jeder bezahlte Call, der über llm_ledger (track / record_call) läuft, wird
+hier mit seinen tatsächlichen Tokens und den daraus geschätzten Kosten
+verbucht – als eine Zeile in data/llm_budget/<day>.jsonl, damit alle Skripte
+eines Tages gegen dasselbe Tagesbudget laufen:
+
+    {"ts": "...", "stage": "bulk_generate", "engine": "openai", "model": "gpt-4.1-mini",
+     "prompt_tokens": 910, "completion_tokens": 840, "cached_tokens": 0, "cost_usd": 0.0017}
+
+Die Datei wird nur angehängt (ein write() pro Zeile, O_APPEND) und beim Lesen
+summiert; parallel laufende Prozesse (z.B. content_pipeline und ein
+Stage-Skript) verlieren so keine Buchungen. Jeder Prozess liest nur die seit
+dem letzten Lesen neu angehängten Zeilen.
+
+Vor einem bezahlten Call holt sich die Call-Site per plan_call() Modell und
+max_tokens (Schätzung: Prompt + maximaler Output). Ab LLM_BUDGET_DEGRADE_AT
+(Anteil des Budgets) wird degradiert: billigeres Modell und kürzerer Output
+(Calls ohne max_tokens bekommen dann die Obergrenze degraded_max_tokens,
+falls die Call-Site eine angibt).
+Reicht selbst das nicht mehr, kommt BudgetExceeded – die Stage hört dann
+sauber auf, statt weiter Geld auszugeben.
+
+Budgets in USD (0 = unbegrenzt):
+    LLM_BUDGET_DAY_USD     alle Stages zusammen pro Tag (Default: 0, opt-in)
+    LLM_BUDGET_STAGE_USD   pro Stage, z.B. "bulk_generate=2, qa_check_content=0.5"
+
+Parallele Calls prüfen gegen den Stand vor ihrem Start; überzogen wird also
+höchstens um die gerade laufenden Calls. Das lokale LLM kostet nichts und
+wird nicht verbucht (seine Tokens stehen im Ledger).
+
+Stand anzeigen:
+
+    python automations/llm_budget.py [YYYY-MM-DD]
+"""
+import os
+import sys
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_ledger import add_listener, current_stage
+from llm_tokens import estimate_messages_tokens, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BUDGET_DIR = BASE_DIR / "data" / "llm_budget"
+
+LLM_BUDGET_ENABLED = os.getenv("LLM_BUDGET_ENABLED", "true").lower() == "true"
+LLM_BUDGET_DAY_USD = float(os.getenv("LLM_BUDGET_DAY_USD", "0"))
+LLM_BUDGET_STAGE_USD = os.getenv("LLM_BUDGET_STAGE_USD", "")
+# Ab diesem Anteil eines Budgets wird degradiert
+LLM_BUDGET_DEGRADE_AT = float(os.getenv("LLM_BUDGET_DEGRADE_AT", "0.8"))
+LLM_BUDGET_DEGRADE_MODEL = os.getenv("LLM_BUDGET_DEGRADE_MODEL", "gpt-4.1-nano")
+# Faktor für max_tokens im degradierten Modus
+LLM_BUDGET_DEGRADE_OUTPUT = float(os.getenv("LLM_BUDGET_DEGRADE_OUTPUT", "0.5"))
+# Output-Schätzung für Calls ohne max_tokens
+LLM_BUDGET_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_BUDGET_EXPECTED_OUTPUT_TOKENS", "800"))
+
+# USD pro 1M Tokens: (input, cached input, output). Override/Ergänzung per
+# LLM_PRICES='{"my-model": [0.5, 0.25, 1.5]}'
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+MODEL_PRICES.update({name: tuple(price) for name, price in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+# Unbekannte Modelle werden wie gpt-4.1 gerechnet (lieber zu teuer geschätzt)
+DEFAULT_PRICE = MODEL_PRICES["gpt-4.1"]
+# OpenAI Batch API: halber Preis
+BATCH_DISCOUNT = 0.5
+
+OK = "ok"
+DEGRADE = "degrade"
+STOP = "stop"
+
+
+class BudgetExceeded(RuntimeError):
+    """
+    Das Stage- oder Tagesbudget reicht nicht mehr für den nächsten Call.
+    """
+
+
+def parse_stage_budgets(spec: str) -> Dict[str, float]:
+    """
+    "stage=usd, stage=usd" -> {stage: usd}.
+    """
+    budgets = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, value = entry.partition("=")
+        try:
+            budgets[name.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid stage budget {entry!r} (expected stage=usd)") from None
+    return budgets
+
+
+def price_for(model: str) -> Tuple[float, float, float]:
+    """
+    Preis pro 1M Tokens; versionierte Namen (gpt-4.1-mini-2025-04-14) über den längsten Präfix.
+    """
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    matches = [name for name in MODEL_PRICES if model and model.startswith(name)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else DEFAULT_PRICE
+
+
+def call_cost(
+    engine: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+) -> float:
+    """
+    Geschätzte Kosten eines Calls in USD.
+    """
+    # Nur das lokale LLM ist gratis – "local-batch" ruft echte Chat Completions auf
+    if engine == "local":
+        return 0.0
+    price_in, price_cached, price_out = price_for(model)
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    cost = (
+        (prompt_tokens - cached_tokens) * price_in
+        + cached_tokens * price_cached
+        + completion_tokens * price_out
+    ) / 1_000_000
+    return cost * BATCH_DISCOUNT if engine == "openai-batch" else cost
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class Budget:
+    """
+    Thread-safe und prozessübergreifend: Buchungen werden an die Tagesdatei
+    angehängt, gelesen wird inkrementell ab dem zuletzt gelesenen Offset.
+    """
+
+    def __init__(
+        self,
+        day: Optional[str] = None,
+        base_dir: Optional[Path] = None,
+        day_limit: Optional[float] = None,
+        stage_limits: Optional[Dict[str, float]] = None,
+    ):
+        self.day = day
+        self.base_dir = Path(base_dir or BUDGET_DIR)
+        self.day_limit = LLM_BUDGET_DAY_USD if day_limit is None else day_limit
+        self.stage_limits = parse_stage_budgets(LLM_BUDGET_STAGE_USD) if stage_limits is None else stage_limits
+        self._lock = threading.Lock()
+        self._announced = set()
+        # Summen der schon gelesenen Zeilen (pro Datei, der Tag kann wechseln)
+        self._read_path: Optional[Path] = None
+        self._read_offset = 0
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def path(self) -> Path:
+        # Ohne festen Tag: immer der aktuelle UTC-Tag (wie im Ledger)
+        return self.base_dir / f"{self.day or _today()}.jsonl"
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        totals = self._stages.setdefault(
+            entry.get("stage") or "unknown",
+            {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0},
+        )
+        totals["calls"] += 1
+        for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            totals[key] += entry.get(key) or 0
+        totals["cost_usd"] = round(totals["cost_usd"] + (entry.get("cost_usd") or 0.0), 6)
+
+    def _load(self) -> Dict[str, Any]:
+        """
+        {"day", "stages": {stage: Summen}} inkl. der Buchungen anderer Prozesse.
+        """
+        path = self.path
+        with self._lock:
+            if path != self._read_path:
+                self._read_path, self._read_offset, self._stages = path, 0, {}
+            try:
+                with path.open("rb") as fh:
+                    fh.seek(self._read_offset)
+                    chunk = fh.read()
+            except FileNotFoundError:
+                chunk = b""
+            except OSError as e:
+                logger.error(f"[llm_budget] Could not read {path}: {e}")
+                chunk = b""
+            # Nur vollständige Zeilen; eine gerade geschriebene kommt beim nächsten Mal
+            complete = chunk[:chunk.rfind(b"\n") + 1]
+            self._read_offset += len(complete)
+            for line in complete.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._add(json.loads(line))
+                except (ValueError, AttributeError) as e:
+                    logger.error(f"[llm_budget] Skipping malformed line in {path}: {e}")
+            return {"day": path.stem, "stages": {name: dict(totals) for name, totals in self._stages.items()}}
+
+    def record(
+        self,
+        stage: str,
+        engine: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+    ) -> float:
+        """
+        Verbucht einen abgeschlossenen Call; Rückgabe: seine Kosten in USD.
+        """
+        cost = call_cost(engine, model, prompt_tokens, completion_tokens, cached_tokens)
+        line = json.dumps({
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "stage": stage,
+            "engine": engine,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": round(cost, 6),
+        }, ensure_ascii=False) + "\n"
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Ein write() mit O_APPEND: Zeilen paralleler Prozesse landen nie ineinander
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+        return cost
+
+    def spent(self, stage: Optional[str] = None) -> float:
+        """
+        Ausgaben des Tages in USD – einer Stage oder (stage=None) aller Stages.
+        """
+        stages = self._load()["stages"]
+        if stage is not None:
+            return stages.get(stage, {}).get("cost_usd", 0.0)
+        return sum(entry.get("cost_usd", 0.0) for entry in stages.values())
+
+    def _limits(self, stage: str) -> List[Tuple[str, float, float]]:
+        # (Scope, Ausgaben, Limit) für alle gesetzten Budgets
+        limits = []
+        if self.stage_limits.get(stage):
+            limits.append((f"stage {stage}", self.spent(stage), self.stage_limits[stage]))
+        if self.day_limit:
+            limits.append((f"day {self.path.stem}", self.spent(), self.day_limit))
+        return limits
+
+    def state(self, stage: Optional[str] = None, estimate_usd: float = 0.0) -> str:
+        """
+        OK, DEGRADE oder STOP für einen Call mit den geschätzten Kosten estimate_usd.
+        """
+        stage = stage or current_stage()
+        state = OK
+        for _, spent, limit in self._limits(stage):
+            used = (spent + estimate_usd) / limit
+            if used > 1.0 or (estimate_usd == 0.0 and used >= 1.0):
+                return STOP
+            if used >= LLM_BUDGET_DEGRADE_AT:
+                state = DEGRADE
+        return state
+
+    def describe(self, stage: Optional[str] = None) -> str:
+        stage = stage or current_stage()
+        return ", ".join(f"{scope} ${spent:.2f}/${limit:.2f}" for scope, spent, limit in self._limits(stage))
+
+    def _announce(self, stage: str, state: str, message: str) -> None:
+        # Jeden Zustandswechsel nur einmal pro Stage loggen, nicht pro Call
+        if (stage, state) in self._announced:
+            return
+        self._announced.add((stage, state))
+        (logger.error if state == STOP else logger.warning)(f"[llm_budget] {message}")
+
+    def plan(
+        self,
+        model: str,
+        prompt_tokens: int,
+        max_tokens: Optional[int] = None,
+        stage: Optional[str] = None,
+        engine: str = "openai",
+        degraded_max_tokens: Optional[int] = None,
+    ) -> Tuple[str, Optional[int]]:
+        """
+        (model, max_tokens) für den nächsten Call: unverändert, degradiert oder
+        BudgetExceeded, wenn auch der degradierte Call das Budget sprengen würde.
+        degraded_max_tokens: Output-Obergrenze im degradierten Modus für Calls
+        ohne max_tokens.
+        """
+        stage = stage or current_stage()
+        output_tokens = max_tokens or LLM_BUDGET_EXPECTED_OUTPUT_TOKENS
+        if self.state(stage, call_cost(engine, model, prompt_tokens, output_tokens)) == OK:
+            return model, max_tokens
+
+        cheap_model = LLM_BUDGET_DEGRADE_MODEL or model
+        if max_tokens:
+            cheap_max_tokens = max(1, int(max_tokens * LLM_BUDGET_DEGRADE_OUTPUT))
+        else:
+            cheap_max_tokens = degraded_max_tokens
+        cheap_output_tokens = cheap_max_tokens or LLM_BUDGET_EXPECTED_OUTPUT_TOKENS
+        estimate = call_cost(engine, cheap_model, prompt_tokens, cheap_output_tokens)
+        if self.state(stage, estimate) == STOP:
+            self._announce(stage, STOP, f"Budget exhausted, stopping paid calls ({self.describe(stage)})")
+            raise BudgetExceeded(f"LLM budget exhausted ({self.describe(stage)})")
+
+        self._announce(
+            stage,
+            DEGRADE,
+            f"Budget nearly exhausted, degrading to {cheap_model}"
+            + (" with shorter outputs" if cheap_max_tokens else "")
+            + f" ({self.describe(stage)})",
+        )
+        return cheap_model, cheap_max_tokens
+
+
+_budget: Optional[Budget] = None
+_budget_lock = threading.Lock()
+
+
+def get_budget() -> Budget:
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = Budget()
+    return _budget
+
+
+def plan_call(
+    model: str,
+    prompt: str,
+    max_tokens: Optional[int] = None,
+    system_prompt: Optional[str] = None,
+    engine: str = "openai",
+    degraded_max_tokens: Optional[int] = None,
+) -> Tuple[str, Optional[int]]:
+    """
+    Call-Site-Helfer: (model, max_tokens) für einen Chat-Call der aktiven Stage.
+    Wirft BudgetExceeded, wenn die Stage aufhören soll.
+    """
+    if not LLM_BUDGET_ENABLED:
+        return model, max_tokens
+    prompt_tokens = estimate_tokens(prompt) + (estimate_tokens(system_prompt) if system_prompt else 0)
+    return get_budget().plan(
+        model, prompt_tokens, max_tokens, engine=engine, degraded_max_tokens=degraded_max_tokens
+    )
+
+
+def plan_batch(requests: List[Dict[str, Any]], stage: str, engine: str) -> None:
+    """
+    Prüft einen ganzen Batch (Summe der Schätzungen) und degradiert bei Bedarf
+    alle Requests gemeinsam (Modell und max_tokens im Body). Wirft BudgetExceeded.
+    """
+    if not LLM_BUDGET_ENABLED or not requests:
+        return
+    bodies = [req["body"] for req in requests]
+    model = bodies[0].get("model")
+    prompt_tokens = sum(estimate_messages_tokens(body.get("messages") or []) for body in bodies)
+    output_tokens = sum(body.get("max_tokens") or LLM_BUDGET_EXPECTED_OUTPUT_TOKENS for body in bodies)
+    planned_model, planned_output = get_budget().plan(model, prompt_tokens, output_tokens, stage=stage, engine=engine)
+    if planned_model == model and planned_output == output_tokens:
+        return
+    for body in bodies:
+        body["model"] = planned_model
+        if body.get("max_tokens"):
+            body["max_tokens"] = max(1, int(body["max_tokens"] * LLM_BUDGET_DEGRADE_OUTPUT))
+
+
+def budget_exhausted(stage: Optional[str] = None) -> bool:
+    """
+    True, wenn die Stage (oder der Tag) schon ohne weiteren Call am Limit ist.
+    """
+    return LLM_BUDGET_ENABLED and get_budget().state(stage) == STOP
+
+
+def _on_ledger_entry(entry: Dict[str, Any]) -> None:
+    # Lokales LLM ist gratis -> keine Buchung (und kein Datei-Write pro Call)
+    if entry["engine"] == "local":
+        return
+    get_budget().record(
+        entry["stage"],
+        entry["engine"],
+        entry["model"],
+        prompt_tokens=entry.get("prompt_tokens") or 0,
+        completion_tokens=entry.get("completion_tokens") or 0,
+        cached_tokens=entry.get("cached_tokens") or 0,
+    )
+
+
+if LLM_BUDGET_ENABLED:
+    add_listener(_on_ledger_entry)
+
+
+def main(day: Optional[str] = None) -> None:
+    budget = Budget(day=day)
+    stages = budget._load()["stages"]
+    if not stages:
+        print(f"[llm_budget] No spend recorded in {budget.path}")
+        return
+
+    header = f"{'stage':<24} {'calls':>6} {'prompt_tok':>11} {'compl_tok':>10} {'cost_usd':>9} {'budget':>8}"
+    print(f"[llm_budget] {budget.path.stem}")
+    print()
+    print(header)
+    print("-" * len(header))
+    for name in sorted(stages):
+        entry = stages[name]
+        limit = budget.stage_limits.get(name)
+        print(
+            f"{name:<24} {entry['calls']:>6} {entry['prompt_tokens']:>11} {entry['completion_tokens']:>10} "
+            f"{entry['cost_usd']:>9.4f} {f'{limit:.2f}' if limit else '-':>8}"
+        )
+    total = budget.spent()
+    print("-" * len(header))
+    print(f"{'total':<24} {'':>6} {'':>11} {'':>10} {total:>9.4f} {f'{budget.day_limit:.2f}' if budget.day_limit else '-':>8}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,314 @@
+# automations/llm_cache.py
+"""
+Content-adressierter On-Disk-Cache für LLM-Antworten (opt-in).
+
+Key = sha256 über (engine, model, prompt-hash, system_prompt, temperature,
+response_format, max_tokens). Gespeichert wird in einer SQLite-Datei; ist die
+Datei größer als LLM_CACHE_MAX_BYTES, fliegen die am längsten nicht gelesenen
+Einträge raus (LRU). Ein Treffer schreibt last_access nur, wenn der Wert älter
+als LLM_CACHE_TOUCH_INTERVAL ist – sonst wäre jeder Lesezugriff ein
+WAL-Commit unter dem globalen Lock; die LRU-Reihenfolge ist dafür nur auf
+dieses Intervall genau.
+
+Aktivieren:
+    export LLM_CACHE_ENABLED=true
+    export LLM_CACHE_PATH=data/cache/llm_cache.sqlite   # optional
+    export LLM_CACHE_MAX_BYTES=268435456                 # optional, 256 MB
+"""
+import os
+import json
+import time
+import atexit
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", BASE_DIR / "data" / "cache" / "llm_cache.sqlite"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Sekunden, bevor ein Treffer last_access erneut schreibt (0 = bei jedem Treffer)
+LLM_CACHE_TOUCH_INTERVAL = float(os.getenv("LLM_CACHE_TOUCH_INTERVAL", "3600"))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_key(
+    engine: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Stabiler Cache-Key. Der Prompt geht nur als Hash ein, damit der Key kurz bleibt.
+    """
+    parts = {
+        "engine": engine,
+        "model": model,
+        "prompt_sha256": _sha256(prompt),
+        "system_prompt": system_prompt,
+        "temperature": temperature,
+        "response_format": response_format,
+        "max_tokens": max_tokens,
+    }
+    return _sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False))
+
+
+class LLMCache:
+    """
+    SQLite-basierter LRU-Cache. Thread-safe über ein Lock, damit die
+    Bulk-API (Thread-Pool) ihn gemeinsam nutzen kann.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, touch_interval: Optional[float] = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.touch_interval = LLM_CACHE_TOUCH_INTERVAL if touch_interval is None else touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+            conn.commit()
+            row = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            self._total_bytes = int(row[0])
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, last_access FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.warning(f"[llm_cache] Entry of {size} bytes exceeds cache size, not stored.")
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """
+        Entfernt die am längsten nicht gelesenen Einträge, bis das Limit passt.
+        """
+        while self._total_bytes > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 50"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def _log_stats_at_exit() -> None:
+    if _cache is not None and (_cache.hits or _cache.misses):
+        logger.info(f"[llm_cache] Stats: {_cache.stats()}")
+
+
+def get_cache() -> Optional[LLMCache]:
+    """
+    Liefert den prozessweiten Cache oder None, wenn der Cache nicht aktiviert ist.
+    """
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES)
+            atexit.register(_log_stats_at_exit)
+    return _cache
+
+
+def lookup_completion(
+    *,
+    engine: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    max_tokens: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Nur nachschlagen: gecachte Antwort oder None (Miss, Cache aus oder Lesefehler).
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    key = make_key(engine, model, prompt, system_prompt, temperature, response_format, max_tokens)
+    try:
+        hit = cache.get(key)
+    except sqlite3.Error as e:
+        logger.error(f"[llm_cache] Read failed, bypassing cache: {e}")
+        return None
+    if hit is not None:
+        logger.info(f"[llm_cache] Hit ({engine}/{model})")
+    return hit
+
+
+def store_completion(
+    value: str,
+    *,
+    engine: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    max_tokens: Optional[int] = None,
+) -> None:
+    cache = get_cache()
+    if cache is None:
+        return
+    key = make_key(engine, model, prompt, system_prompt, temperature, response_format, max_tokens)
+    try:
+        cache.set(key, value)
+    except sqlite3.Error as e:
+        logger.error(f"[llm_cache] Write failed: {e}")
+
+
+def cached_completion(
+    compute: Callable[[], str],
+    *,
+    engine: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Gibt die gecachte Antwort zurück oder ruft compute() auf und speichert das
+    Ergebnis. Ohne aktivierten Cache wird compute() einfach durchgereicht.
+    """
+    params = dict(
+        engine=engine,
+        model=model,
+        prompt=prompt,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        response_format=response_format,
+        max_tokens=max_tokens,
+    )
+    hit = lookup_completion(**params)
+    if hit is not None:
+        return hit
+    value = compute()
+    store_completion(value, **params)
+    return value
+
+
+def budgeted_completion(
+    compute: Callable[[str, Optional[int]], str],
+    plan: Callable[[str, Optional[int]], Tuple[str, Optional[int]]],
+    *,
+    engine: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Wie cached_completion(), aber mit Kosten-Planung (z.B. llm_budget.plan_call)
+    erst nach einem Cache-Miss: ein Treffer kostet nichts und darf weder am
+    Budget scheitern noch durch ein degradiertes Modell verfehlt werden.
+
+    plan(model, max_tokens) -> (model, max_tokens) darf abbrechen (Exception);
+    compute(model, max_tokens) läuft mit dem geplanten Paar, gespeichert wird
+    unter dem tatsächlich genutzten Modell.
+    """
+    params = dict(
+        engine=engine,
+        prompt=prompt,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        response_format=response_format,
+    )
+    hit = lookup_completion(model=model, max_tokens=max_tokens, **params)
+    if hit is not None:
+        return hit
+
+    planned_model, planned_max_tokens = plan(model, max_tokens)
+    if (planned_model, planned_max_tokens) != (model, max_tokens):
+        hit = lookup_completion(model=planned_model, max_tokens=planned_max_tokens, **params)
+        if hit is not None:
+            return hit
+
+    value = compute(planned_model, planned_max_tokens)
+    store_completion(value, model=planned_model, max_tokens=planned_max_tokens, **params)
+    return value
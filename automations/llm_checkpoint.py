@@ -0,0 +1,154 @@
+# automations/llm_checkpoint.py
+"""
+Per-Item-Checkpoint für LLM-Stages, damit ein Re-Run nur die unerledigten
+Items neu verarbeitet.
+
+Pro Stage und Lauf (i.d.R. das Datum) eine JSONL-Datei
+data/checkpoints/<stage>/<run>.jsonl, eine Zeile pro Zustandswechsel:
+
+    {"item": "q_0001", "entry": {"status": "done", "attempts": 1, "updated_at": "...", "result": {...}}}
+    {"item": "q_0002", "entry": {"status": "failed", "attempts": 2, "updated_at": "...", "error": "..."}}
+    {"item": "q_0003", "entry": {"status": "in_flight", "attempts": 1, "updated_at": "..."}}
+
+Markieren hängt nur die geänderten Items an (ein write() pro Aufruf), statt
+bei jedem mark_done() alle Items neu zu schreiben. Beim Laden gewinnt die
+letzte Zeile pro Item; hat die Datei mehr Zeilen als Items, wird sie
+kompaktiert (atomar über tmp-Datei + os.replace).
+
+Optional trägt ein Eintrag eine "version" (z.B. Hash des Inputs): is_done()
+mit version gilt dann nur, solange sich der Input nicht geändert hat.
+
+"in_flight" nach einem Neustart heißt: der Prozess ist mitten im Call
+abgebrochen – das Item gilt als unerledigt. Eine von einem Crash halb
+geschriebene letzte Zeile wird beim Laden übersprungen.
+"""
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CHECKPOINT_DIR = BASE_DIR / "data" / "checkpoints"
+
+DONE = "done"
+FAILED = "failed"
+IN_FLIGHT = "in_flight"
+
+
+class Checkpoint:
+    """
+    Thread-safe, damit die Bulk-API (Thread-Pool) direkt aus den Workern
+    markieren kann.
+    """
+
+    def __init__(self, stage: str, run: str, base_dir: Optional[Path] = None):
+        self.stage = stage
+        self.run = run
+        self.path = Path(base_dir or CHECKPOINT_DIR) / stage / f"{run}.jsonl"
+        self._lock = threading.Lock()
+        self.items: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return {}
+        except OSError as e:
+            logger.error(f"[llm_checkpoint] Could not read {self.path}, starting fresh: {e}")
+            return {}
+
+        items: Dict[str, Dict[str, Any]] = {}
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+                items[event["item"]] = event["entry"]
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"[llm_checkpoint] Skipping malformed line in {self.path}: {e}")
+        if len(lines) > len(items):
+            self._compact(items)
+        return items
+
+    @staticmethod
+    def _line(item_id: str, entry: Dict[str, Any]) -> str:
+        return json.dumps({"item": item_id, "entry": entry}, ensure_ascii=False) + "\n"
+
+    def _compact(self, items: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text("".join(self._line(item_id, entry) for item_id, entry in items.items()), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _append(self, item_ids: Iterable[str]) -> None:
+        # Aufrufer hält self._lock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(self._line(item_id, self.items[item_id]) for item_id in item_ids)
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(data)
+
+    def _mark(self, item_id: str, status: str, **fields: Any) -> None:
+        with self._lock:
+            entry = self.items.get(item_id, {})
+            entry.pop("error", None)
+            entry.update(fields, status=status, updated_at=datetime.now(timezone.utc).isoformat())
+            self.items[item_id] = entry
+            self._append([item_id])
+
+    def mark_in_flight(self, item_ids: Iterable[str]) -> None:
+        """
+        Markiert die IDs als gestartet (ein Schreibvorgang für alle).
+        """
+        with self._lock:
+            now = datetime.now(timezone.utc).isoformat()
+            item_ids = list(item_ids)
+            for item_id in item_ids:
+                entry = self.items.get(item_id, {})
+                entry["attempts"] = entry.get("attempts", 0) + 1
+                entry.pop("error", None)
+                entry.update(status=IN_FLIGHT, updated_at=now)
+                self.items[item_id] = entry
+            if item_ids:
+                self._append(item_ids)
+
+    def mark_done(self, item_id: str, result: Any = None, version: Optional[str] = None) -> None:
+        """
+        `result` muss JSON-serialisierbar sein und wird beim Re-Run über
+        result() wieder ausgeliefert.
+        """
+        fields = {"result": result} if result is not None else {}
+        if version is not None:
+            fields["version"] = version
+        self._mark(item_id, DONE, **fields)
+
+    def mark_failed(self, item_id: str, error: Any) -> None:
+        self._mark(item_id, FAILED, error=str(error)[:500])
+
+    def is_done(self, item_id: str, version: Optional[str] = None) -> bool:
+        """
+        Mit `version`: nur erledigt, wenn der Eintrag zur selben Version gehört.
+        """
+        entry = self.items.get(item_id, {})
+        if version is not None and entry.get("version") != version:
+            return False
+        return entry.get("status") == DONE
+
+    def result(self, item_id: str) -> Any:
+        return self.items.get(item_id, {}).get("result")
+
+    def pending(self, item_ids: Iterable[str]) -> List[str]:
+        """
+        Alle IDs, die noch nicht erfolgreich erledigt sind (neu, failed, in_flight).
+        """
+        return [item_id for item_id in item_ids if not self.is_done(item_id)]
+
+    def summary(self) -> Dict[str, int]:
+        counts = {DONE: 0, FAILED: 0, IN_FLIGHT: 0}
+        for entry in self.items.values():
+            status = entry.get("status", IN_FLIGHT)
+            counts[status] = counts.get(status, 0) + 1
+        return counts
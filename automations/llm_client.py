@@ -1,30 +1,250 @@
 # llm_client.py
 import os
+import re
 import json
+import time
+import random
+import hashlib
+import asyncio
 import logging
-from typing import Dict, Any, List
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Callable, Awaitable, Optional, Tuple
 
 from dotenv import load_dotenv   # <--- NEU
 
-import requests
-from openai import OpenAI
 from datetime import datetime, timezone
-
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from llm_budget import plan_call
+from llm_cache import budgeted_completion, cached_completion
+from llm_endpoints import Endpoint, EndpointPool, parse_endpoints
+from llm_health import HALF_OPEN, CircuitOpenError
+from llm_ledger import track, usage_fields
+from llm_ratelimit import AdaptiveLimiter
+from llm_stream_guard import STREAM_GUARD_RETRIES, StreamAborted, StreamGuard, new_guard
+from json_repair import JSONRepairError, parse_json
+from llm_tokens import (
+    ARTICLE_TOKEN_BUDGETS,
+    SCORE_BATCH_TOKEN_BUDGET,
+    estimate_messages_tokens,
+    estimate_tokens,
+    fit_article,
+    pack_by_token_budget,
+)
+from prompts import SCORE_BATCH_ARTICLE, get_prompt
+
+# openai / httpx / requests werden erst beim ersten Call importiert (siehe
+# get_openai_client, get_http_session) – das spart pro Skriptstart mehrere
+# hundert Millisekunden, wenn gar kein LLM-Call anfällt.
+# Messung: automations/benchmark_import_time.py
+if TYPE_CHECKING:
+    import requests
+    from openai import APIStatusError, OpenAI
+
+# Logging konfigurieren die Skripte selbst (basicConfig), nicht die Library
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # .env laden (aus Projekt-Root)
 load_dotenv()  # <--- NEU
 
+# ---- HTTP Connection Pool ----
+#
+# Ein gemeinsamer Keep-Alive-Pool für alle LLM-Requests, damit TCP/TLS-Setup
+# nicht pro Draft bezahlt wird. Pool-Größe sollte >= LLM_CONCURRENCY sein
+# (im Sections-Modus mal ARTICLE_SECTION_CONCURRENCY).
+
+# Wie viele LLM-Requests die Bulk-API maximal gleichzeitig offen hält
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+
+# Outline-then-sections: statt eines langen Completions erst die Gliederung,
+# dann alle Sections parallel (lohnt sich, wenn der lokale Host mehrere
+# Requests gleichzeitig bedient oder mehrere LOCAL_LLM_ENDPOINTS existieren).
+# "single" = ein Call pro Artikel wie bisher.
+ARTICLE_GENERATION_MODE = os.getenv("ARTICLE_GENERATION_MODE", "single").lower()
+# Parallele Section-Calls pro Artikel
+ARTICLE_SECTION_CONCURRENCY = int(os.getenv("ARTICLE_SECTION_CONCURRENCY", "4"))
+# Stream-Guard-Obergrenze für den Single-Call-Artikel. Der article-Prompt gibt
+# keine Länge vor ("long-form"), die Grenze fängt nur Endlos-Output ab
+ARTICLE_GUARD_MAX_TOKENS = int(os.getenv("ARTICLE_GUARD_MAX_TOKENS", "8000"))
+
+_requests_per_draft = ARTICLE_SECTION_CONCURRENCY if ARTICLE_GENERATION_MODE == "sections" else 1
+LLM_HTTP_POOL_SIZE = int(os.getenv("LLM_HTTP_POOL_SIZE", str(max(LLM_CONCURRENCY * _requests_per_draft, 10))))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> "requests.Session":
+    """
+    Prozessweite requests.Session mit Keep-Alive-Pool (LLM_HTTP_POOL_SIZE).
+    Wird von allen REST-Aufrufen (lokales LLM, OpenAI-REST) geteilt und beim
+    ersten Aufruf angelegt.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=LLM_HTTP_POOL_SIZE,
+                pool_maxsize=LLM_HTTP_POOL_SIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+    return _http_session
+
+
+def http_timeout(read_timeout: float = None) -> Tuple[float, float]:
+    """
+    (connect, read)-Timeout-Tupel für requests.
+    """
+    return (LLM_CONNECT_TIMEOUT, read_timeout or LLM_READ_TIMEOUT)
+
+
+# ---- Retry / Backoff ----
+
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "60"))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Wartezeit vor dem Retry nach Versuch `attempt` (1-basiert).
+
+    Exponentiell mit "full jitter", damit parallele Worker nicht im Gleichschritt
+    wieder anklopfen. Gibt der Server Retry-After vor, ist das die Untergrenze
+    (plus etwas Jitter).
+    """
+    if retry_after:
+        return retry_after + random.uniform(0, LLM_RETRY_BASE_DELAY)
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
 # ---- OpenAI / GPT Client ----
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
 
+# Rate Limits des Accounts; der Limiter hält den Durchsatz knapp darunter
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "200000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", str(LLM_CONCURRENCY)))
+OPENAI_MAX_ATTEMPTS = int(os.getenv("OPENAI_MAX_ATTEMPTS", "6"))
+# Geschätzte Output-Tokens, wenn der Call kein max_tokens setzt
+OPENAI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", "800"))
+
+_openai_limiter = AdaptiveLimiter(
+    requests_per_minute=OPENAI_RPM,
+    tokens_per_minute=OPENAI_TPM,
+    max_concurrency=OPENAI_MAX_CONCURRENCY,
+)
+
 _openai_client = None
-if OPENAI_API_KEY:
-    _openai_client = OpenAI(api_key=OPENAI_API_KEY)
-else:
-    logger.warning("OPENAI_API_KEY not set. GPT-based functions will fail.")
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client() -> Optional["OpenAI"]:
+    """
+    Prozessweiter OpenAI-Client, beim ersten Aufruf gebaut (None ohne OPENAI_API_KEY).
+    """
+    global _openai_client
+    if not OPENAI_API_KEY:
+        return None
+    with _openai_client_lock:
+        if _openai_client is None:
+            import httpx
+            from openai import OpenAI
+
+            # Das SDK nutzt httpx; gleicher Pool-/Timeout-Rahmen wie get_http_session().
+            # Retries übernimmt _openai_chat(), damit der Limiter jede 429 sieht.
+            _openai_client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                max_retries=0,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=LLM_HTTP_POOL_SIZE,
+                        max_keepalive_connections=LLM_HTTP_POOL_SIZE,
+                    ),
+                    timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                ),
+            )
+    return _openai_client
+
+
+def _retry_after_seconds(error: "APIStatusError") -> Optional[float]:
+    """
+    Liest Retry-After (bzw. retry-after-ms) aus der Fehlerantwort.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _openai_chat(ledger_rec: Optional[Dict[str, Any]] = None, **kwargs):
+    """
+    chat.completions.create() hinter dem adaptiven Rate Limiter.
+
+    429 und 5xx werden nicht verworfen: der Limiter halbiert die Concurrency,
+    respektiert Retry-After und der Call wird bis OPENAI_MAX_ATTEMPTS wiederholt.
+    Verbindungsfehler/Timeouts werden mit Backoff + Jitter wiederholt.
+    ledger_rec (aus llm_ledger.track) bekommt die Anzahl der Retries.
+    """
+    from openai import APIConnectionError, APIStatusError
+
+    client = get_openai_client()
+    if client is None:
+        raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
+    estimated = estimate_messages_tokens(kwargs["messages"]) + kwargs.get(
+        "max_tokens", OPENAI_EXPECTED_OUTPUT_TOKENS
+    )
+
+    for attempt in range(1, OPENAI_MAX_ATTEMPTS + 1):
+        if ledger_rec is not None:
+            ledger_rec["retries"] = attempt - 1
+        with _openai_limiter.slot(estimated):
+            try:
+                resp = client.chat.completions.create(**kwargs)
+            except APIStatusError as e:
+                if e.status_code != 429 and e.status_code < 500:
+                    raise
+                delay = backoff_delay(attempt, _retry_after_seconds(e))
+                # Pausiert alle Slots; der nächste acquire() wartet die Zeit ab
+                _openai_limiter.on_overload(delay)
+                if attempt == OPENAI_MAX_ATTEMPTS:
+                    raise
+                logger.warning(
+                    f"[openai] HTTP {e.status_code}, retry {attempt}/{OPENAI_MAX_ATTEMPTS - 1} "
+                    f"in {delay:.1f}s"
+                )
+                continue
+            except APIConnectionError as e:
+                # inkl. APITimeoutError; kein Overload-Signal, nur dieser Call wartet
+                if attempt == OPENAI_MAX_ATTEMPTS:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(
+                    f"[openai] {type(e).__name__}, retry {attempt}/{OPENAI_MAX_ATTEMPTS - 1} "
+                    f"in {delay:.1f}s"
+                )
+            else:
+                usage = getattr(resp, "usage", None)
+                _openai_limiter.on_success(estimated, getattr(usage, "total_tokens", None))
+                return resp
+
+        time.sleep(delay)
 
 
 # ---- Local LLM Client (Ollama / NIM / whatever) ----
@@ -32,109 +252,796 @@ else:
 LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL", "http://localhost:11434/api/generate")
 LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "llama3")
 
+# Mehrere lokale Hosts: "url|weight|max_inflight, ..." (siehe llm_endpoints).
+# Leer = nur LOCAL_LLM_URL. Default-Limit pro Host, wenn in der Spec keins steht:
+LOCAL_LLM_ENDPOINTS = os.getenv("LOCAL_LLM_ENDPOINTS", "")
+LOCAL_LLM_MAX_INFLIGHT = int(os.getenv("LOCAL_LLM_MAX_INFLIGHT", "0"))
+
+# Circuit Breaker (pro Host): nach N Fehlern in Folge wird der Host ausgeklinkt,
+# nach LOCAL_LLM_RESET_TIMEOUT Sekunden per Health-Probe neu getestet. Sind alle
+# Hosts gesperrt, geht's direkt zum GPT-Fallback.
+LOCAL_LLM_FAILURE_THRESHOLD = int(os.getenv("LOCAL_LLM_FAILURE_THRESHOLD", "3"))
+LOCAL_LLM_RESET_TIMEOUT = float(os.getenv("LOCAL_LLM_RESET_TIMEOUT", "60"))
+LOCAL_LLM_HEALTH_TIMEOUT = float(os.getenv("LOCAL_LLM_HEALTH_TIMEOUT", "2"))
+# Versuche pro Draft bei transienten Fehlern (Verbindung, Timeout, 5xx), bevor
+# der Fehler zählt und der GPT-Fallback greift. Retries gehen bevorzugt an
+# einen anderen Host.
+LOCAL_LLM_MAX_ATTEMPTS = int(os.getenv("LOCAL_LLM_MAX_ATTEMPTS", "2"))
+
+# Ollama entlädt Modelle nach 5 min Leerlauf – der erste Call danach zahlt den
+# kompletten Modell-Load. keep_alive geht bei jedem Call mit und hält das Modell
+# für die Dauer des Runs geladen ("30m", "2h"; -1 = pinnen, bis es explizit
+# entladen wird; leer = Server-Default).
+LOCAL_LLM_KEEP_ALIVE = os.getenv("LOCAL_LLM_KEEP_ALIVE", "30m")
+# Weitere Modelle, die warm_up_local_llm() neben LOCAL_LLM_MODEL vorlädt (kommagetrennt)
+LOCAL_LLM_PRELOAD_MODELS = [m.strip() for m in os.getenv("LOCAL_LLM_PRELOAD_MODELS", "").split(",") if m.strip()]
+LOCAL_LLM_WARMUP = os.getenv("LOCAL_LLM_WARMUP", "true").lower() == "true"
+# Ab dieser Ladezeit gilt ein Call als Cold Start (Ollama meldet load_duration
+# auch bei geladenem Modell, dann im Millisekundenbereich)
+LOCAL_LLM_COLD_START_S = float(os.getenv("LOCAL_LLM_COLD_START_S", "0.5"))
+
+
+def _default_health_url(generate_url: str) -> str:
+    """
+    Ollama: GET /api/tags ist billig und lädt kein Modell.
+    """
+    parts = urlsplit(generate_url)
+    return f"{parts.scheme}://{parts.netloc}/api/tags"
+
+
+# Override gilt nur im Single-Host-Betrieb, im Pool probt jeder Host selbst
+LOCAL_LLM_HEALTH_URL = os.getenv("LOCAL_LLM_HEALTH_URL", "")
+
 
-def _call_local_llm(prompt: str, model: str = None) -> str:
+def probe_local_llm(endpoint: Optional[Endpoint] = None) -> bool:
     """
-    Minimalistischer Wrapper um dein lokales LLM.
-    Erwartet ein Ollama-kompatibles /generate-Endpoint.
+    Health-Probe für das lokale LLM (kurzer Timeout, kein Generate-Call).
     """
-    model = model or LOCAL_LLM_MODEL
+    if endpoint is None or (LOCAL_LLM_HEALTH_URL and not LOCAL_LLM_ENDPOINTS):
+        url = LOCAL_LLM_HEALTH_URL or _default_health_url(LOCAL_LLM_URL)
+    else:
+        url = _default_health_url(endpoint.url)
+    resp = get_http_session().get(
+        url,
+        timeout=(LOCAL_LLM_HEALTH_TIMEOUT, LOCAL_LLM_HEALTH_TIMEOUT),
+    )
+    return resp.ok
+
+
+_local_pool = EndpointPool(
+    parse_endpoints(LOCAL_LLM_ENDPOINTS, LOCAL_LLM_MAX_INFLIGHT)
+    or [Endpoint(LOCAL_LLM_URL, max_inflight=LOCAL_LLM_MAX_INFLIGHT)],
+    failure_threshold=LOCAL_LLM_FAILURE_THRESHOLD,
+    reset_timeout=LOCAL_LLM_RESET_TIMEOUT,
+    probe=probe_local_llm,
+)
+
+
+def _keep_alive() -> Optional[Any]:
+    """
+    LOCAL_LLM_KEEP_ALIVE für den Payload: Zahlen als Sekunden (int), sonst
+    Dauer-String; None = Feld weglassen.
+    """
+    if not LOCAL_LLM_KEEP_ALIVE:
+        return None
     try:
-        resp = requests.post(
-            LOCAL_LLM_URL,
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=120,
+        return int(LOCAL_LLM_KEEP_ALIVE)
+    except ValueError:
+        return LOCAL_LLM_KEEP_ALIVE
+
+
+def _record_load(data: Dict[str, Any], rec: Dict[str, Any], model: str, endpoint: Endpoint) -> None:
+    """
+    Modell-Ladezeit aus Ollamas load_duration (ns) separat in den Ledger –
+    sonst steckt ein Cold Start unsichtbar in Latenz und TTFT.
+    """
+    load_ns = data.get("load_duration")
+    if load_ns is None:
+        return
+    rec["load_s"] = round(load_ns / 1e9, 3)
+    rec["cold_start"] = rec["load_s"] >= LOCAL_LLM_COLD_START_S
+    if rec["cold_start"]:
+        logger.info(f"[local_llm] Cold start on {endpoint.name}: loaded {model} in {rec['load_s']:.1f}s")
+
+
+def _warm_up_endpoint(endpoint: Endpoint, models: List[str]) -> Dict[str, Optional[float]]:
+    loaded = {}
+    for model in models:
+        try:
+            with track("local", model, call="warmup") as rec:
+                rec["endpoint"] = endpoint.name
+                # Leerer Prompt: Ollama lädt nur das Modell, ohne zu generieren
+                payload = {"model": model, "prompt": "", "stream": False}
+                keep_alive = _keep_alive()
+                if keep_alive is not None:
+                    payload["keep_alive"] = keep_alive
+                resp = get_http_session().post(endpoint.url, json=payload, timeout=http_timeout())
+                resp.raise_for_status()
+                _record_load(resp.json(), rec, model, endpoint)
+        except Exception as e:
+            logger.warning(f"[local_llm] Warm-up of {model} on {endpoint.name} failed: {e}")
+            endpoint.breaker.record_failure()
+            loaded[model] = None
+            continue
+        endpoint.breaker.record_success()
+        loaded[model] = rec.get("load_s")
+    return loaded
+
+
+def warm_up_local_llm(models: Optional[List[str]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Lädt die Modelle zu Beginn einer Stage auf allen lokalen Hosts vor (mit
+    keep_alive), damit kein Draft den Cold Start zahlt. Default: LOCAL_LLM_MODEL
+    plus LOCAL_LLM_PRELOAD_MODELS. Hosts laufen parallel, Modelle pro Host
+    nacheinander (ein Host lädt ohnehin eins nach dem anderen).
+
+    Rückgabe: {host: {model: load_s | None bei Fehler}}. Fehler sind nicht
+    fatal – sie zählen beim Breaker des Hosts, der Run läuft weiter.
+    """
+    if not LOCAL_LLM_WARMUP:
+        return {}
+    models = list(dict.fromkeys(models or [LOCAL_LLM_MODEL, *LOCAL_LLM_PRELOAD_MODELS]))
+    endpoints = _local_pool.endpoints
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+        # Kontext pro Host kopieren, damit die Ledger-Stage (ContextVar) mitwandert
+        futures = [
+            executor.submit(contextvars.copy_context().run, _warm_up_endpoint, ep, models)
+            for ep in endpoints
+        ]
+        results = [future.result() for future in futures]
+    logger.info(
+        f"[local_llm] Warm-up of {', '.join(models)} on {len(endpoints)} host(s) "
+        f"done in {time.monotonic() - started:.1f}s"
+    )
+    return {ep.name: loaded for ep, loaded in zip(endpoints, results)}
+
+
+def local_llm_concurrency() -> int:
+    """
+    Sinnvolle Parallelität für lokale Drafts: die Summe der Host-Limits, damit
+    jeder zusätzliche Host auch genutzt wird – sonst LLM_CONCURRENCY.
+    """
+    return _local_pool.capacity or LLM_CONCURRENCY
+
+
+class _StreamStats:
+    """
+    Misst Time-to-first-token und Tokens/Sekunde eines Streaming-Calls.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.monotonic()
+        self.first_token_at = None
+        self.chunks = 0
+        self.chars = 0
+
+    def on_chunk(self, text: str) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.chunks += 1
+        self.chars += len(text)
+
+    def finish(self, completion_tokens: Optional[int] = None) -> Dict[str, Any]:
+        duration = time.monotonic() - self.started
+        ttft = (self.first_token_at - self.started) if self.first_token_at else None
+        tokens = completion_tokens or max(self.chunks, self.chars // 4)
+        gen_time = duration - (ttft or 0)
+        stats = {
+            "ttft_s": round(ttft, 3) if ttft is not None else None,
+            "duration_s": round(duration, 3),
+            "completion_tokens": tokens,
+            "tokens_per_s": round(tokens / gen_time, 1) if gen_time > 0 else None,
+        }
+        logger.info(
+            f"[{self.label}] Stream done: ttft={stats['ttft_s']}s, "
+            f"{tokens} tokens in {stats['duration_s']}s ({stats['tokens_per_s']} tok/s)"
         )
-        resp.raise_for_status()
-        data = resp.json()
-        # Ollama: 'response' enthält den Text
-        text = data.get("response") or data.get("text") or ""
-        return text.strip()
-    except Exception as e:
-        logger.error(f"[local_llm] Error: {e}")
-        raise
+        return stats
 
 
-def _call_gpt(prompt: str, system_prompt: str = None) -> str:
+def _is_transient(error: Exception) -> bool:
+    """
+    Verbindungsfehler, Timeouts und 5xx lohnen einen Retry, 4xx nicht.
+    """
+    import requests
+
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code >= 500
+
+
+def _call_local_llm(
+    prompt: str,
+    model: str = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    call: str = "article",
+    prompt_version: Optional[str] = None,
+    json_mode: bool = False,
+    guard: Optional[StreamGuard] = None,
+) -> str:
+    """
+    Minimalistischer Wrapper um dein lokales LLM.
+    Erwartet ein Ollama-kompatibles /generate-Endpoint.
+
+    Mit on_chunk wird gestreamt: jeder Text-Chunk geht sofort an den Callback.
+    `call` ist der Call-Typ für den Telemetrie-Ledger.
+    json_mode setzt Ollamas format="json" (Antwort ist garantiert JSON).
+    Mit guard wird immer gestreamt; verletzt der Output eine Regel, wird der
+    Request sofort geschlossen und StreamAborted geworfen (kein Retry, kein Cache).
+    """
+    model = model or LOCAL_LLM_MODEL
+    stream = bool(on_chunk or guard)
+    streamed = []
+
+    def _stream(resp, stats: _StreamStats, rec: Dict[str, Any], endpoint: Endpoint) -> str:
+        parts = []
+        eval_count = None
+        # Ollama: NDJSON, eine Zeile pro Chunk, letzte Zeile mit done=true
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            chunk = data.get("response") or ""
+            if chunk:
+                stats.on_chunk(chunk)
+                if guard:
+                    try:
+                        guard.feed(chunk)
+                    except StreamAborted as e:
+                        rec["outcome"] = "aborted"
+                        rec["abort_reason"] = e.reason
+                        rec["completion_tokens"] = guard.tokens
+                        resp.close()
+                        raise
+                parts.append(chunk)
+                if on_chunk:
+                    streamed.append(True)
+                    on_chunk(chunk)
+            if data.get("done"):
+                eval_count = data.get("eval_count")
+                rec["prompt_tokens"] = data.get("prompt_eval_count")
+                _record_load(data, rec, model, endpoint)
+                break
+        rec.update(stats.finish(eval_count))
+        return "".join(parts)
+
+    def _attempt(attempt: int, endpoint: Endpoint) -> str:
+        stats = _StreamStats("local_llm")
+        with track("local", model, call=call) as rec:
+            rec["retries"] = attempt - 1
+            rec["prompt_version"] = prompt_version
+            rec["endpoint"] = endpoint.name
+            payload = {"model": model, "prompt": prompt, "stream": stream}
+            if json_mode:
+                payload["format"] = "json"
+            keep_alive = _keep_alive()
+            if keep_alive is not None:
+                payload["keep_alive"] = keep_alive
+            resp = get_http_session().post(
+                endpoint.url,
+                json=payload,
+                timeout=http_timeout(),
+                stream=stream,
+            )
+            resp.raise_for_status()
+            if stream:
+                return _stream(resp, stats, rec, endpoint)
+            data = resp.json()
+            # Ollama: 'response' enthält den Text
+            rec["prompt_tokens"] = data.get("prompt_eval_count")
+            rec["completion_tokens"] = data.get("eval_count")
+            _record_load(data, rec, model, endpoint)
+            return data.get("response") or data.get("text") or ""
+
+    def _request() -> str:
+        failed_hosts = set()
+        for attempt in range(1, LOCAL_LLM_MAX_ATTEMPTS + 1):
+            endpoint = _local_pool.acquire(avoid=failed_hosts)
+            try:
+                text = _attempt(attempt, endpoint)
+            except StreamAborted:
+                # Host ist gesund, nur der Output taugt nichts
+                _local_pool.release(endpoint)
+                raise
+            except Exception as e:
+                failed_hosts.add(endpoint.url)
+                # Nach gestreamten Chunks kein Retry – der Callback hat sie schon
+                if attempt < LOCAL_LLM_MAX_ATTEMPTS and not streamed and _is_transient(e):
+                    # Zwischenversuche zählen nicht für den Breaker, erst der letzte –
+                    # außer dem Probe-Request eines halb offenen Breakers, der
+                    # sonst den Host blockiert
+                    _local_pool.release(endpoint, ok=False if endpoint.breaker.state == HALF_OPEN else None)
+                    delay = backoff_delay(attempt)
+                    logger.warning(
+                        f"[local_llm] {type(e).__name__} on {endpoint.name}, "
+                        f"retry {attempt}/{LOCAL_LLM_MAX_ATTEMPTS - 1} in {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+                    continue
+                _local_pool.release(endpoint, ok=False)
+                logger.error(f"[local_llm] Error on {endpoint.name}: {e}")
+                raise
+            _local_pool.release(endpoint, ok=True)
+            return text.strip()
+
+    text = cached_completion(
+        _request,
+        engine="local",
+        model=model,
+        prompt=prompt,
+        response_format={"type": "json_object"} if json_mode else None,
+    )
+    if on_chunk and not streamed:
+        # Cache-Hit: kompletter Text als ein Chunk
+        on_chunk(text)
+    return text
+
+
+# Output-Obergrenzen der JSON-Calls (laufen normal ohne max_tokens), wenn
+# llm_budget degradiert – sonst wäre dort nur das Modell billiger
+DEGRADED_MAX_TOKENS = {
+    "score": 150,
+    "score_batch": 100 * int(os.getenv("SCORE_BATCH_MAX_ITEMS", "8")),
+    "snippets": 600,
+    "review": 750,
+    "json_fix": 750,
+}
+
+
+def _call_gpt(
+    prompt: str,
+    system_prompt: str = None,
+    temperature: float = 0.3,
+    response_format: Dict[str, Any] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    call: str = "chat",
+    prompt_version: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+) -> str:
     """
-    Standard GPT-Wrapper. Nutzt Chat Completions.
+    Standard GPT-Wrapper. Nutzt Chat Completions (model: Default OPENAI_MODEL).
+    response_format={"type": "json_object"} aktiviert den JSON-Mode.
+    Mit on_chunk wird gestreamt (siehe _call_local_llm).
+    prompt_version (PromptTemplate.id) landet im Telemetrie-Ledger.
+
+    Modell und max_tokens kommen bei einem Cache-Miss aus llm_budget.plan_call():
+    kurz vor Budget-Ende ein billigeres Modell / kürzerer Output (JSON-Calls
+    ohne max_tokens: DEGRADED_MAX_TOKENS), danach BudgetExceeded.
     """
-    if not _openai_client:
+    if not OPENAI_API_KEY:
         raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
 
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": prompt})
+    streamed = []
+
+    def _stream(model: str, kwargs, rec: Dict[str, Any]) -> str:
+        stats = _StreamStats("openai")
+        parts = []
+        completion_tokens = None
+        stream = _openai_chat(
+            ledger_rec=rec,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs,
+        )
+        for chunk in stream:
+            if chunk.usage:
+                completion_tokens = chunk.usage.completion_tokens
+                rec.update(usage_fields(chunk.usage))
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content or ""
+            if text:
+                stats.on_chunk(text)
+                parts.append(text)
+                streamed.append(True)
+                on_chunk(text)
+        rec.update(stats.finish(completion_tokens))
+        return "".join(parts).strip()
+
+    def _request(model: str, max_tokens: Optional[int]) -> str:
+        kwargs = {}
+        if response_format:
+            kwargs["response_format"] = response_format
+        if max_tokens:
+            kwargs["max_tokens"] = max_tokens
+        with track("openai", model, call=call) as rec:
+            rec["prompt_version"] = prompt_version
+            if on_chunk:
+                return _stream(model, kwargs, rec)
+            resp = _openai_chat(
+                ledger_rec=rec,
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                **kwargs,
+            )
+            rec.update(usage_fields(resp.usage))
+            return resp.choices[0].message.content.strip()
+
+    def _plan(model: str, max_tokens: Optional[int]) -> Tuple[str, Optional[int]]:
+        return plan_call(
+            model, prompt, max_tokens, system_prompt=system_prompt, degraded_max_tokens=DEGRADED_MAX_TOKENS.get(call)
+        )
 
-    resp = _openai_client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=messages,
-        temperature=0.3,
+    text = budgeted_completion(
+        _request,
+        _plan,
+        engine="openai",
+        model=model or OPENAI_MODEL,
+        prompt=prompt,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        response_format=response_format,
+        max_tokens=max_tokens,
     )
-    return resp.choices[0].message.content.strip()
+    if on_chunk and not streamed:
+        on_chunk(text)
+    return text
+
+
+# ---- JSON-Antworten ----
+#
+# JSON-Mode-Antworten gehen durch json_repair: erst lokal reparieren (Fences,
+# Begleittext, Quotes, abgeschnittene Arrays), erst danach ein billiger
+# Fix-Call – statt die bezahlte Completion wegzuwerfen.
+
+JSON_REPAIR_GPT_FIX = os.getenv("JSON_REPAIR_GPT_FIX", "true").lower() == "true"
+JSON_REPAIR_FIX_MODEL = os.getenv("JSON_REPAIR_FIX_MODEL", "gpt-4.1-nano")
+JSON_FIX_PROMPT = get_prompt("json_fix")
+
+
+# Erwartete Struktur für den Fix-Call (Kurzform der Output-Formate aus prompts.py)
+_SCORE_SHAPE = '{"quality": <int>, "depth": <int>, "seo": <int>, "monetization": <int>, "overall_score": <float>}'
+_ITEMS_SHAPE = '"items": [{"platform": "twitter|linkedin|devto|medium|substack", "text": "..."}]'
+JSON_SHAPES = {
+    "score": _SCORE_SHAPE,
+    "score_batch": '{"<article id>": ' + _SCORE_SHAPE + "}",
+    "snippets": "{" + _ITEMS_SHAPE + "}",
+    "review": '{"score": ' + _SCORE_SHAPE + ", " + _ITEMS_SHAPE + "}",
+}
+
+
+def _fix_json_with_gpt(raw: str, shape: str) -> str:
+    """
+    fixer für json_repair.parse_json. API-/Verbindungsfehler werden zu
+    JSONRepairError; BudgetExceeded geht durch (die Stage soll aufhören).
+    """
+    from openai import APIError
+
+    try:
+        return _call_gpt(
+            JSON_FIX_PROMPT.render(shape=shape, raw=raw),
+            system_prompt=JSON_FIX_PROMPT.system,
+            temperature=0.0,
+            response_format={"type": "json_object"},
+            call="json_fix",
+            prompt_version=JSON_FIX_PROMPT.id,
+            model=JSON_REPAIR_FIX_MODEL,
+        )
+    except APIError as e:
+        raise JSONRepairError(f"JSON fix call failed: {e}") from e
+
+
+def _parse_json_response(
+    raw: str,
+    label: str,
+    shape: Optional[str] = None,
+    validate: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    json.loads mit lokaler Reparatur und – mit shape (Key aus JSON_SHAPES) –
+    einem Fix-Call als letztem Ausweg; validate prüft jede Stufe auf
+    Vollständigkeit. Wirft json_repair.JSONRepairError (ein ValueError).
+    """
+    fixer = None
+    if shape and JSON_REPAIR_GPT_FIX and OPENAI_API_KEY:
+        fixer = lambda broken: _fix_json_with_gpt(broken, JSON_SHAPES[shape])  # noqa: E731
+    return parse_json(raw, fixer=fixer, label=label, validate=validate)
+
+
+class _DraftStream:
+    """
+    Schreibt einen Draft während der Generierung nach <path>.part und
+    benennt ihn erst nach Abschluss in <path> um. So überleben Teil-Drafts
+    einen Crash, ohne dass quality_filter (*.md) sie aufgreift.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.part_path = self.path.with_name(self.path.name + ".part")
+        self._fh = None
+
+    def start(self, header: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._fh is None:
+            self._fh = self.part_path.open("w", encoding="utf-8")
+        else:
+            # Neustart (z.B. Fallback auf GPT): Teil-Output verwerfen
+            self._fh.seek(0)
+            self._fh.truncate()
+        self.write(header)
+
+    def write(self, chunk: str) -> None:
+        self._fh.write(chunk)
+        self._fh.flush()
+
+    def finish(self, content: str) -> None:
+        # Finalen (gestrippten) Inhalt schreiben, dann atomar umbenennen
+        self._fh.seek(0)
+        self._fh.truncate()
+        self._fh.write(content)
+        self._fh.close()
+        self._fh = None
+        os.replace(self.part_path, self.path)
+        logger.info(f"[generate_local_article] Streamed draft -> {self.path}")
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
 
 
 # ---- Public API: Local Draft Generation ----
 
-def generate_local_article(question_id: str, question_text: str, engine_label: str = "local-llm") -> str:
+ARTICLE_PROMPT = get_prompt("article")
+ARTICLE_SYSTEM_PROMPT = ARTICLE_PROMPT.system
+
+
+def build_article_prompt(question_id: str, question_text: str) -> str:
     """
-    Generiert einen Roh-Artikel.
-    1. Versucht lokalen LLM (Ollama/NIM/…)
-    2. Fällt auf GPT zurück, wenn lokal nicht erreichbar
+    Prompt für einen Long-Form-Draft (lokal, GPT-Fallback und Batch-Modus).
     """
-    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
+    return ARTICLE_PROMPT.render(question_id=question_id, question_text=question_text)
+
+
+def draft_prompt_hash(question_id: str, question_text: str) -> str:
+    """
+    Kurzer Hash über Prompt-Version, System-Prompt und gerenderten Prompt eines
+    Drafts. Steht im Draft-Header; ändert sich Frage oder Prompt, passt ein
+    vorhandener Draft nicht mehr und wird neu generiert (bulk_generate).
+    """
+    prompt = build_article_prompt(question_id, question_text)
+    key = f"{ARTICLE_PROMPT.id}\n{ARTICLE_SYSTEM_PROMPT}\n{prompt}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+_DRAFT_HEADER_RE = re.compile(r"^<!--(.*?)-->")
+
+
+def draft_header(engine_label: str, created_at: str = None, prompt_hash: Optional[str] = None) -> str:
+    """
+    HTML-Kommentar in der ersten Draft-Zeile; sync_microsites liest daraus die Engine.
+    """
+    created_at = created_at or datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
+    prompt_part = f" | prompt: {prompt_hash}" if prompt_hash else ""
+    return f"<!-- engine: {engine_label} | created_at: {created_at}{prompt_part} -->\n\n"
+
+
+def parse_draft_header(content_md: str) -> Dict[str, str]:
+    """
+    Felder aus draft_header() ({"engine", "created_at", "prompt"}); leer ohne Header.
+    """
+    match = _DRAFT_HEADER_RE.match(content_md or "")
+    if not match:
+        return {}
+    fields = {}
+    for part in match.group(1).split("|"):
+        key, sep, value = part.partition(":")
+        if sep:
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+OUTLINE_PROMPT = get_prompt("outline")
+SECTION_PROMPT = get_prompt("section")
 
-    base_prompt = f"""
-You are a senior backend engineer writing a deep, practical blog post.
 
-Question ID: {question_id}
-Question:
-{question_text}
+def parse_outline_response(raw: str) -> Dict[str, Any]:
+    """
+    Outline-JSON -> {"title", "intro", "sections": [{"heading", "points"}]}.
+    Ohne Titel oder Sections: ValueError.
+    """
+    # Lokal generiert: nur lokale Reparatur, kein bezahlter Fix-Call
+    data = _parse_json_response(raw, "generate_sectioned_article")
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected an outline object, got: {type(data)}")
+    sections = []
+    for section in data.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        heading = str(section.get("heading") or "").lstrip("#").strip()
+        if heading:
+            sections.append({"heading": heading, "points": [str(p) for p in section.get("points") or []]})
 
-Write a long-form technical article in Markdown with:
+    title = str(data.get("title") or "").lstrip("#").strip()
+    if not title or not sections:
+        raise ValueError("Outline needs a title and at least one section.")
+    return {"title": title, "intro": str(data.get("intro") or "").strip(), "sections": sections}
 
-- Clear H1 title
-- Short intro (2–3 sentences)
-- 3–6 main sections with H2/H3
-- Code examples where useful
-- Section "Common pitfalls"
-- Section "Best practices"
-- Short conclusion
 
-Language: English.
-Target audience: intermediate backend developers.
-Do NOT mention that you are an AI or that this is auto-generated.
-    """.strip()
+def _section_markdown(section: Dict[str, Any]) -> str:
+    return "\n".join([f"## {section['heading']}"] + [f"- {point}" for point in section["points"]])
+
+
+def _outline_markdown(outline: Dict[str, Any]) -> str:
+    return "\n".join([f"# {outline['title']}"] + [_section_markdown(s) for s in outline["sections"]])
+
+
+def _normalize_section(heading: str, text: str) -> str:
+    """
+    Erzwingt genau eine H2 mit dem Outline-Heading am Anfang der Section
+    (Modelle lassen sie gern weg oder setzen sie als H1).
+    """
+    lines = text.strip().splitlines()
+    if lines and lines[0].startswith("#") and lines[0].lstrip("#").strip().lower() == heading.lower():
+        lines = lines[1:]
+    return f"## {heading}\n\n" + "\n".join(lines).strip()
+
+
+def generate_sectioned_article(question_id: str, question_text: str) -> str:
+    """
+    Artikel (ohne Engine-Header) über das lokale LLM in drei Schritten:
+
+    1. Outline als JSON (Titel, Intro, H2-Sections mit Stichpunkten)
+    2. alle Sections parallel, jeweils mit der kompletten Outline als Kontext
+    3. Zusammensetzen in Outline-Reihenfolge
+
+    Die Latenz ist damit ~ Outline + längste Section statt Summe aller Sections.
+    """
+    raw = _call_local_llm(
+        OUTLINE_PROMPT.render(question_id=question_id, question_text=question_text),
+        call="outline",
+        prompt_version=OUTLINE_PROMPT.id,
+        json_mode=True,
+    )
+    outline = parse_outline_response(raw)
+    outline_md = _outline_markdown(outline)
+
+    def _section(section: Dict[str, Any]) -> str:
+        text = _call_local_llm(
+            SECTION_PROMPT.render(
+                question_text=question_text,
+                outline_md=outline_md,
+                section_md=_section_markdown(section),
+            ),
+            call="section",
+            prompt_version=SECTION_PROMPT.id,
+        )
+        return _normalize_section(section["heading"], text)
+
+    workers = max(1, min(ARTICLE_SECTION_CONCURRENCY, len(outline["sections"])))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-section") as pool:
+        # Kontext pro Task kopieren, damit die Ledger-Stage (ContextVar) mitwandert
+        futures = [
+            pool.submit(contextvars.copy_context().run, _section, section)
+            for section in outline["sections"]
+        ]
+        sections = [future.result() for future in futures]
+
+    parts = [f"# {outline['title']}"]
+    if outline["intro"]:
+        parts.append(outline["intro"])
+    parts.extend(sections)
+    logger.info(f"[generate_local_article] Stitched {len(sections)} sections for {question_id}")
+    return "\n\n".join(parts)
+
+
+def generate_local_article(
+    question_id: str,
+    question_text: str,
+    engine_label: str = "local-llm",
+    stream_to: Optional[Path] = None,
+) -> str:
+    """
+    Generiert einen Roh-Artikel.
+    1. Versucht lokalen LLM (Ollama/NIM/…)
+    2. Fällt auf GPT zurück, wenn lokal nicht erreichbar
+
+    Mit stream_to wird der Draft schon während der Generierung nach
+    <stream_to>.part geschrieben und bei Erfolg nach stream_to umbenannt.
+
+    Mit ARTICLE_GENERATION_MODE=sections läuft lokal zuerst
+    generate_sectioned_article(); scheitert das, folgt der normale Single-Call.
+    Der lokale Single-Call läuft mit Stream-Guard (llm_stream_guard) und wird
+    nach einem Abbruch bis zu STREAM_GUARD_RETRIES-mal wiederholt.
+    """
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
+    base_prompt = build_article_prompt(question_id, question_text)
+    prompt_hash = draft_prompt_hash(question_id, question_text)
 
     logger.info(f"[generate_local_article] Generating draft for {question_id} via {engine_label}")
 
-    # 1) Attempt local LLM
+    draft_stream = _DraftStream(stream_to) if stream_to else None
+    on_chunk = draft_stream.write if draft_stream else None
+
     try:
-        article_md = _call_local_llm(base_prompt)
-        header = f"<!-- engine: {engine_label} | created_at: {created_at} -->\n\n"
-        return header + article_md
-    except Exception as e:
-        logger.error(f"[generate_local_article] Local LLM failed: {e}")
-
-    # 2) Fallback: GPT
-    if not _openai_client:
-        raise RuntimeError(
-            "Local LLM is not reachable AND OPENAI_API_KEY is not set. "
-            "At least one engine must be available."
+        local_down = False
+        header = draft_header(engine_label, created_at, prompt_hash)
+
+        # 1a) Outline-then-sections (Sections kommen ungeordnet -> kein Live-Streaming)
+        if ARTICLE_GENERATION_MODE == "sections":
+            try:
+                article_md = generate_sectioned_article(question_id, question_text)
+                if draft_stream:
+                    draft_stream.start(header)
+                    draft_stream.finish(header + article_md)
+                return header + article_md
+            except CircuitOpenError:
+                local_down = True
+                logger.info(f"[generate_local_article] Local LLM circuit open, skipping to fallback for {question_id}")
+            except Exception as e:
+                logger.warning(
+                    f"[generate_local_article] Sectioned generation failed for {question_id}, "
+                    f"retrying as single call: {e}"
+                )
+
+        # 1b) Attempt local LLM; der Stream-Guard bricht Schrott-Output (keine
+        # Überschrift, Endlosschleife, weit über Länge) früh ab -> neuer Versuch
+        attempts = 0 if local_down else 1 + STREAM_GUARD_RETRIES
+        for attempt in range(1, attempts + 1):
+            try:
+                if draft_stream:
+                    draft_stream.start(header)
+                article_md = _call_local_llm(
+                    base_prompt,
+                    on_chunk=on_chunk,
+                    prompt_version=ARTICLE_PROMPT.id,
+                    guard=new_guard(max_tokens=ARTICLE_GUARD_MAX_TOKENS),
+                )
+                if draft_stream:
+                    draft_stream.finish(header + article_md)
+                return header + article_md
+            except StreamAborted as e:
+                logger.warning(f"[generate_local_article] {e} for {question_id} (attempt {attempt}/{attempts})")
+            except CircuitOpenError:
+                logger.info(f"[generate_local_article] Local LLM circuit open, skipping to fallback for {question_id}")
+                break
+            except Exception as e:
+                logger.error(f"[generate_local_article] Local LLM failed: {e}")
+                break
+
+        # 2) Fallback: GPT
+        if not OPENAI_API_KEY:
+            raise RuntimeError(
+                "Local LLM is not reachable AND OPENAI_API_KEY is not set. "
+                "At least one engine must be available."
+            )
+
+        logger.info(f"[generate_local_article] Falling back to GPT ({OPENAI_MODEL}) for {question_id}")
+        header = draft_header("gpt-fallback", created_at, prompt_hash)
+        if draft_stream:
+            draft_stream.start(header)
+        article_md = _call_gpt(
+            base_prompt,
+            system_prompt=ARTICLE_SYSTEM_PROMPT,
+            on_chunk=on_chunk,
+            call="article",
+            prompt_version=ARTICLE_PROMPT.id,
         )
-
-    logger.info(f"[generate_local_article] Falling back to GPT ({OPENAI_MODEL}) for {question_id}")
-    article_md = _call_gpt(
-        base_prompt,
-        system_prompt="You are a senior backend engineer and technical writer."
-    )
-    header = f"<!-- engine: gpt-fallback | created_at: {created_at} -->\n\n"
-    return header + article_md
+        if draft_stream:
+            draft_stream.finish(header + article_md)
+        return header + article_md
+    finally:
+        if draft_stream:
+            draft_stream.close()
 
 
 # ---- Public API: Scoring mit GPT ----
 
+SCORE_PROMPT = get_prompt("score")
+
+
 def score_article_with_gpt(article_md: str, question_meta: Dict[str, Any]) -> Dict[str, Any]:
     """
     Bewertet einen Artikel mit GPT nach den Dimensionen:
@@ -142,73 +1049,221 @@ def score_article_with_gpt(article_md: str, question_meta: Dict[str, Any]) -> Di
 
     Nutzt JSON-Mode, damit garantiert ein parsebares JSON-Objekt zurückkommt.
     """
-    if not _openai_client:
+    if not OPENAI_API_KEY:
         raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
 
-    system_prompt = "You are an expert technical editor and SEO strategist for developer content."
+    raw = _call_gpt(
+        SCORE_PROMPT.render(
+            question_meta=json.dumps(question_meta, indent=2),
+            article_md=fit_article(article_md, "score"),
+        ),
+        system_prompt=SCORE_PROMPT.system,
+        temperature=0.2,
+        response_format={"type": "json_object"},  # <- erzwingt reines JSON
+        call="score",
+        prompt_version=SCORE_PROMPT.id,
+    )
 
-    prompt = f"""
-You receive a technical blog article in Markdown and metadata about the underlying user question.
+    data = _parse_json_response(raw, "score_article_with_gpt", shape="score", validate=is_complete_score)
+    return _ensure_overall_score(data)
 
-Question metadata (JSON):
-{json.dumps(question_meta, indent=2)}
 
-Article (Markdown):
-\"\"\"markdown
-{article_md}
-\"\"\"
+def is_complete_score(data: Any) -> bool:
+    """
+    Score-Objekt mit overall_score oder allen vier Dimensionen – ein
+    abgeschnittenes/repariertes Teil-Objekt soll nie als Score durchgehen.
+    """
+    return isinstance(data, dict) and (
+        "overall_score" in data or all(dim in data for dim in _SCORE_DIMENSIONS)
+    )
 
 
-Rate the article from 0 to 10 for:
+def _ensure_overall_score(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fallback: overall_score berechnen, falls nicht gesetzt. Fehlende
+    Dimensionen werden nicht mit 0 aufgefüllt, sondern sind ein ValueError.
+    """
+    if "overall_score" not in data:
+        missing = [dim for dim in _SCORE_DIMENSIONS if dim not in data]
+        if missing:
+            raise ValueError(f"Score object lacks overall_score and {', '.join(missing)}: {data}")
+        q = float(data["quality"])
+        d = float(data["depth"])
+        s = float(data["seo"])
+        m = float(data["monetization"])
+        data["overall_score"] = round(q * 0.3 + d * 0.3 + s * 0.2 + m * 0.2, 2)
 
-1) quality         – Writing clarity, structure, correctness
-2) depth           – Depth of explanation and coverage of edge cases
-3) seo             – Searchability, keyword depth, long-tail potential
-4) monetization    – Suitability for monetizable packs, consulting, or affiliate links
+    return data
+
+
+# ---- Public API: Multi-Artikel-Scoring ----
+#
+# Kurze Drafts einzeln zu scoren bezahlt System-Prompt, Rubrik und Request-
+# Overhead pro Artikel. score_articles_with_gpt() packt mehrere Artikel bis
+# zum Token-Budget in einen JSON-Mode-Call und bekommt eine Map id -> Score.
+
+SCORE_BATCH_PROMPT = get_prompt("score_batch")
+# Maximal so viele Artikel pro Call (zusätzlich zu LLM_BUDGET_SCORE_BATCH_TOKENS)
+SCORE_BATCH_MAX_ITEMS = int(os.getenv("SCORE_BATCH_MAX_ITEMS", "8"))
 
-Return STRICTLY a single JSON object with this structure and nothing else:
+_SCORE_DIMENSIONS = ("quality", "depth", "seo", "monetization")
 
-{{
-  "quality": <int>,
-  "depth": <int>,
-  "seo": <int>,
-  "monetization": <int>,
-  "overall_score": <float>
-}}
-    """.strip()
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": prompt},
+def build_score_batch_prompt(
+    articles: List[Tuple[str, str]],
+    question_metas: Dict[str, Dict[str, Any]],
+) -> str:
+    """
+    Prompt für mehrere (id, article_md)-Paare; Artikel sind bereits gekürzt.
+    """
+    blocks = [
+        SCORE_BATCH_ARTICLE.format(
+            article_id=article_id,
+            question_meta=json.dumps(question_metas.get(article_id) or {"id": article_id}, indent=2),
+            article_md=article_md,
+        )
+        for article_id, article_md in articles
     ]
+    return SCORE_BATCH_PROMPT.render(articles="\n\n".join(blocks))
 
-    resp = _openai_client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=messages,
-        temperature=0.2,
-        response_format={"type": "json_object"},  # <- erzwingt reines JSON
-    )
 
-    raw = resp.choices[0].message.content.strip()
+def parse_score_batch_response(raw: str, expected_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Parst die Map id -> Score. Enthalten sind nur erwartete IDs mit gültigem
+    Score-Objekt; fehlende oder kaputte IDs fehlen im Ergebnis.
+    """
+    data = _parse_json_response(raw, "score_articles_with_gpt", shape="score_batch")
+    if not isinstance(data, dict):
+        raise ValueError(f"[score_articles_with_gpt] Expected a JSON object, got: {type(data)}")
+
+    scores = {}
+    for article_id in expected_ids:
+        score = data.get(article_id)
+        # Unvollständige Scores (z.B. abgeschnittene Antwort) werden einzeln nachgeholt
+        if not is_complete_score(score):
+            continue
+        try:
+            for dim in _SCORE_DIMENSIONS:
+                if dim in score:
+                    score[dim] = float(score[dim])
+            score = _ensure_overall_score(score)
+            score["overall_score"] = float(score["overall_score"])
+        except (TypeError, ValueError):
+            continue
+        scores[article_id] = score
+    return scores
+
+
+def score_articles_with_gpt(
+    articles: List[Tuple[str, str]],
+    question_metas: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Bewertet mehrere (id, article_md)-Paare in einem JSON-Mode-Call.
 
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError as e:
-        logger.error(f"[score_article_with_gpt] JSON parse error. Raw: {raw}")
-        raise
+    Die Artikel müssen zusammen ins Budget passen (siehe pack_articles_for_scoring).
+    IDs, die in der Antwort fehlen oder keinen gültigen Score haben, werden
+    einzeln über score_article_with_gpt() nachgeholt. Schlägt auch das fehl,
+    steht die Exception als Wert in der Map (wie bei run_bulk()).
 
-    # Fallback: overall_score berechnen, falls nicht gesetzt
-    if "overall_score" not in data:
-        q = float(data.get("quality", 0))
-        d = float(data.get("depth", 0))
-        s = float(data.get("seo", 0))
-        m = float(data.get("monetization", 0))
-        data["overall_score"] = round(q * 0.3 + d * 0.3 + s * 0.2 + m * 0.2, 2)
+    Rückgabe: {id: {quality, depth, seo, monetization, overall_score} | Exception}
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
+
+    question_metas = question_metas or {}
+    trimmed = [(article_id, fit_article(article_md, "score")) for article_id, article_md in articles]
+    expected_ids = [article_id for article_id, _ in articles]
+
+    scores: Dict[str, Any] = {}
+    if len(articles) > 1:
+        try:
+            raw = _call_gpt(
+                build_score_batch_prompt(trimmed, question_metas),
+                system_prompt=SCORE_BATCH_PROMPT.system,
+                temperature=0.2,
+                response_format={"type": "json_object"},
+                call="score_batch",
+                prompt_version=SCORE_BATCH_PROMPT.id,
+            )
+            scores = parse_score_batch_response(raw, expected_ids)
+        except Exception as e:
+            logger.error(f"[score_articles_with_gpt] Batch of {len(articles)} failed, scoring one by one: {e}")
+
+    missing = [article_id for article_id in expected_ids if article_id not in scores]
+    if missing and len(articles) > 1:
+        logger.warning(f"[score_articles_with_gpt] {len(missing)}/{len(articles)} ids missing, retrying per item.")
+
+    by_id = dict(articles)
+    for article_id in missing:
+        try:
+            scores[article_id] = score_article_with_gpt(
+                by_id[article_id], question_metas.get(article_id) or {"id": article_id}
+            )
+        except Exception as e:
+            logger.error(f"[score_articles_with_gpt] Scoring {article_id} failed: {e}")
+            scores[article_id] = e
+
+    return {article_id: scores[article_id] for article_id in expected_ids}
+
+
+def pack_articles_for_scoring(
+    articles: List[Tuple[str, str]],
+    budget_tokens: Optional[int] = None,
+    max_items: Optional[int] = None,
+) -> List[List[Tuple[str, str]]]:
+    """
+    Teilt (id, article_md)-Paare in Gruppen für score_articles_with_gpt():
+    gemessen an der gekürzten Länge, höchstens SCORE_BATCH_MAX_ITEMS pro Gruppe.
+    Lange Drafts bekommen so weniger Nachbarn, kurze werden dicht gebündelt.
+    """
+    # Gemessen wird die Länge nach fit_article(), also höchstens das Score-Budget
+    per_article_cap = ARTICLE_TOKEN_BUDGETS["score"]
+    sizes = [
+        (article_id, min(estimate_tokens(article_md), per_article_cap))
+        for article_id, article_md in articles
+    ]
+    packs = pack_by_token_budget(
+        sizes,
+        budget_tokens or SCORE_BATCH_TOKEN_BUDGET,
+        max_items or SCORE_BATCH_MAX_ITEMS,
+    )
+    by_id = dict(articles)
+    return [[(article_id, by_id[article_id]) for article_id in pack] for pack in packs]
 
-    return data
 
 # ---- Public API: Social Snippets ----
 
+SNIPPETS_TEMPERATURE = 0.4
+SNIPPETS_PROMPT = get_prompt("snippets")
+SNIPPETS_SYSTEM_PROMPT = SNIPPETS_PROMPT.system
+
+
+def build_snippets_prompt(article_md: str, question_meta: Dict[str, Any]) -> str:
+    """
+    Prompt für die Social Snippets (auch für den Batch-Modus).
+    """
+    return SNIPPETS_PROMPT.render(
+        question_meta=json.dumps(question_meta, indent=2),
+        article_md=fit_article(article_md, "snippets"),
+    )
+
+
+def parse_snippets_response(raw: str) -> List[Dict[str, Any]]:
+    """
+    Parst die JSON-Antwort der Snippet-Generierung -> Liste von Snippets.
+    """
+    data = _parse_json_response(raw, "generate_social_snippets", shape="snippets")
+    if not isinstance(data, dict):
+        raise ValueError(f"[generate_social_snippets] Expected a JSON object, got: {type(data)}")
+
+    items = data.get("items", [])
+    if not isinstance(items, list):
+        raise ValueError(f"[generate_social_snippets] Expected 'items' to be a list, got: {type(items)}")
+
+    return items
+
+
 def generate_social_snippets(article_md: str, question_meta: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Erzeugt Social Media Snippets als Liste von Dicts:
@@ -220,68 +1275,231 @@ def generate_social_snippets(article_md: str, question_meta: Dict[str, Any]) ->
 
     Nutzt JSON-Mode, gibt ein JSON-Objekt mit Feld "items" zurück.
     """
-    if not _openai_client:
+    if not OPENAI_API_KEY:
         raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
 
-    system_prompt = "You are a growth-focused content marketer for developer tools."
+    raw = _call_gpt(
+        build_snippets_prompt(article_md, question_meta),
+        system_prompt=SNIPPETS_SYSTEM_PROMPT,
+        temperature=SNIPPETS_TEMPERATURE,
+        response_format={"type": "json_object"},
+        call="snippets",
+        prompt_version=SNIPPETS_PROMPT.id,
+    )
+    return parse_snippets_response(raw)
+
 
-    prompt = f"""
-Create social media snippets for this technical article.
+# ---- Public API: Kombiniertes Review (Score + Snippets in einem Call) ----
 
-Question metadata (JSON):
-{json.dumps(question_meta, indent=2)}
+REVIEW_TEMPERATURE = 0.3
+REVIEW_PROMPT = get_prompt("review")
+REVIEW_SYSTEM_PROMPT = REVIEW_PROMPT.system
 
-Article (Markdown):
-\"\"\"markdown
-{article_md}
-\"\"\"
 
+def build_review_prompt(article_md: str, question_meta: Dict[str, Any]) -> str:
+    """
+    Prompt für das kombinierte Review (auch für den Batch-Modus).
+    """
+    return REVIEW_PROMPT.render(
+        question_meta=json.dumps(question_meta, indent=2),
+        article_md=fit_article(article_md, "review"),
+    )
 
-Generate:
 
-- 2 concise X/Twitter posts (max 260 characters each, with 1–2 relevant hashtags, no emojis)
-- 1 LinkedIn post (3–6 sentences, with value + light CTA, no hashtag wall)
-- 1 short Dev.to description (1–2 sentences, teaser for the article)
-- 1 short Medium description (1–2 sentences, teaser)
-- 1 Substack teaser (2–4 sentences, subtle newsletter CTA)
+def parse_review_response(raw: str) -> Dict[str, Any]:
+    """
+    Parst die JSON-Antwort des kombinierten Reviews -> {"score": ..., "snippets": [...]}.
+    """
+    data = _parse_json_response(
+        raw,
+        "review_article_with_gpt",
+        shape="review",
+        validate=lambda value: isinstance(value, dict) and is_complete_score(value.get("score")),
+    )
+    score = data["score"]
+
+    items = data.get("items", [])
+    if not isinstance(items, list):
+        raise ValueError(f"[review_article_with_gpt] Expected 'items' to be a list, got: {type(items)}")
 
-Return STRICTLY a JSON object with this structure and nothing else:
+    return {"score": _ensure_overall_score(score), "snippets": items}
 
-{{
-  "items": [
-    {{ "platform": "twitter",  "text": "..." }},
-    {{ "platform": "twitter",  "text": "..." }},
-    {{ "platform": "linkedin", "text": "..." }},
-    {{ "platform": "devto",    "text": "..." }},
-    {{ "platform": "medium",   "text": "..." }},
-    {{ "platform": "substack", "text": "..." }}
-  ]
-}}
-    """.strip()
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": prompt},
-    ]
+def review_article_with_gpt(article_md: str, question_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bewertet einen Artikel UND erzeugt Social Snippets in einem einzigen
+    JSON-Mode-Call, damit der Artikel nur einmal als Input bezahlt wird.
+
+    Rückgabe:
+    {
+      "score":    {quality, depth, seo, monetization, overall_score},
+      "snippets": [{"platform": "...", "text": "..."}, ...]
+    }
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OpenAI client not initialized. Check OPENAI_API_KEY.")
 
-    resp = _openai_client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=messages,
-        temperature=0.4,
+    raw = _call_gpt(
+        build_review_prompt(article_md, question_meta),
+        system_prompt=REVIEW_SYSTEM_PROMPT,
+        temperature=REVIEW_TEMPERATURE,
         response_format={"type": "json_object"},
+        call="review",
+        prompt_version=REVIEW_PROMPT.id,
     )
+    return parse_review_response(raw)
 
-    raw = resp.choices[0].message.content.strip()
 
-    try:
-        data = json.loads(raw)
-    except Exception:
-        logger.error(f"[generate_social_snippets] JSON parse error. Raw: {raw}")
-        raise
+# ---- Async API ----
+#
+# Die Backends (requests / OpenAI-SDK) sind blockierend. Die async-Varianten
+# laufen deshalb im Thread-Pool des Event-Loops; begrenzt wird die Parallelität
+# über ein Semaphore in gather_bounded().
 
-    items = data.get("items", [])
-    if not isinstance(items, list):
-        raise ValueError(f"[generate_social_snippets] Expected 'items' to be a list, got: {type(items)}")
+async def agenerate_local_article(
+    question_id: str,
+    question_text: str,
+    engine_label: str = "local-llm",
+    stream_to: Optional[Path] = None,
+) -> str:
+    """
+    Async-Variante von generate_local_article().
+    """
+    return await asyncio.to_thread(
+        generate_local_article, question_id, question_text, engine_label, stream_to
+    )
+
+
+async def ascore_article_with_gpt(article_md: str, question_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async-Variante von score_article_with_gpt().
+    """
+    return await asyncio.to_thread(score_article_with_gpt, article_md, question_meta)
+
+
+async def ascore_articles_with_gpt(
+    articles: List[Tuple[str, str]],
+    question_metas: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Async-Variante von score_articles_with_gpt().
+    """
+    return await asyncio.to_thread(score_articles_with_gpt, articles, question_metas)
+
+
+async def agenerate_social_snippets(article_md: str, question_meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Async-Variante von generate_social_snippets().
+    """
+    return await asyncio.to_thread(generate_social_snippets, article_md, question_meta)
 
-    return items
 
+async def areview_article_with_gpt(article_md: str, question_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async-Variante von review_article_with_gpt().
+    """
+    return await asyncio.to_thread(review_article_with_gpt, article_md, question_meta)
+
+
+async def gather_bounded(
+    items: List[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    concurrency: Optional[int] = None,
+) -> List[Any]:
+    """
+    Führt worker(item) für alle items aus, maximal `concurrency` gleichzeitig.
+
+    Ergebnisse kommen in Eingabereihenfolge zurück. Exceptions werden als Wert
+    zurückgegeben (wie gather(return_exceptions=True)), damit ein einzelner
+    Fehler nicht den ganzen Batch abbricht.
+    """
+    limit = max(1, concurrency or LLM_CONCURRENCY)
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(item):
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(_run(item) for item in items), return_exceptions=True)
+
+
+def _run_in_loop(make_coro: Callable[[], Awaitable[Any]], limit: int) -> Any:
+    """
+    Startet einen Event-Loop, dessen Thread-Pool groß genug für `limit`
+    parallele Requests ist (der Default-Pool hängt von der CPU-Anzahl ab).
+    """
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=limit, thread_name_prefix="llm"))
+        return await make_coro()
+
+    return asyncio.run(_main())
+
+
+def run_bulk(
+    items: List[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    concurrency: Optional[int] = None,
+) -> List[Any]:
+    """
+    Synchroner Einstieg für Skripte, siehe gather_bounded().
+    """
+    limit = max(1, concurrency or LLM_CONCURRENCY)
+    return _run_in_loop(lambda: gather_bounded(items, worker, limit), limit)
+
+
+def run_async(make_coro: Callable[[], Awaitable[Any]], threads: int) -> Any:
+    """
+    Synchroner Einstieg für eigene Coroutinen mit mehreren parallelen
+    Stufen (z.B. content_pipeline): `threads` = Summe der Worker aller Stufen.
+    """
+    return _run_in_loop(make_coro, max(1, threads))
+
+
+# ---- Public API: Bulk Draft Generation ----
+
+async def agenerate_articles_bulk(
+    questions: List[Tuple[str, str]],
+    concurrency: Optional[int] = None,
+    on_done: Optional[Callable[[str, str], None]] = None,
+    engine_label: str = "local-llm",
+    stream_dir: Optional[Path] = None,
+) -> List[Tuple[str, Any]]:
+    """
+    Generiert Drafts für viele Fragen parallel.
+
+    questions:  Liste von (question_id, question_text)
+    on_done:    optionaler Callback (question_id, article_md), wird direkt nach
+                jedem erfolgreichen Draft aufgerufen (z.B. zum Speichern).
+    stream_dir: wenn gesetzt, wird jeder Draft nach <stream_dir>/<id>.md gestreamt.
+
+    Rückgabe: Liste von (question_id, article_md | Exception).
+    """
+
+    async def _worker(q: Tuple[str, str]) -> str:
+        qid, qtext = q
+        stream_to = stream_dir / f"{qid}.md" if stream_dir else None
+        article_md = await agenerate_local_article(qid, qtext, engine_label, stream_to)
+        if on_done:
+            on_done(qid, article_md)
+        return article_md
+
+    results = await gather_bounded(questions, _worker, concurrency or local_llm_concurrency())
+    return [(q[0], r) for q, r in zip(questions, results)]
+
+
+def generate_articles_bulk(
+    questions: List[Tuple[str, str]],
+    concurrency: Optional[int] = None,
+    on_done: Optional[Callable[[str, str], None]] = None,
+    engine_label: str = "local-llm",
+    stream_dir: Optional[Path] = None,
+) -> List[Tuple[str, Any]]:
+    """
+    Synchrone Variante von agenerate_articles_bulk() für Skripte.
+    """
+    limit = max(1, concurrency or local_llm_concurrency())
+    return _run_in_loop(
+        lambda: agenerate_articles_bulk(questions, limit, on_done, engine_label, stream_dir), limit
+    )
@@ -0,0 +1,184 @@
+# automations/llm_endpoints.py
+"""
+Endpoint-Pool für mehrere lokale LLM-Hosts (z.B. mehrere Ollama-Boxen).
+
+- Dispatch nach "least outstanding requests": der Host mit den wenigsten
+  laufenden Requests relativ zu seinem Gewicht bekommt den nächsten Call
+- max_inflight pro Host: ist jeder Host voll, wartet der Aufrufer auf einen Slot
+- eigener Circuit Breaker pro Host: fällt ein Host aus, wird er ausgeklinkt
+  (open) und per Health-Probe wieder aufgenommen; erst wenn ALLE Hosts
+  gesperrt sind, kommt CircuitOpenError (-> GPT-Fallback)
+- läuft auf einem Host gerade der Test-Request eines halb offenen Breakers,
+  warten die übrigen Aufrufer auf dessen Ergebnis statt auf GPT auszuweichen
+
+Spec-Format (LOCAL_LLM_ENDPOINTS), kommagetrennt, Gewicht und Limit optional:
+
+    http://gpu-a:11434/api/generate|2|4, http://gpu-b:11434|1|2
+
+max_inflight 0 = kein Limit pro Host.
+"""
+import logging
+import threading
+from urllib.parse import urlsplit
+from typing import Callable, List, Optional, Set
+
+from llm_health import OPEN, CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class Endpoint:
+    def __init__(self, url: str, weight: float = 1.0, max_inflight: int = 0):
+        parts = urlsplit(url)
+        # Nur Host angegeben -> Ollama-Generate-Pfad ergänzen
+        if parts.path in ("", "/"):
+            url = f"{parts.scheme}://{parts.netloc}/api/generate"
+        self.url = url
+        self.name = parts.netloc or url
+        self.weight = weight if weight > 0 else 1.0
+        self.max_inflight = max(0, max_inflight)
+        self.inflight = 0
+        self.breaker: Optional[CircuitBreaker] = None
+
+    @property
+    def load(self) -> float:
+        return self.inflight / self.weight
+
+    def has_capacity(self) -> bool:
+        return not self.max_inflight or self.inflight < self.max_inflight
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r}, weight={self.weight}, max_inflight={self.max_inflight})"
+
+
+def parse_endpoints(spec: str, default_max_inflight: int = 0) -> List[Endpoint]:
+    """
+    "url|weight|max_inflight, url|weight|max_inflight, ..." -> Endpoints.
+    """
+    endpoints = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        fields = [f.strip() for f in entry.split("|")]
+        try:
+            weight = float(fields[1]) if len(fields) > 1 and fields[1] else 1.0
+            max_inflight = int(fields[2]) if len(fields) > 2 and fields[2] else default_max_inflight
+        except ValueError:
+            raise ValueError(f"Invalid endpoint spec {entry!r} (expected url|weight|max_inflight)") from None
+        endpoints.append(Endpoint(fields[0], weight, max_inflight))
+    return endpoints
+
+
+class EndpointPool:
+    """
+    Thread-safe, damit die Bulk-API (Thread-Pool) einen Pool teilen kann.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        probe: Optional[Callable[[Endpoint], bool]] = None,
+    ):
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint.")
+        self.endpoints = endpoints
+        for endpoint in endpoints:
+            endpoint.breaker = CircuitBreaker(
+                f"local-llm:{endpoint.name}" if len(endpoints) > 1 else "local-llm",
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout,
+                probe=(lambda ep=endpoint: probe(ep)) if probe else None,
+            )
+        self._cond = threading.Condition()
+        if len(endpoints) > 1:
+            logger.info(
+                "[llm_endpoints] Local LLM pool: "
+                + ", ".join(f"{ep.name} (weight {ep.weight:g}, max {ep.max_inflight or '-'})" for ep in endpoints)
+            )
+
+    @property
+    def capacity(self) -> Optional[int]:
+        """
+        Summe aller max_inflight – None, sobald ein Host unbegrenzt ist.
+        """
+        if any(not ep.max_inflight for ep in self.endpoints):
+            return None
+        return sum(ep.max_inflight for ep in self.endpoints)
+
+    def _candidates(self, avoid: Set[str]) -> List[Endpoint]:
+        # Hosts aus `avoid` (z.B. gerade fehlgeschlagen) nur, wenn sonst nichts frei ist
+        free = [ep for ep in self.endpoints if ep.has_capacity()]
+        return sorted(free, key=lambda ep: (ep.url in avoid, ep.load, -ep.weight))
+
+    def acquire(self, avoid: Optional[Set[str]] = None) -> Endpoint:
+        """
+        Reserviert einen Slot auf dem am wenigsten belasteten gesunden Host.
+        Blockiert, solange alle erreichbaren Hosts voll sind oder ein
+        Test-Request über ihre Wiederaufnahme entscheidet.
+        """
+        avoid = avoid or set()
+        while True:
+            with self._cond:
+                while True:
+                    candidates = self._candidates(avoid)
+                    if candidates:
+                        break
+                    self._cond.wait()
+                # Slots vorab reservieren, damit die (evtl. langsame) Health-Probe
+                # des Breakers außerhalb des Locks laufen kann
+                for ep in candidates:
+                    ep.inflight += 1
+
+            chosen = None
+            for ep in candidates:
+                if chosen is None and ep.breaker.allow_request():
+                    chosen = ep
+
+            with self._cond:
+                for ep in candidates:
+                    if ep is not chosen:
+                        ep.inflight -= 1
+                self._cond.notify_all()
+                if chosen is not None:
+                    return chosen
+                # Alle freien Hosts gesperrt – warten lohnt nur, wenn noch
+                # nicht gesperrte, aber volle Hosts existieren oder ein
+                # Test-Request läuft, der einen Host wieder freigeben kann
+                worth_waiting = [
+                    ep for ep in self.endpoints
+                    if (not ep.has_capacity() and ep.breaker.state != OPEN) or ep.breaker.trial_in_flight
+                ]
+                if not worth_waiting:
+                    raise CircuitOpenError("All local LLM endpoints are marked as down.")
+                self._cond.wait()
+
+    def release(self, endpoint: Endpoint, ok: Optional[bool] = None) -> None:
+        """
+        Gibt den Slot frei; ok=True/False meldet Erfolg/Fehler an den Breaker
+        des Hosts (None = neutral, z.B. bei abgebrochenem Call; ein laufender
+        Test-Request wird dann freigegeben, damit Wartende nicht hängen).
+        """
+        if ok is True:
+            endpoint.breaker.record_success()
+        elif ok is False:
+            endpoint.breaker.record_failure()
+        else:
+            endpoint.breaker.cancel_trial()
+        with self._cond:
+            endpoint.inflight -= 1
+            self._cond.notify_all()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "endpoint": ep.name,
+                "weight": ep.weight,
+                "max_inflight": ep.max_inflight,
+                "inflight": ep.inflight,
+                "state": ep.breaker.state,
+            }
+            for ep in self.endpoints
+        ]
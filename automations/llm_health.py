@@ -0,0 +1,115 @@
+# automations/llm_health.py
+"""
+Circuit Breaker für LLM-Backends.
+
+closed     -> Requests laufen normal; nach `failure_threshold` Fehlern in Folge: open
+open       -> Requests werden sofort abgelehnt (Fallback greift ohne Timeout)
+half-open  -> nach `reset_timeout` Sekunden: Health-Probe; wenn ok, darf genau
+              ein Test-Request durch. Erfolg -> closed, Fehler -> wieder open.
+              Solange der Test-Request läuft (trial_in_flight), sollten andere
+              Aufrufer auf sein Ergebnis warten statt sofort auszuweichen.
+"""
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Wird geworfen, wenn ein Backend per Circuit Breaker gesperrt ist.
+    """
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        probe: Optional[Callable[[], bool]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        True, wenn ein Request an das Backend gehen darf.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial_in_flight:
+                return False
+            self.state = HALF_OPEN
+            self._trial_in_flight = True
+
+        if self.probe and not self._run_probe():
+            with self._lock:
+                self._trial_in_flight = False
+                self._open()
+            return False
+
+        logger.info(f"[circuit:{self.name}] Half-open, sending trial request.")
+        return True
+
+    @property
+    def trial_in_flight(self) -> bool:
+        """
+        True, solange Health-Probe oder Test-Request eines halb offenen Breakers laufen.
+        """
+        return self._trial_in_flight
+
+    def cancel_trial(self) -> None:
+        """
+        Test-Request ohne Ergebnis beendet (z.B. abgebrochener Stream):
+        der nächste allow_request() darf einen neuen Versuch starten.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _run_probe(self) -> bool:
+        try:
+            return bool(self.probe())
+        except Exception as e:
+            logger.warning(f"[circuit:{self.name}] Health probe failed: {e}")
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"[circuit:{self.name}] Backend recovered, closing circuit.")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        if self.state != OPEN:
+            logger.warning(
+                f"[circuit:{self.name}] Opening circuit after {self.failures} failure(s); "
+                f"retry in {self.reset_timeout:.0f}s."
+            )
+        self.state = OPEN
+        self._opened_at = time.monotonic()
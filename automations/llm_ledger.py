@@ -0,0 +1,347 @@
+# automations/llm_ledger.py
+"""
+Telemetrie-Ledger für LLM-Calls.
+
+Jeder echte Call (Cache-Hits nicht) hängt eine JSON-Zeile an
+data/llm_ledger/calls.jsonl an:
+
+    {"ts", "day", "stage", "call", "engine", "model", "latency_s",
+     "prompt_tokens", "completion_tokens", "retries", "outcome", ...}
+
+`stage` ist das aufrufende Skript (z.B. "bulk_generate"), `call` der
+Call-Typ innerhalb der Stage (z.B. "score"). Wird die Datei größer als
+LLM_LEDGER_MAX_BYTES, rotiert sie nach calls.1.jsonl … calls.N.jsonl.
+
+Lokale Calls tragen load_s (Modell-Ladezeit) und cold_start; die Ladezeit
+zählt nicht in p50/p95, Cold Starts werden separat ausgewiesen.
+
+Auswertung (p50/p95-Latenz und Token-Summen pro Stage und Tag):
+
+    python automations/llm_ledger.py [--days 7]
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+LLM_LEDGER_ENABLED = os.getenv("LLM_LEDGER_ENABLED", "true").lower() == "true"
+LLM_LEDGER_PATH = Path(os.getenv("LLM_LEDGER_PATH", BASE_DIR / "data" / "llm_ledger" / "calls.jsonl"))
+LLM_LEDGER_MAX_BYTES = int(os.getenv("LLM_LEDGER_MAX_BYTES", str(10 * 1024 * 1024)))
+LLM_LEDGER_BACKUPS = int(os.getenv("LLM_LEDGER_BACKUPS", "5"))
+
+_write_lock = threading.Lock()
+
+# Weitere Abnehmer jedes Eintrags (z.B. llm_budget), auch bei LLM_LEDGER_ENABLED=false
+_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def add_listener(listener: Callable[[Dict[str, Any]], None]) -> None:
+    """
+    Registriert einen Callback, der jeden Ledger-Eintrag (Dict) bekommt.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+# Stage-Override (z.B. wenn mehrere Stages in einem Prozess laufen);
+# asyncio.to_thread() übernimmt den Kontext in die Worker-Threads.
+_stage: ContextVar[Optional[str]] = ContextVar("llm_ledger_stage", default=None)
+
+
+def current_stage() -> str:
+    """
+    Aktive Stage: set via stage(), sonst LLM_STAGE, sonst Name des Skripts.
+    """
+    return _stage.get() or os.getenv("LLM_STAGE") or Path(sys.argv[0]).stem or "interactive"
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Ordnet alle Calls innerhalb des Blocks der Stage `name` zu.
+    """
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def _backup_path(index: int) -> Path:
+    return LLM_LEDGER_PATH.with_name(f"{LLM_LEDGER_PATH.stem}.{index}{LLM_LEDGER_PATH.suffix}")
+
+
+def _rotate() -> None:
+    for index in range(LLM_LEDGER_BACKUPS - 1, 0, -1):
+        src = _backup_path(index)
+        if src.exists():
+            os.replace(src, _backup_path(index + 1))
+    if LLM_LEDGER_BACKUPS > 0:
+        os.replace(LLM_LEDGER_PATH, _backup_path(1))
+    else:
+        LLM_LEDGER_PATH.unlink()
+
+
+def record_call(
+    *,
+    call: str,
+    engine: str,
+    model: str,
+    latency_s: float,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    retries: int = 0,
+    outcome: str = "ok",
+    stage: Optional[str] = None,
+    **extra: Any,
+) -> None:
+    """
+    Hängt einen Eintrag an den Ledger an und reicht ihn an die Listener weiter.
+    Fehler beim Schreiben werden nur geloggt – Telemetrie darf keinen
+    Pipeline-Lauf abbrechen.
+    """
+    if not LLM_LEDGER_ENABLED and not _listeners:
+        return
+
+    now = datetime.now(timezone.utc)
+    entry = {
+        "ts": now.isoformat(timespec="seconds"),
+        "day": now.strftime("%Y-%m-%d"),
+        "stage": stage or current_stage(),
+        "call": call,
+        "engine": engine,
+        "model": model,
+        "latency_s": round(latency_s, 3),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "retries": retries,
+        "outcome": outcome,
+    }
+    entry.update({k: v for k, v in extra.items() if v is not None})
+
+    for listener in _listeners:
+        try:
+            listener(entry)
+        except Exception as e:
+            logger.error(f"[llm_ledger] Listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+    if not LLM_LEDGER_ENABLED:
+        return
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+    try:
+        with _write_lock:
+            LLM_LEDGER_PATH.parent.mkdir(parents=True, exist_ok=True)
+            if LLM_LEDGER_PATH.exists() and LLM_LEDGER_PATH.stat().st_size >= LLM_LEDGER_MAX_BYTES:
+                _rotate()
+            with LLM_LEDGER_PATH.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+    except OSError as e:
+        logger.error(f"[llm_ledger] Write failed: {e}")
+
+
+@contextmanager
+def track(engine: str, model: str, call: str = "chat", stage: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Misst die Latenz des Blocks und schreibt danach einen Ledger-Eintrag.
+
+    Der Block füllt das gelieferte Dict (prompt_tokens, completion_tokens,
+    retries, beliebige Extras wie ttft_s). Bei einer Exception wird
+    outcome="error" mit Fehlertyp geloggt und die Exception weitergereicht.
+
+        with track("openai", OPENAI_MODEL, call="score") as rec:
+            resp = client.chat.completions.create(...)
+            rec.update(usage_fields(resp.usage))
+    """
+    rec: Dict[str, Any] = {}
+    started = time.monotonic()
+    try:
+        yield rec
+    except BaseException as e:
+        rec.setdefault("outcome", "error")
+        rec.setdefault("error", f"{type(e).__name__}: {e}"[:300])
+        raise
+    finally:
+        record_call(
+            call=call,
+            engine=engine,
+            model=model,
+            latency_s=time.monotonic() - started,
+            stage=stage,
+            **rec,
+        )
+
+
+def usage_fields(usage: Any) -> Dict[str, Optional[int]]:
+    """
+    prompt/completion tokens (plus gecachte Prompt-Tokens aus
+    prompt_tokens_details.cached_tokens) aus einem SDK-Usage-Objekt oder REST-Dict.
+    """
+    if usage is None:
+        return {}
+    if isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details") or {}
+        return {
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "cached_tokens": details.get("cached_tokens"),
+        }
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
+
+
+# ---- Auswertung ----
+
+def read_entries(since_day: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Liest alle Einträge (inkl. rotierter Dateien), optional ab `since_day` (YYYY-MM-DD).
+    """
+    paths = [_backup_path(i) for i in range(LLM_LEDGER_BACKUPS, 0, -1)] + [LLM_LEDGER_PATH]
+    entries: List[Dict[str, Any]] = []
+    for path in paths:
+        if not path.exists():
+            continue
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # halb geschriebene Zeile nach Crash
+            if since_day and entry.get("day", "") < since_day:
+                continue
+            entries.append(entry)
+    return entries
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank-Perzentil.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(entries: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """
+    Aggregiert nach `key` ("stage", "day", "prompt_version" oder "endpoint"): Calls, Fehler,
+    p50/p95-Latenz, Tokens, Prompt-Cache-Hit-Rate (gecachte / alle Prompt-Tokens)
+    und Cold Starts mit Ladezeit.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for entry in entries:
+        groups[entry.get(key) or "?"].append(entry)
+
+    rows = []
+    for name in sorted(groups):
+        group = groups[name]
+        # Generierungs-Latenz: ohne Modell-Load und ohne reine Warm-up-Calls
+        latencies = [
+            e["latency_s"] - (e.get("load_s") or 0)
+            for e in group
+            if e.get("latency_s") is not None and e.get("call") != "warmup"
+        ]
+        cold = [e for e in group if e.get("cold_start")]
+        prompt_tokens = sum(e.get("prompt_tokens") or 0 for e in group)
+        cached_tokens = sum(e.get("cached_tokens") or 0 for e in group)
+        rows.append({
+            key: name,
+            "calls": len(group),
+            "errors": sum(1 for e in group if e.get("outcome") != "ok"),
+            "retries": sum(e.get("retries") or 0 for e in group),
+            "p50_s": _percentile(latencies, 50),
+            "p95_s": _percentile(latencies, 95),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(e.get("completion_tokens") or 0 for e in group),
+            "cached_tokens": cached_tokens,
+            "cache_hit_rate": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else None,
+            "cold_starts": len(cold),
+            "load_s": round(sum(e["load_s"] for e in cold), 3),
+            "max_load_s": max((e["load_s"] for e in cold), default=None),
+        })
+    return rows
+
+
+def _print_table(rows: List[Dict[str, Any]], key: str) -> None:
+    header = (
+        f"{key:<24} {'calls':>6} {'errors':>6} {'retries':>7} {'p50_s':>8} {'p95_s':>8} "
+        f"{'prompt_tok':>11} {'compl_tok':>10} {'cached':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    def _fmt(value: Optional[float]) -> str:
+        return f"{value:.2f}" if value is not None else "-"
+
+    def _pct(value: Optional[float]) -> str:
+        return f"{value:.0%}" if value is not None else "-"
+
+    for row in rows:
+        print(
+            f"{row[key]:<24} {row['calls']:>6} {row['errors']:>6} {row['retries']:>7} "
+            f"{_fmt(row['p50_s']):>8} {_fmt(row['p95_s']):>8} "
+            f"{row['prompt_tokens']:>11} {row['completion_tokens']:>10} "
+            f"{_pct(row['cache_hit_rate']):>7}"
+        )
+
+
+def main(days: Optional[int] = None) -> None:
+    since_day = None
+    if days:
+        since_day = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+    entries = read_entries(since_day)
+    if not entries:
+        print(f"[llm_ledger] No entries in {LLM_LEDGER_PATH}")
+        return
+
+    print(f"[llm_ledger] {len(entries)} calls" + (f" since {since_day}" if since_day else ""))
+    print()
+    _print_table(summarize(entries, "stage"), "stage")
+    print()
+    _print_table(summarize(entries, "day"), "day")
+    print()
+    _print_table(summarize(entries, "prompt_version"), "prompt_version")
+
+    # Cold Starts getrennt von der Generierungs-Latenz
+    cold_rows = [row for row in summarize(entries, "stage") if row["cold_starts"]]
+    if cold_rows:
+        print()
+        print("[llm_ledger] Cold starts (model load, not included in p50/p95):")
+        for row in cold_rows:
+            print(
+                f"  {row['stage']:<22} {row['cold_starts']:>4}x  "
+                f"total {row['load_s']:.1f}s  max {row['max_load_s']:.1f}s"
+            )
+
+    # Lokale Calls pro Host, wenn über mehrere Endpoints verteilt wurde
+    local_entries = [e for e in entries if e.get("endpoint")]
+    if len({e["endpoint"] for e in local_entries}) > 1:
+        print()
+        _print_table(summarize(local_entries, "endpoint"), "endpoint")
+
+
+if __name__ == "__main__":
+    days_arg = None
+    if "--days" in sys.argv:
+        days_arg = int(sys.argv[sys.argv.index("--days") + 1])
+    main(days_arg)
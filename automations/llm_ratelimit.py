@@ -0,0 +1,140 @@
+# automations/llm_ratelimit.py
+"""
+Adaptiver Rate Limiter für OpenAI-Calls.
+
+- Zwei Token-Buckets: Requests pro Minute (RPM) und Tokens pro Minute (TPM)
+- AIMD-Concurrency: +1 Slot pro "Fenster" erfolgreicher Requests,
+  Halbierung bei 429/5xx
+- Retry-After aus der API-Antwort pausiert alle Slots bis zum angegebenen Zeitpunkt
+
+Thread-safe, damit die Bulk-API (Thread-Pool) einen Limiter teilen kann.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Klassischer Token-Bucket: füllt sich mit `rate_per_minute / 60` pro
+    Sekunde auf, maximal bis `capacity` (Default: eine Minute Budget).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def consume(self, amount: float) -> None:
+        """
+        Blockiert, bis `amount` verfügbar ist. Anfragen größer als die
+        Kapazität warten auf einen vollen Bucket statt ewig zu blockieren.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(min(wait, 5.0))
+
+    def adjust(self, delta: float) -> None:
+        """
+        Korrigiert den Bucket nachträglich (z.B. echte statt geschätzter Tokens).
+        Darf negativ werden – dann warten die nächsten Calls entsprechend länger.
+        """
+        with self._lock:
+            self._refill()
+            self.available = min(self.capacity, self.available - delta)
+
+
+class AdaptiveLimiter:
+    """
+    Kombiniert RPM/TPM-Buckets mit einem AIMD-gesteuerten Concurrency-Limit.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.decrease_factor = decrease_factor
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, estimated_tokens: int) -> None:
+        with self._cond:
+            while True:
+                pause = self._blocked_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(timeout=pause)
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    break
+                self._cond.wait(timeout=1.0)
+
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens:
+            self.tokens.consume(estimated_tokens)
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, estimated_tokens: int):
+        self.acquire(estimated_tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        """
+        Additive increase: +1 Slot, nachdem ~`limit` Requests in Folge geklappt haben.
+        """
+        if self.tokens and actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+        with self._cond:
+            if self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+
+    def on_overload(self, retry_after: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease bei 429/5xx; Retry-After pausiert alle neuen Requests.
+        """
+        with self._cond:
+            old = self.limit
+            self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            logger.warning(
+                f"[llm_ratelimit] Overload: concurrency {old:.1f} -> {self.limit:.1f}"
+                + (f", pausing {retry_after:.1f}s" if retry_after else "")
+            )
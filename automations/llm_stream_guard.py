@@ -0,0 +1,148 @@
+# automations/llm_stream_guard.py
+"""
+Streaming-Validierung für Long-Form-Generierung: bricht einen Stream ab,
+sobald klar ist, dass der Output verworfen würde – statt auf das Ende einer
+Completion mit tausenden nutzlosen Tokens zu warten.
+
+Regeln (jeweils per ENV abschaltbar mit 0):
+- keine Markdown-Überschrift innerhalb der ersten N Tokens
+- Wiederholungsschleife: dieselbe Wort-N-Gramm-Folge taucht innerhalb der
+  letzten STREAM_GUARD_NGRAM_WINDOW Wörter zu oft auf (Code-Blöcke zählen
+  nicht mit, dort sind Wiederholungen normal). Eine Floskel, die in mehreren
+  Abschnitten eines langen Artikels vorkommt, ist keine Schleife.
+- harte Token-Obergrenze; die gibt der Aufrufer pro Prompt vor (die Ziel-
+  Länge steht im Prompt), STREAM_GUARD_MAX_TOKENS ist nur der Fallback
+
+    guard = StreamGuard(max_tokens=2400)
+    for chunk in stream:
+        guard.feed(chunk)   # wirft StreamAborted
+"""
+import os
+import re
+from collections import Counter, deque
+from typing import Optional
+
+from llm_tokens import CHARS_PER_TOKEN
+
+STREAM_GUARD_ENABLED = os.getenv("STREAM_GUARD_ENABLED", "true").lower() == "true"
+# Ohne "#"-Überschrift nach so vielen Tokens: Abbruch
+STREAM_GUARD_HEADING_WITHIN = int(os.getenv("STREAM_GUARD_HEADING_WITHIN", "300"))
+# Wort-N-Gramm-Länge und wie oft dasselbe N-Gramm vorkommen darf
+STREAM_GUARD_NGRAM = int(os.getenv("STREAM_GUARD_NGRAM", "8"))
+STREAM_GUARD_NGRAM_MAX_REPEATS = int(os.getenv("STREAM_GUARD_NGRAM_MAX_REPEATS", "4"))
+# ... gezählt über die letzten N Wörter Fließtext (0 = ganzer Stream)
+STREAM_GUARD_NGRAM_WINDOW = int(os.getenv("STREAM_GUARD_NGRAM_WINDOW", "600"))
+# Obergrenze, wenn der Aufrufer keine eigene angibt
+STREAM_GUARD_MAX_TOKENS = int(os.getenv("STREAM_GUARD_MAX_TOKENS", "4000"))
+# Neue Versuche nach einem Abbruch, bevor der Fallback (bzw. Fehler) greift
+STREAM_GUARD_RETRIES = int(os.getenv("STREAM_GUARD_RETRIES", "1"))
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+\S", re.MULTILINE)
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_WORD_RE = re.compile(r"\w+")
+# Endlos-Absätze ohne Zeilenumbruch werden ab dieser Länge schon vorab geprüft
+_LONG_LINE_CHARS = 400
+
+
+class StreamAborted(RuntimeError):
+    """
+    Wird geworfen, wenn ein Stream gegen eine Regel verstößt. `reason` ist
+    kurz und maschinenlesbar (no_heading, repetition, max_tokens).
+    """
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"Stream aborted ({reason}){': ' + detail if detail else ''}")
+        self.reason = reason
+
+
+class StreamGuard:
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        heading_within: Optional[int] = None,
+        ngram: Optional[int] = None,
+        ngram_max_repeats: Optional[int] = None,
+        ngram_window: Optional[int] = None,
+    ):
+        self.max_tokens = STREAM_GUARD_MAX_TOKENS if max_tokens is None else max_tokens
+        self.heading_within = STREAM_GUARD_HEADING_WITHIN if heading_within is None else heading_within
+        self.ngram = STREAM_GUARD_NGRAM if ngram is None else ngram
+        self.ngram_max_repeats = (
+            STREAM_GUARD_NGRAM_MAX_REPEATS if ngram_max_repeats is None else ngram_max_repeats
+        )
+        self.ngram_window = STREAM_GUARD_NGRAM_WINDOW if ngram_window is None else ngram_window
+        self.chars = 0
+        self.has_heading = False
+        self._pending = ""          # angefangene Zeile
+        self._in_code = False
+        self._words: list = []      # letzte ngram-1 Wörter (Fließtext)
+        self._ngrams: Counter = Counter()   # N-Gramme im Fenster
+        self._window: deque = deque()       # dieselben in Reihenfolge, zum Vergessen
+
+    @property
+    def tokens(self) -> int:
+        return self.chars // CHARS_PER_TOKEN
+
+    def feed(self, chunk: str) -> None:
+        """
+        Nimmt den nächsten Chunk auf und wirft StreamAborted bei einem Regelverstoß.
+        """
+        self.chars += len(chunk)
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._line(line)
+        if len(self._pending) > _LONG_LINE_CHARS and not self._in_code and not _FENCE_RE.match(self._pending):
+            cut = self._pending.rfind(" ")
+            if cut > 0:
+                if _HEADING_RE.match(self._pending):
+                    self.has_heading = True
+                self._count_words(self._pending[:cut])
+                self._pending = self._pending[cut:]
+
+        if self.max_tokens and self.tokens > self.max_tokens:
+            raise StreamAborted("max_tokens", f"more than {self.max_tokens} tokens")
+        if (
+            self.heading_within
+            and not self.has_heading
+            and self.tokens > self.heading_within
+            and not _HEADING_RE.match(self._pending)
+        ):
+            raise StreamAborted("no_heading", f"no heading within {self.heading_within} tokens")
+
+    def _line(self, line: str) -> None:
+        if _FENCE_RE.match(line):
+            self._in_code = not self._in_code
+            return
+        if self._in_code:
+            return
+        if _HEADING_RE.match(line):
+            self.has_heading = True
+        self._count_words(line)
+
+    def _count_words(self, text: str) -> None:
+        if not self.ngram or not self.ngram_max_repeats:
+            return
+        words = self._words + _WORD_RE.findall(text.lower())
+        for i in range(len(words) - self.ngram + 1):
+            gram = tuple(words[i:i + self.ngram])
+            self._ngrams[gram] += 1
+            if self.ngram_window:
+                self._window.append(gram)
+                if len(self._window) > self.ngram_window:
+                    old = self._window.popleft()
+                    self._ngrams[old] -= 1
+                    if not self._ngrams[old]:
+                        del self._ngrams[old]
+            if self._ngrams[gram] > self.ngram_max_repeats:
+                raise StreamAborted("repetition", f"'{' '.join(gram)}' repeated {self._ngrams[gram]}x")
+        self._words = words[-(self.ngram - 1):] if self.ngram > 1 else []
+
+
+def new_guard(**overrides) -> Optional[StreamGuard]:
+    """
+    StreamGuard mit ENV-Defaults, oder None wenn STREAM_GUARD_ENABLED=false.
+    """
+    if not STREAM_GUARD_ENABLED:
+        return None
+    return StreamGuard(**overrides)
@@ -0,0 +1,219 @@
+# automations/llm_tokens.py
+"""
+Grobe Token-Schätzung ohne Tokenizer-Abhängigkeit, plus Budget-Kürzung von
+Artikeln vor Scoring/Review.
+
+Für englischen Text/Markdown liegt ~4 Zeichen pro Token nah genug an den
+OpenAI-Tokenizern, um Budgets und Rate Limits zu planen.
+"""
+import os
+import re
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Schätzt die Token-Anzahl eines Textes.
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Schätzt die Input-Tokens einer Chat-Messages-Liste (inkl. ~4 Tokens
+    Overhead pro Message für Rolle/Trenner).
+    """
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+
+
+# ---- Article Budget / Trimming ----
+
+# Maximale Artikel-Tokens pro Call-Typ (nur der Artikel, nicht der ganze Prompt)
+ARTICLE_TOKEN_BUDGETS = {
+    "score": int(os.getenv("LLM_BUDGET_SCORE_TOKENS", "3000")),
+    "snippets": int(os.getenv("LLM_BUDGET_SNIPPETS_TOKENS", "1500")),
+    "review": int(os.getenv("LLM_BUDGET_REVIEW_TOKENS", "3000")),
+    "qa_review": int(os.getenv("LLM_BUDGET_QA_REVIEW_TOKENS", "2500")),
+}
+
+# Gesamtbudget (alle Artikel) eines Multi-Artikel-Score-Calls
+SCORE_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BUDGET_SCORE_BATCH_TOKENS", "12000"))
+
+# Code-Blöcke mit mehr Zeilen werden zu einem Platzhalter zusammengefasst
+CODE_BLOCK_MAX_LINES = int(os.getenv("LLM_TRIM_CODE_BLOCK_MAX_LINES", "8"))
+# Behaltene Absatzzeilen werden beim Kürzen auf diese Länge gekappt
+TRIM_LINE_MAX_CHARS = int(os.getenv("LLM_TRIM_LINE_MAX_CHARS", "400"))
+
+_FENCE_RE = re.compile(r"^(```|~~~)")
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+
+def _collapse_code_blocks(md: str, max_lines: int) -> str:
+    out: List[str] = []
+    block: List[str] = []
+    in_block = False
+    for line in md.splitlines():
+        if _FENCE_RE.match(line.strip()):
+            if not in_block:
+                in_block = True
+                out.append(line)
+                block = []
+                continue
+            in_block = False
+            if len(block) > max_lines:
+                out.append(f"# ... {len(block)} lines of code omitted ...")
+            else:
+                out.extend(block)
+            out.append(line)
+            continue
+        if in_block:
+            block.append(line)
+        else:
+            out.append(line)
+    if in_block:
+        # Nicht geschlossener Block: wie oben behandeln
+        out.extend(block if len(block) <= max_lines else [f"# ... {len(block)} lines of code omitted ..."])
+    return "\n".join(out)
+
+
+def _keep_section_heads(md: str, lines_per_section: int) -> str:
+    """
+    Behält Überschriften, das Intro (alles vor der ersten H2) und die ersten
+    `lines_per_section` nicht-leeren Zeilen jedes Abschnitts. Ein Code-Block
+    zählt als eine Zeile und wird nur komplett behalten oder verworfen.
+    """
+    out: List[str] = []
+    seen_h2 = False
+    kept_in_section = 0
+    skipped = False
+    in_block = False
+    keep_block = False
+
+    for line in md.splitlines():
+        stripped = line.strip()
+
+        if in_block:
+            if keep_block:
+                out.append(line)
+            if _FENCE_RE.match(stripped):
+                in_block = False
+            continue
+
+        if _HEADING_RE.match(stripped):
+            if stripped.startswith("## "):
+                seen_h2 = True
+            if skipped:
+                out.append("[…]")
+                out.append("")
+            out.append(line)
+            kept_in_section = 0
+            skipped = False
+            continue
+
+        keep = not seen_h2 or not stripped or kept_in_section < lines_per_section
+        if seen_h2 and stripped:
+            if keep:
+                kept_in_section += 1
+            else:
+                skipped = True
+
+        if _FENCE_RE.match(stripped):
+            in_block = True
+            keep_block = keep
+
+        if keep:
+            if not stripped and out and not out[-1].strip():
+                continue  # Leerzeilen-Kaskaden zusammenfassen
+            if seen_h2 and len(line) > TRIM_LINE_MAX_CHARS and not in_block:
+                line = line[:TRIM_LINE_MAX_CHARS].rstrip() + " …"
+            out.append(line)
+
+    if skipped:
+        out.append("[…]")
+    return "\n".join(out)
+
+
+def trim_article(article_md: str, max_tokens: int) -> Tuple[str, Dict[str, int]]:
+    """
+    Kürzt einen Markdown-Artikel auf ca. `max_tokens`, möglichst strukturerhaltend:
+
+    1. lange Code-Blöcke -> Platzhalter
+    2. pro Abschnitt nur die ersten 6/3/1 Zeilen (Überschriften + Intro bleiben)
+    3. notfalls harter Schnitt am Ende
+
+    Rückgabe: (gekürzter Artikel, {"original_tokens", "trimmed_tokens", "saved_tokens"})
+    """
+    original = estimate_tokens(article_md)
+    text = article_md
+
+    if original > max_tokens:
+        text = _collapse_code_blocks(text, CODE_BLOCK_MAX_LINES)
+
+    if estimate_tokens(text) > max_tokens:
+        collapsed = text
+        for lines_per_section in (6, 3, 1):
+            text = _keep_section_heads(collapsed, lines_per_section)
+            if estimate_tokens(text) <= max_tokens:
+                break
+
+    if estimate_tokens(text) > max_tokens:
+        text = text[: max_tokens * CHARS_PER_TOKEN].rstrip() + "\n\n[… truncated …]"
+
+    trimmed = estimate_tokens(text)
+    return text, {
+        "original_tokens": original,
+        "trimmed_tokens": trimmed,
+        "saved_tokens": max(0, original - trimmed),
+    }
+
+
+def fit_article(article_md: str, call_type: str) -> str:
+    """
+    Wendet das Budget für `call_type` an (siehe ARTICLE_TOKEN_BUDGETS) und
+    loggt, wie viele Tokens die Kürzung gespart hat.
+    """
+    budget = ARTICLE_TOKEN_BUDGETS.get(call_type)
+    if not budget:
+        return article_md
+
+    text, report = trim_article(article_md, budget)
+    if report["saved_tokens"]:
+        logger.info(
+            f"[llm_tokens] Trimmed article for {call_type}: "
+            f"{report['original_tokens']} -> {report['trimmed_tokens']} tokens "
+            f"(saved {report['saved_tokens']})"
+        )
+    return text
+
+
+# ---- Packing ----
+
+def pack_by_token_budget(
+    sizes: List[Tuple[str, int]],
+    budget_tokens: int,
+    max_items: int,
+) -> List[List[str]]:
+    """
+    Packt (id, tokens)-Paare der Reihe nach in Gruppen von höchstens
+    `budget_tokens` Tokens und `max_items` IDs. Ein einzelner Eintrag über
+    dem Budget bildet eine eigene Gruppe.
+    """
+    packs: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for item_id, tokens in sizes:
+        if current and (used + tokens > budget_tokens or len(current) >= max_items):
+            packs.append(current)
+            current, used = [], 0
+        current.append(item_id)
+        used += tokens
+    if current:
+        packs.append(current)
+    return packs
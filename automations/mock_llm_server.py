@@ -0,0 +1,553 @@
+# automations/mock_llm_server.py
+"""
+Lokaler Stand-in für die LLM-Backends – für Lasttests ohne API-Kosten.
+
+Endpoints:
+- GET  /api/tags              (Ollama Health-Probe)
+- POST /api/generate          (Ollama, mit/ohne NDJSON-Streaming)
+- POST /v1/chat/completions   (OpenAI, mit/ohne SSE-Streaming, inkl. usage und
+                               simuliertem Prompt-Prefix-Cache)
+
+Antworten sind Canned Outputs: Markdown-Artikel für Generate-Calls, JSON für
+Score (auch mehrere Artikel pro Call)/Snippets/Review/Outline und einzelne Sections für den Outline-then-
+sections-Modus (erkannt am Prompt). Eigene Fixtures über
+MOCK_LLM_FIXTURES_DIR (article.md, score.json, snippets.json, review.json);
+in article.md werden {title} und {question_id} ersetzt.
+
+Konfiguration (ENV):
+    MOCK_LLM_LATENCY_DIST   fixed | uniform | lognormal   (Default: lognormal)
+    MOCK_LLM_LATENCY_MS     Median der Zeit bis zum ersten Token (Default: 300)
+    MOCK_LLM_LATENCY_SPREAD Sigma (lognormal) bzw. ±Anteil (uniform) (Default: 0.5)
+    MOCK_LLM_TOKENS_PER_S   Generierungsgeschwindigkeit, 0 = sofort (Default: 0)
+    MOCK_LLM_ERROR_RATE     Anteil fehlerhafter Antworten 0..1 (Default: 0)
+    MOCK_LLM_ERROR_STATUS   HTTP-Status der Fehler, z.B. 503 oder 429 (Default: 503)
+    MOCK_LLM_MAX_PARALLEL   gleichzeitige /api/generate-Calls wie auf einer GPU,
+                            weitere warten in der Queue; 0 = unbegrenzt (Default: 0)
+    MOCK_LLM_LOAD_MS        Modell-Ladezeit bei Cold Start, inkl. keep_alive-Ablauf
+                            wie bei Ollama (Default: 0 = immer geladen)
+    MOCK_LLM_KEEP_ALIVE_S   keep_alive, wenn der Request keins mitschickt (Default: 300)
+
+Starten:
+
+    python automations/mock_llm_server.py [--port 11435]
+
+    export LOCAL_LLM_URL=http://127.0.0.1:11435/api/generate
+    export OPENAI_BASE_URL=http://127.0.0.1:11435/v1
+    export OPENAI_API_KEY=mock
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MOCK_LLM_HOST = os.getenv("MOCK_LLM_HOST", "127.0.0.1")
+MOCK_LLM_PORT = int(os.getenv("MOCK_LLM_PORT", "11435"))
+
+
+def load_config() -> Dict[str, Any]:
+    """
+    Server-Konfiguration aus der Umgebung (siehe Modul-Docstring).
+    """
+    fixtures_dir = os.getenv("MOCK_LLM_FIXTURES_DIR")
+    return {
+        "latency_dist": os.getenv("MOCK_LLM_LATENCY_DIST", "lognormal"),
+        "latency_ms": float(os.getenv("MOCK_LLM_LATENCY_MS", "300")),
+        "latency_spread": float(os.getenv("MOCK_LLM_LATENCY_SPREAD", "0.5")),
+        "tokens_per_s": float(os.getenv("MOCK_LLM_TOKENS_PER_S", "0")),
+        "error_rate": float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+        "error_status": int(os.getenv("MOCK_LLM_ERROR_STATUS", "503")),
+        "max_parallel": int(os.getenv("MOCK_LLM_MAX_PARALLEL", "0")),
+        "load_ms": float(os.getenv("MOCK_LLM_LOAD_MS", "0")),
+        "keep_alive_s": float(os.getenv("MOCK_LLM_KEEP_ALIVE_S", "300")),
+        "fixtures_dir": Path(fixtures_dir) if fixtures_dir else None,
+    }
+
+
+# ---- Canned Outputs ----
+
+DEFAULT_ARTICLE = """# {title}
+
+This article walks through the problem behind question {question_id} and a
+practical way to solve it in a production backend.
+
+## Why this happens
+
+Most of the time the root cause is a mismatch between what the framework
+expects and what the application actually passes in. The symptoms only show
+up under load, which makes them easy to miss in local testing.
+
+## Step-by-step solution
+
+1. Reproduce the issue with a minimal example.
+2. Make the expected input explicit.
+3. Add a regression test before changing the code.
+
+```python
+def handler(payload: dict) -> dict:
+    value = payload.get("value")
+    if value is None:
+        raise ValueError("value is required")
+    return {"value": value}
+```
+
+## Common pitfalls
+
+- Silently swallowing exceptions in background tasks.
+- Relying on implicit defaults that differ between environments.
+
+## Best practices
+
+- Validate input at the boundary.
+- Log enough context to reproduce failures.
+
+## Conclusion
+
+With explicit inputs and a regression test, the issue stays fixed.
+"""
+
+DEFAULT_SNIPPETS = [
+    {"platform": "twitter", "text": "A practical fix for a common backend pitfall. #python"},
+    {"platform": "twitter", "text": "Validate at the boundary, log with context, test first. #backend"},
+    {"platform": "linkedin", "text": "A short walkthrough of a recurring backend issue and how to fix it for good."},
+    {"platform": "devto", "text": "Step-by-step fix for a common backend issue."},
+    {"platform": "medium", "text": "Why this bug shows up under load and how to prevent it."},
+    {"platform": "substack", "text": "This week: a practical fix you can apply today. Subscribe for more."},
+]
+
+_QUESTION_ID_RE = re.compile(r"Question ID:\s*(\S+)")
+_QUESTION_RE = re.compile(r"Question:\s*\n(.+)")
+_SECTION_RE = re.compile(r"Section to write:\s*\n## (.+)")
+_ARTICLE_ID_RE = re.compile(r"^Article id:\s*(\S+)", re.MULTILINE)
+
+
+def _article_sections(article: str) -> Dict[str, str]:
+    """
+    H2-Heading -> Section-Markdown (inkl. Heading) aus einem Canned-Artikel.
+    """
+    sections = {}
+    for block in re.split(r"\n(?=## )", article):
+        if block.startswith("## "):
+            sections[block.splitlines()[0][3:].strip()] = block.strip()
+    return sections
+
+
+def _outline(article: str, title: str) -> Dict[str, Any]:
+    intro = article.split("\n## ", 1)[0].split("\n", 1)[-1].strip()
+    return {
+        "title": title,
+        "intro": intro,
+        "sections": [
+            {"heading": heading, "points": [f"Explain {heading.lower()}"]}
+            for heading in _article_sections(article)
+        ],
+    }
+
+
+def _fixture(config: Dict[str, Any], name: str) -> Optional[str]:
+    fixtures_dir = config.get("fixtures_dir")
+    if fixtures_dir and (fixtures_dir / name).exists():
+        return (fixtures_dir / name).read_text(encoding="utf-8")
+    return None
+
+
+def _score(rng: random.Random) -> Dict[str, Any]:
+    dims = {name: rng.randint(4, 10) for name in ("quality", "depth", "seo", "monetization")}
+    dims["overall_score"] = round(
+        dims["quality"] * 0.3 + dims["depth"] * 0.3 + dims["seo"] * 0.2 + dims["monetization"] * 0.2, 2
+    )
+    return dims
+
+
+def canned_response(prompt: str, config: Dict[str, Any]) -> str:
+    """
+    Wählt die Antwort anhand des Prompts. Scores sind pro Prompt deterministisch,
+    damit Wiederholungen (Retries, Re-Runs) dasselbe Ergebnis liefern.
+    """
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    if "Malformed JSON:" in prompt:
+        # json_fix-Call: "reparierte" Antwort = Default statt (kaputter) Fixture
+        config = dict(config, fixtures_dir=None)
+    wants_score = '"overall_score"' in prompt
+    wants_items = '"items"' in prompt
+    wants_outline = '"sections"' in prompt
+    section_match = _SECTION_RE.search(prompt)
+
+    if wants_score and wants_items:
+        raw = _fixture(config, "review.json")
+        return raw or json.dumps({"score": _score(rng), "items": DEFAULT_SNIPPETS})
+    if wants_score and _ARTICLE_ID_RE.search(prompt):
+        # Multi-Artikel-Scoring: Map id -> Score
+        return json.dumps({article_id: _score(rng) for article_id in _ARTICLE_ID_RE.findall(prompt)})
+    if wants_score:
+        return _fixture(config, "score.json") or json.dumps(_score(rng))
+    if wants_items:
+        return _fixture(config, "snippets.json") or json.dumps({"items": DEFAULT_SNIPPETS})
+
+    qid_match = _QUESTION_ID_RE.search(prompt)
+    question_match = _QUESTION_RE.search(prompt)
+    question_id = qid_match.group(1) if qid_match else "unknown"
+    title = question_match.group(1).strip() if question_match else "A practical backend fix"
+    template = _fixture(config, "article.md") or DEFAULT_ARTICLE
+    article = template.replace("{title}", title).replace("{question_id}", question_id)
+
+    # Outline-then-sections: Gliederung bzw. einzelne Section aus dem Canned-Artikel
+    if section_match:
+        heading = section_match.group(1).strip()
+        return _article_sections(article).get(heading, f"## {heading}\n\nNo details for this section.")
+    if wants_outline:
+        return json.dumps(_outline(article, title))
+    return article
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# Prompt-Prefix-Cache wie bei OpenAI: ab 1024 Tokens, in 128-Token-Schritten
+_PREFIX_BLOCK_CHARS = 128 * 4
+_PREFIX_MIN_TOKENS = 1024
+
+
+class PrefixCache:
+    """
+    Merkt sich Prompt-Prefixe blockweise und liefert, wie viele Prompt-Tokens
+    ein neuer Prompt aus dem "Cache" lesen würde (usage.prompt_tokens_details).
+    """
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, prompt: str) -> int:
+        blocks = len(prompt) // _PREFIX_BLOCK_CHARS
+        hashes = [
+            hashlib.sha256(prompt[: (i + 1) * _PREFIX_BLOCK_CHARS].encode("utf-8")).hexdigest()
+            for i in range(blocks)
+        ]
+        with self._lock:
+            hit_blocks = 0
+            for h in hashes:
+                if h not in self._seen:
+                    break
+                hit_blocks += 1
+            self._seen.update(hashes)
+        cached = hit_blocks * 128
+        return cached if cached >= _PREFIX_MIN_TOKENS else 0
+
+
+_DURATION_RE = re.compile(r"^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def _keep_alive_seconds(value: Any, default: float) -> float:
+    """
+    Ollama-keep_alive ("30m", "2h", 300, -1) -> Sekunden; negativ = unbegrenzt.
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = _DURATION_RE.match(str(value).strip())
+        if not match:
+            return default
+        seconds = float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class ModelCache:
+    """
+    Geladene Modelle mit Ablaufzeit wie bei Ollama: nach keep_alive ohne
+    Request wird entladen, der nächste Call zahlt MOCK_LLM_LOAD_MS.
+    Geladen wird unter Lock – parallele Calls warten auf denselben Load.
+    """
+
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, model: str, load_s: float, keep_alive_s: float) -> float:
+        """
+        Lädt das Modell falls nötig und verlängert keep_alive; Rückgabe: Ladezeit.
+        """
+        with self._lock:
+            waited = 0.0
+            if self._expires.get(model, 0.0) <= time.monotonic() and load_s > 0:
+                time.sleep(load_s)
+                waited = load_s
+            self._expires[model] = time.monotonic() + keep_alive_s
+            return waited
+
+
+def _chunks(text: str) -> List[str]:
+    """
+    Zerlegt den Text in wortweise Chunks (inkl. Whitespace), wie ein Token-Stream.
+    """
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+# ---- HTTP Handler ----
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.server.mock_config
+
+    def log_message(self, fmt, *args):  # noqa: N802 – Access-Log nur auf debug
+        logger.debug(f"[mock_llm] {fmt % args}")
+
+    def _sample_latency(self) -> float:
+        cfg = self.config
+        median = cfg["latency_ms"] / 1000.0
+        spread = cfg["latency_spread"]
+        if cfg["latency_dist"] == "fixed" or median <= 0:
+            return max(0.0, median)
+        if cfg["latency_dist"] == "uniform":
+            return max(0.0, random.uniform(median * (1 - spread), median * (1 + spread)))
+        return random.lognormvariate(0, spread) * median
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _maybe_fail(self) -> bool:
+        cfg = self.config
+        if cfg["error_rate"] <= 0 or random.random() >= cfg["error_rate"]:
+            return False
+        status = cfg["error_status"]
+        headers = {"retry-after": "1"} if status == 429 else None
+        self._send_json(status, {"error": {"message": f"mock error {status}", "type": "mock_error"}}, headers)
+        return True
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"{}")
+
+    def _token_delay(self) -> float:
+        tps = self.config["tokens_per_s"]
+        return 1.0 / tps if tps > 0 else 0.0
+
+    def do_GET(self):  # noqa: N802
+        if self.path.startswith("/api/tags"):
+            self._send_json(200, {"models": [{"name": "mock"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):  # noqa: N802
+        try:
+            body = self._read_body()
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        if self.path.startswith("/api/generate") and self.server.generate_slots:
+            # Begrenzte "GPU": Generate-Calls laufen nur in max_parallel Slots
+            with self.server.generate_slots:
+                self._dispatch(body)
+        else:
+            self._dispatch(body)
+
+    def _dispatch(self, body: Dict[str, Any]) -> None:
+        time.sleep(self._sample_latency())
+        if self._maybe_fail():
+            return
+
+        if self.path.startswith("/api/generate"):
+            self._handle_generate(body)
+        elif self.path.startswith("/v1/chat/completions"):
+            self._handle_chat(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _handle_generate(self, body: Dict[str, Any]) -> None:
+        cfg = self.config
+        load_s = self.server.model_cache.touch(
+            body.get("model") or "mock",
+            cfg["load_ms"] / 1000.0,
+            _keep_alive_seconds(body.get("keep_alive"), cfg["keep_alive_s"]),
+        )
+        load_duration = int(load_s * 1e9)
+        prompt = body.get("prompt") or ""
+        if not prompt:
+            # Ollama: leerer Prompt lädt nur das Modell (Warm-up)
+            self._send_json(200, {
+                "model": body.get("model"),
+                "response": "",
+                "done": True,
+                "done_reason": "load",
+                "load_duration": load_duration,
+            })
+            return
+        text = canned_response(prompt, self.config)
+        prompt_tokens = _estimate_tokens(prompt)
+        delay = self._token_delay()
+
+        if not body.get("stream"):
+            time.sleep(delay * _estimate_tokens(text))
+            self._send_json(200, {
+                "model": body.get("model"),
+                "response": text,
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": _estimate_tokens(text),
+                "load_duration": load_duration,
+            })
+            return
+
+        self._start_chunked("application/x-ndjson")
+        chunks = _chunks(text)
+        for chunk in chunks:
+            self._write_chunk((json.dumps({"response": chunk, "done": False}) + "\n").encode("utf-8"))
+            time.sleep(delay)
+        done = {
+            "response": "",
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(chunks),
+            "load_duration": load_duration,
+        }
+        self._write_chunk((json.dumps(done) + "\n").encode("utf-8"))
+        self._end_chunked()
+
+    def _handle_chat(self, body: Dict[str, Any]) -> None:
+        messages = body.get("messages") or []
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        text = canned_response(messages[-1].get("content", "") if messages else "", self.config)
+        usage = {
+            "prompt_tokens": _estimate_tokens(prompt),
+            "completion_tokens": _estimate_tokens(text),
+            "prompt_tokens_details": {"cached_tokens": self.server.prefix_cache.cached_tokens(prompt)},
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": f"chatcmpl-mock{random.getrandbits(32):08x}", "created": int(time.time()), "model": body.get("model")}
+        delay = self._token_delay()
+
+        if not body.get("stream"):
+            time.sleep(delay * usage["completion_tokens"])
+            self._send_json(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+            return
+
+        def _event(payload: Dict[str, Any]) -> None:
+            self._write_chunk(("data: " + json.dumps({**base, "object": "chat.completion.chunk", **payload}) + "\n\n").encode("utf-8"))
+
+        self._start_chunked("text/event-stream")
+        for chunk in _chunks(text):
+            _event({"choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+            time.sleep(delay)
+        _event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            _event({"choices": [], "usage": usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client hat die Verbindung gekappt (abgebrochener Stream, Prozessende) – kein Fehler
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockLLMServer:
+    """
+    Startet den Mock in einem Hintergrund-Thread (z.B. für Benchmarks).
+    port=0 wählt einen freien Port; base_url enthält den tatsächlichen.
+    """
+
+    def __init__(self, host: str = MOCK_LLM_HOST, port: int = 0, **overrides: Any):
+        config = load_config()
+        config.update(overrides)
+        self.httpd = _MockHTTPServer((host, port), MockLLMHandler)
+        self.httpd.mock_config = config
+        self.httpd.prefix_cache = PrefixCache()
+        self.httpd.model_cache = ModelCache()
+        max_parallel = config.get("max_parallel") or 0
+        self.httpd.generate_slots = threading.Semaphore(max_parallel) if max_parallel > 0 else None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"[mock_llm] Listening on {self.base_url} ({self.httpd.mock_config['latency_dist']})")
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def env(self) -> Dict[str, str]:
+        """
+        ENV-Variablen, die llm_client auf diesen Server umbiegen.
+        """
+        return {
+            "LOCAL_LLM_URL": f"{self.base_url}/api/generate",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "OPENAI_API_KEY": "mock",
+        }
+
+
+def main(port: int = MOCK_LLM_PORT) -> None:
+    server = MockLLMServer(port=port)
+    logger.info(f"[mock_llm] Config: {server.httpd.mock_config}")
+    for key, value in server.env().items():
+        logger.info(f"[mock_llm]   export {key}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    port_arg = MOCK_LLM_PORT
+    if "--port" in sys.argv:
+        port_arg = int(sys.argv[sys.argv.index("--port") + 1])
+    main(port_arg)
@@ -0,0 +1,46 @@
+# automations/pack_categories.py
+"""
+Tag -> Pack-Kategorie. Eigenes Modul ohne Seiteneffekte beim Import, damit
+generation_scheduler (und damit bulk_generate / content_pipeline) es nutzen
+kann, ohne weekly_pack_builder samt dessen logging.basicConfig zu laden.
+"""
+from typing import List
+
+# Tag -> Pack-Kategorie
+PACK_CATEGORY_MAP = {
+    "python": "python-data",
+    "pandas": "python-data",
+    "dataframe": "python-data",
+
+    "fastapi": "fastapi-backend",
+    "api": "fastapi-backend",
+    "backend": "fastapi-backend",
+
+    "rag": "rag-ai",
+    "retrieval": "rag-ai",
+    "vector": "rag-ai",
+    "embedding": "rag-ai",
+
+    "devops": "cloud-devops",
+    "docker": "cloud-devops",
+    "kubernetes": "cloud-devops",
+    "ci": "cloud-devops",
+
+    "automation": "automation-tools",
+    "airflow": "automation-tools",
+    "prefect": "automation-tools",
+    "orchestration": "automation-tools",
+}
+
+
+def categorize_post(tags: List[str]) -> List[str]:
+    """
+    Mappt Tags (lowercase) auf Pack-Kategorien.
+    Ein Post kann in mehrere Kategorien fallen.
+    """
+    cats = set()
+    for t in tags or []:
+        key = str(t).lower()
+        if key in PACK_CATEGORY_MAP:
+            cats.add(PACK_CATEGORY_MAP[key])
+    return sorted(cats)
@@ -0,0 +1,401 @@
+# automations/prompts.py
+"""
+Zentrale Prompt-Registry.
+
+Jeder Prompt ist ein versioniertes Template aus drei Teilen:
+
+- system:       System-Prompt (statisch)
+- instructions: Aufgabe + Output-Format (statisch)
+- payload:      variable Daten (Frage, Metadaten, Artikel) – IMMER am Ende
+
+Die feste Reihenfolge trennt, was sich pro Version ändert (system +
+instructions), von den Daten. Bei Änderungen an instructions/system die
+Version hochzählen – sie landet im Telemetrie-Ledger (prompt_version), damit
+Qualität und Kosten pro Version vergleichbar sind.
+
+Provider-seitiges Prompt-Caching (OpenAI: ab 1024 identischen Prefix-Tokens)
+bringt das nicht: system + instructions sind je ca. 100–400 Tokens lang,
+cached_tokens im Ledger bleibt also ~0. Dafür müsste es einen gemeinsamen
+statischen Prefix >= 1024 Tokens für score/review/snippets geben, der jeden
+Call ohne Treffer verteuert.
+
+    from prompts import get_prompt
+    tpl = get_prompt("score")
+    user_prompt = tpl.render(question_meta=..., article_md=...)
+    _call_gpt(user_prompt, system_prompt=tpl.system, prompt_version=tpl.id)
+"""
+from typing import Dict, Optional
+
+
+class PromptTemplate:
+    def __init__(self, name: str, version: int, system: Optional[str], instructions: str, payload: str):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.instructions = instructions.strip()
+        self.payload = payload.strip()
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **fields) -> str:
+        """
+        User-Prompt: statische Instructions zuerst, dann der befüllte Payload.
+        """
+        return f"{self.instructions}\n\n{self.payload.format(**fields)}"
+
+
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    PROMPTS[template.name] = template
+    return template
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    try:
+        return PROMPTS[name]
+    except KeyError:
+        raise KeyError(f"Unknown prompt template: {name!r} (known: {sorted(PROMPTS)})") from None
+
+
+# ---- Bausteine ----
+
+_RATING_RUBRIC = """
+Rate the article from 0 to 10 for:
+
+1) quality         – Writing clarity, structure, correctness
+2) depth           – Depth of explanation and coverage of edge cases
+3) seo             – Searchability, keyword depth, long-tail potential
+4) monetization    – Suitability for monetizable packs, consulting, or affiliate links
+""".strip()
+
+_SNIPPET_SPEC = """
+- 2 concise X/Twitter posts (max 260 characters each, with 1–2 relevant hashtags, no emojis)
+- 1 LinkedIn post (3–6 sentences, with value + light CTA, no hashtag wall)
+- 1 short Dev.to description (1–2 sentences, teaser for the article)
+- 1 short Medium description (1–2 sentences, teaser)
+- 1 Substack teaser (2–4 sentences, subtle newsletter CTA)
+""".strip()
+
+_SNIPPET_ITEMS_JSON = """
+  "items": [
+    { "platform": "twitter",  "text": "..." },
+    { "platform": "twitter",  "text": "..." },
+    { "platform": "linkedin", "text": "..." },
+    { "platform": "devto",    "text": "..." },
+    { "platform": "medium",   "text": "..." },
+    { "platform": "substack", "text": "..." }
+  ]
+""".strip("\n")
+
+_ARTICLE_PAYLOAD = '''
+Question metadata (JSON):
+{question_meta}
+
+Article (Markdown):
+"""markdown
+{article_md}
+"""
+'''
+
+
+# ---- llm_client ----
+
+register(PromptTemplate(
+    name="article",
+    version=2,
+    system="You are a senior backend engineer and technical writer.",
+    instructions="""
+You are a senior backend engineer writing a deep, practical blog post.
+
+Write a long-form technical article in Markdown about the question below, with:
+
+- Clear H1 title
+- Short intro (2–3 sentences)
+- 3–6 main sections with H2/H3
+- Code examples where useful
+- Section "Common pitfalls"
+- Section "Best practices"
+- Short conclusion
+
+Language: English.
+Target audience: intermediate backend developers.
+Do NOT mention that you are an AI or that this is auto-generated.
+""",
+    payload="""
+Question ID: {question_id}
+Question:
+{question_text}
+""",
+))
+
+register(PromptTemplate(
+    name="score",
+    version=2,
+    system="You are an expert technical editor and SEO strategist for developer content.",
+    instructions=f"""
+You receive a technical blog article in Markdown and metadata about the underlying user question
+(both at the end of this message).
+
+{_RATING_RUBRIC}
+
+Return STRICTLY a single JSON object with this structure and nothing else:
+
+{{
+  "quality": <int>,
+  "depth": <int>,
+  "seo": <int>,
+  "monetization": <int>,
+  "overall_score": <float>
+}}
+""",
+    payload=_ARTICLE_PAYLOAD,
+))
+
+# Mehrere Artikel in einem Call: Rubrik + System-Prompt werden nur einmal bezahlt
+register(PromptTemplate(
+    name="score_batch",
+    version=1,
+    system="You are an expert technical editor and SEO strategist for developer content.",
+    instructions=f"""
+You receive several technical blog articles in Markdown, each with an article id and metadata about
+the underlying user question (all at the end of this message). Rate EACH article independently.
+
+{_RATING_RUBRIC}
+
+Return STRICTLY a single JSON object that maps every article id to its rating, and nothing else:
+
+{{
+  "<article id>": {{
+    "quality": <int>,
+    "depth": <int>,
+    "seo": <int>,
+    "monetization": <int>,
+    "overall_score": <float>
+  }}
+}}
+
+Include every article id exactly once.
+""",
+    payload="""
+{articles}
+""",
+))
+
+# Ein Artikel-Block im Payload von score_batch
+SCORE_BATCH_ARTICLE = '''
+Article id: {article_id}
+Question metadata (JSON):
+{question_meta}
+
+Article (Markdown):
+"""markdown
+{article_md}
+"""
+'''.strip()
+
+register(PromptTemplate(
+    name="snippets",
+    version=2,
+    system="You are a growth-focused content marketer for developer tools.",
+    instructions=f"""
+Create social media snippets for the technical article at the end of this message.
+
+Generate:
+
+{_SNIPPET_SPEC}
+
+Return STRICTLY a JSON object with this structure and nothing else:
+
+{{
+{_SNIPPET_ITEMS_JSON}
+}}
+""",
+    payload=_ARTICLE_PAYLOAD,
+))
+
+register(PromptTemplate(
+    name="review",
+    version=2,
+    system=(
+        "You are an expert technical editor and SEO strategist for developer content, "
+        "and a growth-focused content marketer for developer tools."
+    ),
+    instructions=f"""
+You receive a technical blog article in Markdown and metadata about the underlying user question
+(both at the end of this message). Do two things: rate the article and create social media
+snippets for it.
+
+Task 1 – {_RATING_RUBRIC}
+
+Task 2 – Generate:
+
+{_SNIPPET_SPEC}
+
+Return STRICTLY a single JSON object with this structure and nothing else:
+
+{{
+  "score": {{
+    "quality": <int>,
+    "depth": <int>,
+    "seo": <int>,
+    "monetization": <int>,
+    "overall_score": <float>
+  }},
+{_SNIPPET_ITEMS_JSON}
+}}
+""",
+    payload=_ARTICLE_PAYLOAD,
+))
+
+
+# Outline-then-sections (ARTICLE_GENERATION_MODE=sections): erst die Gliederung
+# als JSON, dann jede Section parallel mit der Gliederung als gemeinsamem Kontext
+register(PromptTemplate(
+    name="outline",
+    version=1,
+    system="You are a senior backend engineer and technical writer.",
+    instructions="""
+You are planning a deep, practical blog post for intermediate backend developers about the
+question at the end of this message. Do NOT write the article yet – only its outline.
+
+The outline must contain:
+
+- A clear title (becomes the H1)
+- A short intro (2–3 sentences, final wording)
+- 3–6 main sections, followed by the sections "Common pitfalls", "Best practices" and "Conclusion"
+- For every section: the H2 heading and 2–4 bullet points of what it must cover
+  (mention where a code example belongs)
+
+Language: English.
+
+Return STRICTLY a single JSON object with this structure and nothing else:
+
+{
+  "title": "...",
+  "intro": "...",
+  "sections": [
+    { "heading": "...", "points": ["...", "..."] }
+  ]
+}
+""",
+    payload="""
+Question ID: {question_id}
+Question:
+{question_text}
+""",
+))
+
+register(PromptTemplate(
+    name="section",
+    version=1,
+    system="You are a senior backend engineer and technical writer.",
+    instructions="""
+You are writing ONE section of a longer technical article for intermediate backend developers.
+The question, the full outline and the section you must write follow at the end of this message.
+
+- Start with the section's H2 heading exactly as given ("## ...")
+- Cover the listed points; use H3 subsections and code examples where useful
+- Do NOT repeat the title, the intro or content that belongs to other sections
+- Do NOT add a summary of the whole article unless this section is the conclusion
+
+Language: English.
+Do NOT mention that you are an AI or that this is auto-generated.
+Return Markdown only.
+""",
+    payload="""
+Question:
+{question_text}
+
+Article outline:
+{outline_md}
+
+Section to write:
+{section_md}
+""",
+))
+
+
+# Billiger Reparatur-Call, wenn json_repair ein JSON-Mode-Ergebnis nicht retten kann
+register(PromptTemplate(
+    name="json_fix",
+    version=1,
+    system="You repair malformed JSON. You never add commentary.",
+    instructions="""
+The response at the end of this message was meant to be a single JSON object with the
+expected structure given there, but it is malformed (e.g. truncated, wrapped in prose,
+wrong quotes).
+
+Return STRICTLY the corrected JSON object in the expected structure and nothing else:
+- keep every key and value that is present
+- drop an incomplete trailing element instead of inventing content
+""",
+    payload="""
+Expected structure:
+{shape}
+
+Malformed JSON:
+{raw}
+""",
+))
+
+
+# ---- generate_content ----
+
+register(PromptTemplate(
+    name="tutorial",
+    version=2,
+    system=(
+        "You are a senior Python backend engineer and educator. "
+        "Create clear, practical micro-tutorials in Markdown."
+    ),
+    instructions="""
+I will give you a developer question (at the end of this message). Create a micro-tutorial that:
+
+1. Has an H1 title.
+2. Short intro focusing on the problem.
+3. Has sections: "Why this happens", "Step-by-step solution",
+   "Example variation", "Common errors & fixes", "Cheat sheet summary".
+4. Include at least one full code example.
+5. Keep it under 1200 words.
+
+Return Markdown only.
+""",
+    payload="""
+Question title:
+{title}
+
+Question body:
+{body}
+""",
+))
+
+
+# ---- auto_generate_blogposts ----
+
+register(PromptTemplate(
+    name="blogpost",
+    version=2,
+    system="Du bist Senior-Entwickler:in und schreibst klare, praxisnahe Tutorials.",
+    instructions="""
+Schreibe ein eigenständiges technisches Micro-Tutorial in Markdown für Entwickler:innen mit mittlerem Niveau.
+
+Sprache: Deutsch.
+Länge: ca. 600–900 Wörter.
+Struktur:
+- Eine einzige H1-Überschrift als Titel.
+- Problem erklären.
+- Konkrete Codebeispiele.
+- Kurze Zusammenfassung am Ende.
+Fokus: praxisnah, keine theoretische Vorlesung.
+
+Gib NUR den Artikel in Markdown aus, ohne weitere Erklärungen.
+Thema und Vorgaben folgen am Ende dieser Nachricht.
+""",
+    payload="""
+{guidance}
+""",
+))
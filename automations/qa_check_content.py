@@ -2,7 +2,7 @@
 import os
 import sys
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, List
 
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
@@ -14,6 +14,13 @@ from app.models.content import ContentItem
 
 from openai import OpenAI
 
+from content_heuristics import structural_issues
+from llm_cache import budgeted_completion
+from llm_batch import make_request, run_batch
+from llm_budget import BudgetExceeded, plan_call
+from llm_ledger import track, usage_fields
+from llm_tokens import fit_article
+
 init_db()
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
@@ -27,32 +34,17 @@ REPORT_PATH = os.path.join(ADMIN_CONTENT_DIR, "content-qa-report.md")
 
 
 def static_checks(item: ContentItem) -> List[str]:
-    issues: List[str] = []
-    title = (item.title or "").strip()
-    body = (item.body_md or "").strip()
-
-    if len(title) < 20:
-        issues.append("Title is very short (< 20 characters).")
-    if len(title) > 120:
-        issues.append("Title is quite long (> 120 characters).")
-    if len(body) < 300:
-        issues.append("Body seems very short (< 300 characters).")
-    if "```" not in body:
-        issues.append(
-            "No code block found (```), consider adding at least one code example."
-        )
-    if "# " not in body and "## " not in body:
-        issues.append(
-            "No headings found in body, consider structuring with # / ## headings."
-        )
-    return issues
+    return structural_issues(item.title, item.body_md)
 
 
-def llm_review(item: ContentItem) -> str:
-    if not client:
-        return "LLM review skipped (OPENAI_API_KEY not set)."
+QA_SYSTEM_PROMPT = "You provide concise, actionable editorial feedback."
+QA_TEMPERATURE = 0.4
+QA_MAX_TOKENS = 300
 
-    prompt = (
+
+def build_review_prompt(item: ContentItem) -> str:
+    body_md = fit_article(item.body_md or "", "qa_review")
+    return (
         "You are an editorial assistant for technical programming tutorials.\n\n"
         "Review the following micro-tutorial and list up to 5 specific improvement "
         "suggestions as bullet points (not paragraphs). Focus on clarity, structure, "
@@ -60,23 +52,81 @@ def llm_review(item: ContentItem) -> str:
         f"Title: {item.title}\n\n"
         "Markdown body:\n"
         "```markdown\n"
-        f"{item.body_md}\n"
+        f"{body_md}\n"
         "```markdown"
     )
 
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": "You provide concise, actionable editorial feedback.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=300,
-        temperature=0.4,
-    )
-    return resp.choices[0].message.content.strip()
+
+def llm_review(item: ContentItem) -> str:
+    if not client:
+        return "LLM review skipped (OPENAI_API_KEY not set)."
+
+    prompt = build_review_prompt(item)
+
+    def _plan(model: str, max_tokens: int):
+        return plan_call(model, prompt, max_tokens, system_prompt=QA_SYSTEM_PROMPT)
+
+    def _request(model: str, max_tokens: int) -> str:
+        with track("openai", model, call="qa_review") as rec:
+            resp = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": QA_SYSTEM_PROMPT,
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=max_tokens,
+                temperature=QA_TEMPERATURE,
+            )
+            rec.update(usage_fields(resp.usage))
+        return resp.choices[0].message.content.strip()
+
+    # Cache-Treffer kosten nichts -> Budget nur bei einem Miss prüfen
+    try:
+        return budgeted_completion(
+            _request,
+            _plan,
+            engine="openai",
+            model=OPENAI_MODEL,
+            prompt=prompt,
+            system_prompt=QA_SYSTEM_PROMPT,
+            temperature=QA_TEMPERATURE,
+            max_tokens=QA_MAX_TOKENS,
+        )
+    except BudgetExceeded as e:
+        return f"LLM review skipped ({e})."
+
+
+def llm_reviews_via_batch(items: List[ContentItem]) -> Dict[int, str]:
+    """
+    Offline-Batch-Modus: alle Reviews als ein Batch-Job -> {item.id: review_text}.
+    """
+    if not client:
+        return {}
+
+    requests = [
+        make_request(
+            str(item.id),
+            build_review_prompt(item),
+            system_prompt=QA_SYSTEM_PROMPT,
+            temperature=QA_TEMPERATURE,
+            max_tokens=QA_MAX_TOKENS,
+            model=OPENAI_MODEL,
+        )
+        for item in items
+    ]
+    contents = run_batch("qa_check_content", requests)
+
+    reviews: Dict[int, str] = {}
+    for item in items:
+        content = contents[str(item.id)]
+        if isinstance(content, Exception):
+            reviews[item.id] = f"LLM review failed: {content}"
+        else:
+            reviews[item.id] = content
+    return reviews
 
 
 def fetch_items() -> List[ContentItem]:
@@ -95,13 +145,20 @@ def ensure_admin_dir():
         os.makedirs(ADMIN_CONTENT_DIR, exist_ok=True)
 
 
-def run():
+def run(batch: bool = False):
     ensure_admin_dir()
     items = fetch_items()
     if not items:
         print("[qa_check_content] No published items found.")
         return
 
+    try:
+        batch_reviews = llm_reviews_via_batch(items) if batch else {}
+    except BudgetExceeded as e:
+        # Report trotzdem schreiben; Reviews werden einzeln übersprungen
+        print(f"[qa_check_content] Batch not submitted: {e}")
+        batch_reviews = {}
+
     lines: List[str] = []
     lines.append("+++")
     lines.append('title = "Content QA Report"')
@@ -132,7 +189,9 @@ def run():
             )
         lines.append("")
 
-        review_text = llm_review(item)
+        review_text = batch_reviews.get(item.id)
+        if review_text is None:
+            review_text = llm_review(item)
         lines.append("**LLM review:**")
         lines.append("")
         lines.append(review_text)
@@ -147,4 +206,4 @@ def run():
 
 
 if __name__ == "__main__":
-    run()
+    run(batch="--batch" in sys.argv)
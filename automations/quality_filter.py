@@ -1,11 +1,50 @@
 # automations/quality_filter.py
+"""
+Bewertet die Drafts des Tages und wählt die besten QUALITY_TOP_N aus:
+drafts/local/<date>/*.md -> drafts/selected/<date>/*.md + data/social_queue/<date>.json
+
+Review-Modi (nach Pre-Score, siehe content_heuristics):
+- Default (QUALITY_BATCH_SCORING=true): mehrere Drafts pro Score-Call,
+  Snippets danach nur für die ausgewählten Drafts. Das löst das kombinierte
+  Review (Score + Snippets in einem Call) als Default ab: gespart werden die
+  pro Call wiederholten Instructions und die Snippet-Outputs für nicht
+  ausgewählte Drafts; ausgewählte Drafts gehen dafür ein zweites Mal an GPT.
+- QUALITY_BATCH_SCORING=false: pro Draft ein kombiniertes Review
+  (QUALITY_COMBINED_REVIEW=true, Default) oder zwei getrennte Calls
+- --batch: kombiniertes Review aller Drafts als ein Offline-Batch (llm_batch)
+
+content_pipeline.py reviewt immer pro Draft (kombiniert, wie ohne Batch-Scoring).
+
+    python automations/quality_filter.py [--batch]
+"""
 import os
+import sys
 import json
+import hashlib
 import logging
 from pathlib import Path
 from datetime import datetime, timezone
 
-from llm_client import score_article_with_gpt, generate_social_snippets
+from content_heuristics import FAST_TRACK, GPT, PRESCORE_ACCEPT_ABOVE, REJECT, prescore
+from llm_client import (
+    REVIEW_SYSTEM_PROMPT,
+    REVIEW_TEMPERATURE,
+    SNIPPETS_SYSTEM_PROMPT,
+    SNIPPETS_TEMPERATURE,
+    ascore_article_with_gpt,
+    ascore_articles_with_gpt,
+    agenerate_social_snippets,
+    areview_article_with_gpt,
+    build_review_prompt,
+    build_snippets_prompt,
+    pack_articles_for_scoring,
+    parse_review_response,
+    parse_snippets_response,
+    run_bulk,
+)
+from llm_batch import BatchError, make_request, run_batch
+from llm_budget import BudgetExceeded
+from llm_checkpoint import Checkpoint
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +57,17 @@ SOCIAL_QUEUE_DIR = BASE_DIR / "data" / "social_queue"
 
 TOP_N = int(os.getenv("QUALITY_TOP_N", "8"))
 MIN_OVERALL_SCORE = float(os.getenv("QUALITY_MIN_SCORE", "6.5"))
+# Parallele Reviews; Default: LLM_CONCURRENCY aus llm_client
+CONCURRENCY = int(os.getenv("QUALITY_CONCURRENCY", "0")) or None
+# Mehrere Drafts pro Score-Call (bis LLM_BUDGET_SCORE_BATCH_TOKENS / SCORE_BATCH_MAX_ITEMS),
+# Snippets danach nur für die ausgewählten Drafts
+BATCH_SCORING = os.getenv("QUALITY_BATCH_SCORING", "true").lower() == "true"
+# Ohne Batch-Scoring (und in content_pipeline): Score + Snippets in einem
+# GPT-Call (halbiert Input-Tokens); "false" = zwei getrennte Calls
+COMBINED_REVIEW = os.getenv("QUALITY_COMBINED_REVIEW", "true").lower() == "true"
+# Heuristischer Pre-Score vor GPT (Bänder: QUALITY_PRESCORE_REJECT_BELOW / _ACCEPT_ABOVE,
+# Fast-Track ohne GPT-Score nur mit gesetztem _ACCEPT_ABOVE)
+PRESCORE_ENABLED = os.getenv("QUALITY_PRESCORE", "true").lower() == "true"
 
 
 def load_drafts_for_today(today_str: str):
@@ -37,6 +87,14 @@ def load_drafts_for_today(today_str: str):
     return items
 
 
+def draft_version(item) -> str:
+    """
+    Checkpoint-Version eines Drafts: ein mit --force neu generierter Draft
+    (gleiche ID, neuer Inhalt) wird neu gescored statt den alten Score zu erben.
+    """
+    return hashlib.sha256(item["content"].encode("utf-8")).hexdigest()[:16]
+
+
 def save_selected_draft(item, today_str: str):
     out_dir = SELECTED_DIR / today_str
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -60,7 +118,189 @@ def save_social_queue(snippets, today_str: str):
     logger.info(f"[quality_filter] Social queue saved -> {out_path}")
 
 
-def main():
+def build_question_meta(qid: str, today_str: str):
+    # Question-Meta für Scoring/Snippets – minimaler Default, später kannst du hier Tags etc. reinziehen
+    return {
+        "id": qid,
+        "source": "raw_questions",
+        "date": today_str,
+    }
+
+
+def run_prescore(item) -> str:
+    """
+    Setzt item["prescore"] und liefert die Entscheidung (REJECT / FAST_TRACK / GPT).
+    """
+    if not PRESCORE_ENABLED:
+        item["prescore"] = {"score": None, "decision": GPT}
+        return GPT
+    item["prescore"] = prescore(item["content"])
+    return item["prescore"]["decision"]
+
+
+def heuristic_score(item):
+    """
+    Score-Dict für Drafts, die ohne GPT entschieden wurden.
+    """
+    pre = item["prescore"]
+    return {"overall_score": pre["score"], "source": "heuristic", "decision": pre["decision"]}
+
+
+async def areview_draft(item, today_str: str, checkpoint: Checkpoint):
+    """
+    Review eines Drafts je nach Pre-Score-Entscheidung (FAST_TRACK: nur
+    Snippets, sonst Score + Snippets). Markiert das Item im Checkpoint als
+    erledigt und liefert (score, snippets); Fehler beim Scoring werden geworfen.
+    """
+    qid = item["id"]
+    content = item["content"]
+    question_meta = build_question_meta(qid, today_str)
+
+    if item["prescore"]["decision"] == FAST_TRACK:
+        logger.info(f"[quality_filter] Fast-tracked {qid} (pre-score {item['prescore']['score']}), snippets only ...")
+        score = heuristic_score(item)
+        try:
+            snippets = await agenerate_social_snippets(content, question_meta)
+        except Exception as e:
+            logger.error(f"[quality_filter] Error generating snippets for {qid}: {e}")
+            snippets = []
+    elif COMBINED_REVIEW:
+        logger.info(f"[quality_filter] Reviewing {qid} (score + snippets) ...")
+        review_result = await areview_article_with_gpt(content, question_meta)
+        score = review_result["score"]
+        snippets = review_result["snippets"]
+    else:
+        logger.info(f"[quality_filter] Scoring {qid} ...")
+        score = await ascore_article_with_gpt(content, question_meta)
+
+        # Snippet-Fehler sollen den Score nicht verwerfen
+        try:
+            logger.info(f"[quality_filter] Generating social snippets for {qid} ...")
+            snippets = await agenerate_social_snippets(content, question_meta)
+        except Exception as e:
+            logger.error(f"[quality_filter] Error generating snippets for {qid}: {e}")
+            snippets = []
+
+    if item["prescore"]["decision"] == GPT:
+        score["prescore"] = item["prescore"]["score"]
+
+    for s in snippets:
+        s["question_id"] = qid
+        s["article_date"] = today_str
+
+    checkpoint.mark_done(qid, {"score": score, "snippets": snippets}, version=draft_version(item))
+    return score, snippets
+
+
+def selection_key(score):
+    """
+    Sortier-Schlüssel für die Auswahl (absteigend): GPT-Scores vor heuristischen
+    (Fast-Track), die Skalen sind nicht vergleichbar – ein strukturell
+    vollständiger Draft hat heuristisch schon content_heuristics.HEURISTIC_MAX_SCORE.
+    """
+    return (score.get("source") != "heuristic", score["overall_score"])
+
+
+def is_selectable(score) -> bool:
+    """
+    Auswahl-Schwelle (ohne TOP_N): kein Pre-Score-Reject und overall_score >= QUALITY_MIN_SCORE.
+    """
+    return score.get("decision") != REJECT and score["overall_score"] >= MIN_OVERALL_SCORE
+
+
+def score_in_packs(drafts, today_str: str):
+    """
+    Scored die GPT-Drafts gebündelt (mehrere Artikel pro Call, siehe
+    score_articles_with_gpt); fast-getrackte Drafts behalten ihren
+    heuristischen Score. Snippets fehlen noch (None) und werden erst für die
+    ausgewählten Drafts erzeugt.
+    Rückgabe wie run_bulk(): pro Draft (score, None) oder Exception.
+    """
+    gpt_items = [item for item in drafts if item["prescore"]["decision"] == GPT]
+    metas = {item["id"]: build_question_meta(item["id"], today_str) for item in gpt_items}
+    packs = pack_articles_for_scoring([(item["id"], item["content"]) for item in gpt_items])
+    if gpt_items:
+        logger.info(f"[quality_filter] Scoring {len(gpt_items)} drafts in {len(packs)} GPT call(s) ...")
+
+    async def score_pack(pack):
+        return await ascore_articles_with_gpt(pack, {qid: metas[qid] for qid, _ in pack})
+
+    scores = {}
+    for pack, result in zip(packs, run_bulk(packs, score_pack, concurrency=CONCURRENCY)):
+        if isinstance(result, Exception):
+            result = {qid: result for qid, _ in pack}
+        scores.update(result)
+
+    results = []
+    for item in drafts:
+        if item["prescore"]["decision"] == FAST_TRACK:
+            results.append((heuristic_score(item), None))
+            continue
+        score = scores[item["id"]]
+        if not isinstance(score, Exception):
+            score["prescore"] = item["prescore"]["score"]
+            score = (score, None)
+        results.append(score)
+    return results
+
+
+def review_via_batch(drafts, today_str: str):
+    """
+    Offline-Batch-Modus: kombiniertes Review aller Drafts als ein Batch-Job
+    (fast-getrackte Drafts bekommen nur Snippets).
+    Rückgabe wie run_bulk(): pro Draft (score, snippets) oder Exception.
+    """
+    requests = []
+    for item in drafts:
+        meta = build_question_meta(item["id"], today_str)
+        if item["prescore"]["decision"] == FAST_TRACK:
+            requests.append(make_request(
+                item["id"],
+                build_snippets_prompt(item["content"], meta),
+                system_prompt=SNIPPETS_SYSTEM_PROMPT,
+                temperature=SNIPPETS_TEMPERATURE,
+                response_format={"type": "json_object"},
+            ))
+        else:
+            requests.append(make_request(
+                item["id"],
+                build_review_prompt(item["content"], meta),
+                system_prompt=REVIEW_SYSTEM_PROMPT,
+                temperature=REVIEW_TEMPERATURE,
+                response_format={"type": "json_object"},
+            ))
+    contents = run_batch("quality_filter", requests)
+
+    results = []
+    for item in drafts:
+        content = contents[item["id"]]
+        fast_track = item["prescore"]["decision"] == FAST_TRACK
+        if isinstance(content, Exception) and not fast_track:
+            results.append(content)
+            continue
+        try:
+            if fast_track:
+                score = heuristic_score(item)
+                snippets = [] if isinstance(content, Exception) else parse_snippets_response(content)
+            else:
+                review_result = parse_review_response(content)
+                score = review_result["score"]
+                score["prescore"] = item["prescore"]["score"]
+                snippets = review_result["snippets"]
+        except Exception as e:
+            if not fast_track:
+                results.append(e)
+                continue
+            logger.error(f"[quality_filter] Error parsing snippets for {item['id']}: {e}")
+            snippets = []
+        for s in snippets:
+            s["question_id"] = item["id"]
+            s["article_date"] = today_str
+        results.append((score, snippets))
+    return results
+
+
+def main(batch: bool = False):
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     logger.info(f"[quality_filter] Starting for {today}")
 
@@ -69,39 +309,95 @@ def main():
         logger.warning("[quality_filter] No drafts found. Exiting.")
         return
 
-    scored_items = []
-    all_snippets = []
+    # Re-Run am selben Tag: fertige Reviews kommen aus dem Checkpoint
+    checkpoint = Checkpoint("quality_filter", today)
+    pending = [item for item in drafts if not checkpoint.is_done(item["id"], draft_version(item))]
+    if len(pending) < len(drafts):
+        logger.info(
+            f"[quality_filter] Resuming: {len(drafts) - len(pending)} reviews already done, "
+            f"{len(pending)} left."
+        )
+    checkpoint.mark_in_flight(item["id"] for item in pending)
 
-    for item in drafts:
-        qid = item["id"]
-        content = item["content"]
+    # Kaskade: offensichtlich schlechte Drafts fliegen ohne GPT raus,
+    # mit QUALITY_PRESCORE_ACCEPT_ABOVE brauchen sehr gute keinen GPT-Score (nur Snippets)
+    if PRESCORE_ENABLED and 0 < PRESCORE_ACCEPT_ABOVE < MIN_OVERALL_SCORE:
+        logger.warning(
+            f"[quality_filter] QUALITY_PRESCORE_ACCEPT_ABOVE ({PRESCORE_ACCEPT_ABOVE}) is below "
+            f"QUALITY_MIN_SCORE ({MIN_OVERALL_SCORE}); fast-tracked drafts may not be selected."
+        )
+    decisions = {REJECT: 0, FAST_TRACK: 0, GPT: 0}
+    to_review = []
+    for item in pending:
+        decision = run_prescore(item)
+        decisions[decision] += 1
+        if decision == REJECT:
+            logger.info(f"[quality_filter] Rejected {item['id']} by pre-score {item['prescore']['score']}")
+            checkpoint.mark_done(
+                item["id"], {"score": heuristic_score(item), "snippets": []}, version=draft_version(item)
+            )
+        else:
+            to_review.append(item)
+
+    if pending and PRESCORE_ENABLED:
+        saved = decisions[REJECT] + decisions[FAST_TRACK]
+        logger.info(
+            f"[quality_filter] Pre-score: {decisions[REJECT]} rejected, {decisions[FAST_TRACK]} fast-tracked, "
+            f"{decisions[GPT]} sent to GPT -> saved {saved}/{len(pending)} GPT scoring calls "
+            f"({saved / len(pending):.0%})"
+        )
 
-        # Question-Meta für Scoring/Snippets – minimaler Default, später kannst du hier Tags etc. reinziehen
-        question_meta = {
-            "id": qid,
-            "source": "raw_questions",
-            "date": today,
-        }
+    async def review(item):
+        return await areview_draft(item, today, checkpoint)
 
+    if not to_review:
+        new_results = []
+    elif batch:
         try:
-            logger.info(f"[quality_filter] Scoring {qid} ...")
-            score = score_article_with_gpt(content, question_meta)
-            item["score"] = score
-            scored_items.append(item)
+            new_results = review_via_batch(to_review, today)
+        except (BudgetExceeded, BatchError) as e:
+            # Items beim nächsten Lauf nachholen statt mit Traceback (und in_flight) abzubrechen
+            logger.error(f"[quality_filter] Batch review failed: {e}")
+            for item in to_review:
+                checkpoint.mark_failed(item["id"], e)
+            return
+    elif BATCH_SCORING:
+        new_results = score_in_packs(to_review, today)
+    else:
+        new_results = run_bulk(to_review, review, concurrency=CONCURRENCY)
 
-            logger.info(f"[quality_filter] Generating social snippets for {qid} ...")
-            snippets = generate_social_snippets(content, question_meta)
-            for s in snippets:
-                s["question_id"] = qid
-                s["article_date"] = today
-            all_snippets.extend(snippets)
+    results_by_id = {}
+    for item, result in zip(to_review, new_results):
+        if isinstance(result, Exception):
+            checkpoint.mark_failed(item["id"], result)
+        elif not checkpoint.is_done(item["id"], draft_version(item)):
+            checkpoint.mark_done(
+                item["id"], {"score": result[0], "snippets": result[1]}, version=draft_version(item)
+            )
+        results_by_id[item["id"]] = result
 
-        except Exception as e:
-            logger.error(f"[quality_filter] Error scoring {qid}: {e}")
+    scored_items = []
+    all_snippets = []
 
-    # Sortieren nach overall_score
-    scored_items.sort(key=lambda x: x["score"]["overall_score"], reverse=True)
-    selected = [i for i in scored_items if i["score"]["overall_score"] >= MIN_OVERALL_SCORE]
+    for item in drafts:
+        result = results_by_id.get(item["id"])
+        if result is None:
+            cached = checkpoint.result(item["id"])
+            result = (cached["score"], cached["snippets"])
+
+        if isinstance(result, Exception):
+            logger.error(f"[quality_filter] Error scoring {item['id']}: {result}")
+            continue
+
+        score, snippets = result
+        item["score"] = score
+        item["snippets"] = snippets
+        scored_items.append(item)
+        all_snippets.extend(snippets or [])
+
+    # Sortieren nach overall_score (GPT-gescorte vor fast-getrackten)
+    scored_items.sort(key=lambda x: selection_key(x["score"]), reverse=True)
+    selected = [i for i in scored_items if is_selectable(i["score"])]
     selected = selected[:TOP_N]
 
     logger.info(
@@ -112,6 +408,25 @@ def main():
     for item in selected:
         save_selected_draft(item, today)
 
+    # Batch-Scoring: Snippets nur für ausgewählte Drafts (None = noch nicht erzeugt)
+    needs_snippets = [item for item in selected if item["snippets"] is None]
+
+    async def snippets_for(item):
+        snippets = await agenerate_social_snippets(item["content"], build_question_meta(item["id"], today))
+        for s in snippets:
+            s["question_id"] = item["id"]
+            s["article_date"] = today
+        checkpoint.mark_done(item["id"], {"score": item["score"], "snippets": snippets}, version=draft_version(item))
+        return snippets
+
+    if needs_snippets:
+        logger.info(f"[quality_filter] Generating social snippets for {len(needs_snippets)} selected drafts ...")
+        for item, result in zip(needs_snippets, run_bulk(needs_snippets, snippets_for, concurrency=CONCURRENCY)):
+            if isinstance(result, Exception):
+                logger.error(f"[quality_filter] Error generating snippets for {item['id']}: {result}")
+                continue
+            all_snippets.extend(result)
+
     if all_snippets:
         save_social_queue(all_snippets, today)
     else:
@@ -119,4 +434,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(batch="--batch" in sys.argv)
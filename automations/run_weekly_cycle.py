@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -12,6 +13,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# LLM-Stages über die Batch-API statt synchroner Einzel-Calls (nicht latenzkritisch)
+LLM_BATCH = os.getenv("WEEKLY_LLM_BATCH", "false").lower() == "true"
+# Generierung, Scoring und Microsite-Sync überlappend in einem Prozess (content_pipeline.py)
+PIPELINED = os.getenv("WEEKLY_PIPELINED", "false").lower() == "true"
+
 
 def run_step(label: str, args):
     """
@@ -50,14 +56,22 @@ def main():
     # 1) Fragen einsammeln (StackOverflow etc.)
     run_step("harvest", ["python", "automations/harvest.py"])
 
-    # 2) Local-LLM / GPT: Drafts generieren
-    run_step("bulk_generate", ["python", "automations/bulk_generate.py"])
+    if PIPELINED and LLM_BATCH:
+        logger.warning("WEEKLY_PIPELINED is ignored with WEEKLY_LLM_BATCH=true (batch jobs run stage by stage)")
+
+    if PIPELINED and not LLM_BATCH:
+        # 2-4) Drafts generieren, scoren und ausgewählte direkt syncen – überlappend
+        run_step("content_pipeline", ["python", "automations/content_pipeline.py"])
+    else:
+        # 2) Local-LLM / GPT: Drafts generieren
+        batch_args = ["--batch"] if LLM_BATCH else []
+        run_step("bulk_generate", ["python", "automations/bulk_generate.py", *batch_args])
 
-    # 3) GPT-Scoring + Social-Snippets
-    run_step("quality_filter", ["python", "automations/quality_filter.py"])
+        # 3) GPT-Scoring + Social-Snippets
+        run_step("quality_filter", ["python", "automations/quality_filter.py", *batch_args])
 
-    # 4) Blogposts + Microsites syncen
-    run_step("sync_microsites", ["python", "automations/sync_microsites.py"])
+        # 4) Blogposts + Microsites syncen
+        run_step("sync_microsites", ["python", "automations/sync_microsites.py"])
 
     # 5) Weekly-Packs aus den ausgewählten Artikeln bauen
     run_step("weekly_pack_builder", ["python", "automations/weekly_pack_builder.py"])
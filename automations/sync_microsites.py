@@ -218,38 +218,57 @@ def slugify(value: str) -> str:
     return value[:80] or "post"
 
 
-def main():
-    today_str = get_today_str()
-    logger.info(f"[sync_microsites] Starting for {today_str}")
+def publish_draft(item: Dict[str, Any], today_str: str) -> None:
+    """
+    Schreibt einen ausgewählten Draft ({"id", "content"}) auf die Hauptseite
+    und die per Tags zugeordneten Microsites.
+    """
+    qid = item["id"]
+    body_md = item["content"]
+
+    # Engine-Header ist HTML-Kommentar in der ersten Zeile
+    source_engine = "unknown"
+    first_line = body_md.splitlines()[0].strip() if body_md.splitlines() else ""
+    if first_line.startswith("<!--") and "engine:" in first_line:
+        # z.B. <!-- engine: gpt-fallback | created_at: ... -->
+        try:
+            part = first_line.split("engine:")[1]
+            source_engine = part.split("|")[0].strip()
+        except Exception:
+            pass
+
+    meta = load_question_meta(today_str, qid)
+    tags = meta.get("tags", [])
+    title = extract_title_from_markdown(body_md, default=f"Post {qid}")
+    slug = slugify(title)
+
+    # 1) Hauptseite – immer
+    write_post(
+        base_dir=MAIN_SITE_CONTENT_DIR,
+        slug=slug,
+        title=title,
+        body_md=body_md,
+        today_str=today_str,
+        tags=tags,
+        question_id=qid,
+        source_engine=source_engine,
+        microsite_slug=None,
+    )
 
-    drafts = load_selected_drafts(today_str)
-    if not drafts:
-        logger.warning("[sync_microsites] No selected drafts found. Exiting.")
+    # 2) Microsites – abhängig von Tags
+    microsites = determine_microsites_from_tags(tags)
+    if not microsites:
+        logger.info(f"[sync_microsites] No microsite routing for {qid} (tags={tags})")
         return
 
-    for item in drafts:
-        qid = item["id"]
-        body_md = item["content"]
-
-        # Engine-Header ist HTML-Kommentar in der ersten Zeile
-        source_engine = "unknown"
-        first_line = body_md.splitlines()[0].strip() if body_md.splitlines() else ""
-        if first_line.startswith("<!--") and "engine:" in first_line:
-            # z.B. <!-- engine: gpt-fallback | created_at: ... -->
-            try:
-                part = first_line.split("engine:")[1]
-                source_engine = part.split("|")[0].strip()
-            except Exception:
-                pass
-
-        meta = load_question_meta(today_str, qid)
-        tags = meta.get("tags", [])
-        title = extract_title_from_markdown(body_md, default=f"Post {qid}")
-        slug = slugify(title)
-
-        # 1) Hauptseite – immer
+    for ms in microsites:
+        content_dir = MICROSITE_DIRS.get(ms)
+        if not content_dir:
+            logger.warning(f"[sync_microsites] No content dir configured for microsite '{ms}'")
+            continue
+
         write_post(
-            base_dir=MAIN_SITE_CONTENT_DIR,
+            base_dir=content_dir,
             slug=slug,
             title=title,
             body_md=body_md,
@@ -257,32 +276,21 @@ def main():
             tags=tags,
             question_id=qid,
             source_engine=source_engine,
-            microsite_slug=None,
+            microsite_slug=ms,
         )
 
-        # 2) Microsites – abhängig von Tags
-        microsites = determine_microsites_from_tags(tags)
-        if not microsites:
-            logger.info(f"[sync_microsites] No microsite routing for {qid} (tags={tags})")
-            continue
 
-        for ms in microsites:
-            content_dir = MICROSITE_DIRS.get(ms)
-            if not content_dir:
-                logger.warning(f"[sync_microsites] No content dir configured for microsite '{ms}'")
-                continue
-
-            write_post(
-                base_dir=content_dir,
-                slug=slug,
-                title=title,
-                body_md=body_md,
-                today_str=today_str,
-                tags=tags,
-                question_id=qid,
-                source_engine=source_engine,
-                microsite_slug=ms,
-            )
+def main():
+    today_str = get_today_str()
+    logger.info(f"[sync_microsites] Starting for {today_str}")
+
+    drafts = load_selected_drafts(today_str)
+    if not drafts:
+        logger.warning("[sync_microsites] No selected drafts found. Exiting.")
+        return
+
+    for item in drafts:
+        publish_draft(item, today_str)
 
     logger.info("[sync_microsites] Done.")
 
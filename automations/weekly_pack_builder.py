@@ -6,6 +6,8 @@ from pathlib import Path
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Tuple
 
+from pack_categories import categorize_post
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -16,32 +18,6 @@ MAIN_SITE_CONTENT_DIR = Path(
     os.getenv("MAIN_SITE_CONTENT_DIR", "site/content/blog")
 )
 
-# Tag -> Pack-Kategorie
-PACK_CATEGORY_MAP = {
-    "python": "python-data",
-    "pandas": "python-data",
-    "dataframe": "python-data",
-
-    "fastapi": "fastapi-backend",
-    "api": "fastapi-backend",
-    "backend": "fastapi-backend",
-
-    "rag": "rag-ai",
-    "retrieval": "rag-ai",
-    "vector": "rag-ai",
-    "embedding": "rag-ai",
-
-    "devops": "cloud-devops",
-    "docker": "cloud-devops",
-    "kubernetes": "cloud-devops",
-    "ci": "cloud-devops",
-
-    "automation": "automation-tools",
-    "airflow": "automation-tools",
-    "prefect": "automation-tools",
-    "orchestration": "automation-tools",
-}
-
 
 def parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
     """
@@ -104,19 +80,6 @@ def parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
     return data, body
 
 
-def categorize_post(tags: List[str]) -> List[str]:
-    """
-    Mappt Tags (lowercase) auf Pack-Kategorien.
-    Ein Post kann in mehrere Kategorien fallen.
-    """
-    cats = set()
-    for t in tags or []:
-        key = str(t).lower()
-        if key in PACK_CATEGORY_MAP:
-            cats.add(PACK_CATEGORY_MAP[key])
-    return sorted(cats)
-
-
 def load_recent_posts(days: int = 7) -> List[Dict[str, Any]]:
     """
     Lädt Blogposts aus dem Hauptblog der letzten X Tage.
@@ -0,0 +1,26 @@
+# tests/conftest.py
+"""
+Die Skripte in automations/ importieren sich flach (wie beim Aufruf per
+python automations/<skript>.py) – dafür kommt das Verzeichnis in den Pfad.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automations"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_data_dirs(tmp_path, monkeypatch):
+    # Nie in data/ des Repos schreiben
+    import llm_batch
+    import llm_budget
+    import llm_checkpoint
+    import llm_ledger
+
+    monkeypatch.setattr(llm_batch, "BATCH_DIR", tmp_path / "batches")
+    monkeypatch.setattr(llm_budget, "BUDGET_DIR", tmp_path / "llm_budget")
+    monkeypatch.setattr(llm_budget, "_budget", None)
+    monkeypatch.setattr(llm_checkpoint, "CHECKPOINT_DIR", tmp_path / "checkpoints")
+    monkeypatch.setattr(llm_ledger, "LLM_LEDGER_PATH", tmp_path / "llm_ledger" / "calls.jsonl")
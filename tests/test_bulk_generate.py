@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+import bulk_generate
+import generation_scheduler
+from llm_client import draft_header, draft_prompt_hash
+
+DAY = "2026-01-01"
+
+QUESTIONS = [
+    {"id": "q1", "question": "How do I stream responses in FastAPI?", "tags": ["fastapi"]},
+    {"id": "q2", "question": "How do I profile a slow pandas merge?", "tags": ["pandas"]},
+    {"question_id": "q3", "title": "Why is my asyncio task never awaited?", "tags": ["asyncio"]},
+]
+
+
+@pytest.fixture(autouse=True)
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_generate, "RAW_QUESTIONS_DIR", tmp_path / "raw_questions")
+    monkeypatch.setattr(bulk_generate, "DRAFTS_DIR", tmp_path / "drafts")
+    monkeypatch.setattr(bulk_generate, "MAX_ITEMS", 0)
+    # Keine Sales-Daten -> Reihenfolge der Dateien bleibt
+    monkeypatch.setattr(generation_scheduler, "SALES_BY_PACK_PATH", tmp_path / "missing.json")
+
+    raw_dir = tmp_path / "raw_questions" / DAY
+    raw_dir.mkdir(parents=True)
+    for n, question in enumerate(QUESTIONS):
+        (raw_dir / f"{n:02d}.json").write_text(json.dumps(question), encoding="utf-8")
+    (tmp_path / "drafts" / DAY).mkdir(parents=True)
+    return tmp_path
+
+
+def write_draft(dirs, qid, header, suffix=".md"):
+    (dirs / "drafts" / DAY / f"{qid}{suffix}").write_text(header + "# Draft\n", encoding="utf-8")
+
+
+def current_header(qid):
+    question = next(q for q in QUESTIONS if (q.get("id") or q.get("question_id")) == qid)
+    text = question.get("question") or question.get("title")
+    return draft_header("local", prompt_hash=draft_prompt_hash(qid, text))
+
+
+def pending_ids(force=False):
+    _, pending, _, _ = bulk_generate.plan_drafts(DAY, force=force)
+    return [qid for qid, _ in pending]
+
+
+def test_fresh_day_generates_everything():
+    candidates, pending, deferred, checkpoint = bulk_generate.plan_drafts(DAY)
+    assert [qid for qid, _ in candidates] == ["q1", "q2", "q3"]
+    assert pending == candidates
+    assert deferred == []
+    assert checkpoint.stage == "bulk_generate" and checkpoint.run == DAY
+
+
+def test_draft_with_current_prompt_hash_is_skipped(dirs):
+    write_draft(dirs, "q1", current_header("q1"))
+    assert pending_ids() == ["q2", "q3"]
+
+
+def test_stale_or_partial_drafts_are_regenerated(dirs):
+    write_draft(dirs, "q1", draft_header("local", prompt_hash="0123456789abcdef"))
+    write_draft(dirs, "q2", current_header("q2"), suffix=".md.part")
+    write_draft(dirs, "q3", current_header("q3"))
+    assert pending_ids() == ["q1", "q2"]
+
+
+def test_draft_without_hash_counts_only_if_checkpoint_is_done(dirs):
+    write_draft(dirs, "q1", draft_header("local"))
+    write_draft(dirs, "q2", "")
+    assert pending_ids() == ["q1", "q2", "q3"]
+
+    _, _, _, checkpoint = bulk_generate.plan_drafts(DAY)
+    checkpoint.mark_done("q1")
+    assert pending_ids() == ["q2", "q3"]
+
+
+def test_force_regenerates_existing_drafts(dirs):
+    for qid in ("q1", "q2", "q3"):
+        write_draft(dirs, qid, current_header(qid))
+    assert pending_ids() == []
+    assert pending_ids(force=True) == ["q1", "q2", "q3"]
+
+
+def test_max_items_defers_the_rest(dirs, monkeypatch):
+    monkeypatch.setattr(bulk_generate, "MAX_ITEMS", 2)
+    write_draft(dirs, "q1", current_header("q1"))
+    candidates, pending, deferred, _ = bulk_generate.plan_drafts(DAY)
+    assert len(candidates) == 3
+    assert [qid for qid, _ in pending] == ["q2", "q3"]
+    assert deferred == []
+
+    monkeypatch.setattr(bulk_generate, "MAX_ITEMS", 1)
+    _, pending, deferred, _ = bulk_generate.plan_drafts(DAY)
+    assert [qid for qid, _ in pending] == ["q2"]
+    assert [qid for qid, _ in deferred] == ["q3"]
+
+
+def test_invalid_questions_and_missing_day(dirs):
+    (dirs / "raw_questions" / DAY / "99.json").write_text(json.dumps({"id": "q9"}), encoding="utf-8")
+    (dirs / "raw_questions" / DAY / "98.json").write_text("{broken", encoding="utf-8")
+    assert pending_ids() == ["q1", "q2", "q3"]
+
+    assert bulk_generate.plan_drafts("2026-02-02")[:3] == ([], [], [])
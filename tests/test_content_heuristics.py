@@ -0,0 +1,58 @@
+from content_heuristics import (
+    FAST_TRACK,
+    GPT,
+    HEURISTIC_MAX_SCORE,
+    PRESCORE_ACCEPT_ABOVE,
+    REJECT,
+    classify,
+    prescore,
+)
+
+SECTION = "Some explanation with enough words to count as real content here. " * 12
+
+GOOD_ARTICLE = "\n\n".join(
+    [
+        "<!-- engine: local-llm | generated: 2026-01-01T00:00:00+00:00 -->",
+        "# How to use FastAPI dependencies",
+        "## Einleitung",
+        SECTION,
+        "## Beispiel",
+        "```python\nfrom fastapi import Depends\n```",
+        SECTION,
+        "```python\napp = FastAPI()\n```",
+        "## Pitfalls",
+        "- first pitfall\n- second pitfall",
+        SECTION,
+        "## Best Practices",
+        SECTION,
+        "## Fazit",
+        SECTION,
+    ]
+)
+
+
+def test_classify_bands():
+    assert classify(2.9, reject_below=3.0, accept_above=9.0) == REJECT
+    assert classify(3.0, reject_below=3.0, accept_above=9.0) == GPT
+    assert classify(8.99, reject_below=3.0, accept_above=9.0) == GPT
+    assert classify(9.0, reject_below=3.0, accept_above=9.0) == FAST_TRACK
+
+
+def test_fast_track_is_off_with_accept_above_zero():
+    assert classify(HEURISTIC_MAX_SCORE, reject_below=3.0, accept_above=0) == GPT
+
+
+def test_fast_track_is_opt_in_by_default():
+    assert PRESCORE_ACCEPT_ABOVE == 0
+    assert prescore(GOOD_ARTICLE)["decision"] == GPT
+
+
+def test_good_article_scores_high_but_within_heuristic_max():
+    result = prescore(GOOD_ARTICLE)
+    assert 8.0 <= result["score"] <= HEURISTIC_MAX_SCORE
+    assert result["features"]["code_blocks"] == 2
+
+
+def test_empty_or_stub_article_is_rejected():
+    assert prescore("")["decision"] == REJECT
+    assert prescore("# Title\n\nToo short.")["decision"] == REJECT
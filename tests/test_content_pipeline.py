@@ -0,0 +1,206 @@
+import asyncio
+import time
+
+import pytest
+
+import bulk_generate
+import content_pipeline
+import quality_filter
+from content_heuristics import GPT, REJECT
+from llm_checkpoint import Checkpoint
+
+DAY = "2026-01-01"
+
+
+class FakePipeline:
+    """
+    Ersetzt LLM, Scoring und Publishing durch Fakes; die Queue-, Worker- und
+    Auswahllogik von arun() läuft echt.
+    """
+
+    def __init__(self, monkeypatch, drafts_dir):
+        self.drafts_dir = drafts_dir
+        self.scores = {}
+        self.generation_errors = set()
+        self.rejected = set()
+        self.broken = set()
+        self.publish_errors = set()
+        self.publish_delay = 0.0
+        self.published = []
+        self.snippets = []
+        self.candidates, self.pending, self.deferred = [], [], []
+
+        monkeypatch.setattr(bulk_generate, "DRAFTS_DIR", drafts_dir)
+        monkeypatch.setattr(bulk_generate, "STREAM_DRAFTS", False)
+        monkeypatch.setattr(bulk_generate, "CONCURRENCY", 2)
+        monkeypatch.setattr(bulk_generate, "plan_drafts", self.plan_drafts)
+        monkeypatch.setattr(content_pipeline, "agenerate_local_article", self.generate)
+        monkeypatch.setattr(content_pipeline, "warm_up_local_llm", lambda: None)
+        monkeypatch.setattr(content_pipeline, "publish_draft", self.publish)
+        monkeypatch.setattr(content_pipeline, "PIPELINE_QUEUE_SIZE", 1)
+        monkeypatch.setattr(content_pipeline, "PIPELINE_SCORE_WORKERS", 3)
+        monkeypatch.setattr(quality_filter, "TOP_N", 8)
+        monkeypatch.setattr(quality_filter, "MIN_OVERALL_SCORE", 6.5)
+        monkeypatch.setattr(quality_filter, "run_prescore", self.prescore)
+        monkeypatch.setattr(quality_filter, "areview_draft", self.review)
+        monkeypatch.setattr(quality_filter, "save_selected_draft", lambda item, today: None)
+        monkeypatch.setattr(quality_filter, "save_social_queue", lambda snippets, today: self.snippets.extend(snippets))
+
+    def plan(self, generate=(), on_disk=(), deferred=()):
+        for qid in on_disk:
+            path = self.drafts_dir / DAY / f"{qid}.md"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"# {qid} (on disk)\n", encoding="utf-8")
+        self.pending = [(qid, f"Question {qid}?") for qid in generate]
+        self.deferred = [(qid, f"Question {qid}?") for qid in deferred]
+        self.candidates = [(qid, f"Question {qid}?") for qid in on_disk] + self.pending + self.deferred
+
+    def plan_drafts(self, today, force=False):
+        return self.candidates, self.pending, self.deferred, Checkpoint("bulk_generate", today)
+
+    async def generate(self, qid, qtext, engine_label, stream_to=None):
+        await asyncio.sleep(0.001)
+        if qid in self.generation_errors:
+            raise TimeoutError(f"local LLM timed out for {qid}")
+        return f"# {qid}\n\nGenerated body.\n"
+
+    def prescore(self, item):
+        if item["id"] in self.broken:
+            raise ValueError("unparseable draft")
+        decision = REJECT if item["id"] in self.rejected else GPT
+        item["prescore"] = {"score": 1.0, "decision": decision}
+        return decision
+
+    async def review(self, item, today, checkpoint):
+        await asyncio.sleep(0.001)
+        score = self.scores[item["id"]]
+        if isinstance(score, Exception):
+            raise score
+        snippets = [{"id": item["id"]}]
+        checkpoint.mark_done(item["id"], {"score": score, "snippets": snippets})
+        return score, snippets
+
+    def publish(self, item, today):
+        time.sleep(self.publish_delay)
+        if item["id"] in self.publish_errors:
+            raise OSError("microsite repo is read-only")
+        self.published.append(item["id"])
+
+    def run(self, force=False):
+        return asyncio.run(asyncio.wait_for(content_pipeline.arun(DAY, force), timeout=10))
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    return FakePipeline(monkeypatch, tmp_path / "drafts")
+
+
+def gpt(score):
+    return {"overall_score": score}
+
+
+def heuristic(score):
+    return {"overall_score": score, "source": "heuristic", "decision": "fast_track"}
+
+
+def test_scores_drafts_on_disk_and_generated(fake):
+    fake.plan(generate=["g1", "g2"], on_disk=["d1"], deferred=["x1"])
+    fake.scores = {"d1": gpt(8), "g1": gpt(5), "g2": gpt(7)}
+
+    counts = fake.run()
+    assert counts == {
+        "generated": 2,
+        "generation_failed": 0,
+        "skipped": 1,
+        "deferred": 1,
+        "scored": 3,
+        "review_failed": 0,
+        "selected": 2,
+        "publish_failed": 0,
+    }
+    assert sorted(fake.published) == ["d1", "g2"]
+    assert sorted(s["id"] for s in fake.snippets) == ["d1", "g1", "g2"]
+    assert (fake.drafts_dir / DAY / "g1.md").exists()
+    assert Checkpoint("bulk_generate", DAY).summary()["done"] == 2
+
+
+def test_top_n_is_reserved_before_publishing(fake, monkeypatch):
+    monkeypatch.setattr(quality_filter, "TOP_N", 2)
+    fake.publish_delay = 0.05
+    qids = [f"g{n}" for n in range(6)]
+    fake.plan(generate=qids)
+    fake.scores = {qid: gpt(9) for qid in qids}
+
+    counts = fake.run()
+    # Alle Worker sehen gleichzeitig einen guten Draft, trotzdem nur TOP_N
+    assert counts["selected"] == 2
+    assert len(fake.published) == 2
+    assert counts["scored"] == 6
+
+
+def test_failed_publish_frees_its_slot(fake, monkeypatch):
+    monkeypatch.setattr(quality_filter, "TOP_N", 1)
+    monkeypatch.setattr(content_pipeline, "PIPELINE_SCORE_WORKERS", 1)
+    fake.plan(generate=["g1", "g2"])
+    fake.scores = {"g1": gpt(9), "g2": gpt(8)}
+    fake.publish_errors = {"g1"}
+
+    counts = fake.run()
+    assert counts["publish_failed"] == 1
+    assert counts["selected"] == 1
+    assert fake.published == ["g2"]
+
+
+def test_fast_tracked_drafts_backfill_remaining_slots_by_score(fake, monkeypatch):
+    monkeypatch.setattr(quality_filter, "TOP_N", 3)
+    fake.plan(on_disk=["h1", "h2", "h3"], generate=["g1", "g2"])
+    fake.scores = {"h1": heuristic(9), "h2": heuristic(7), "h3": heuristic(8), "g1": gpt(7), "g2": gpt(4)}
+
+    counts = fake.run()
+    assert counts["selected"] == 3
+    # GPT-gescorte zuerst, dann die besten Heuristik-Drafts
+    assert fake.published[0] == "g1"
+    assert fake.published[1:] == ["h1", "h3"]
+
+
+def test_fast_tracked_drafts_do_not_displace_gpt_scored(fake, monkeypatch):
+    monkeypatch.setattr(quality_filter, "TOP_N", 1)
+    fake.plan(on_disk=["h1"], generate=["g1"])
+    fake.scores = {"h1": heuristic(10), "g1": gpt(7)}
+
+    assert fake.run()["selected"] == 1
+    assert fake.published == ["g1"]
+
+
+def test_workers_stop_after_generation_failures(fake, monkeypatch):
+    monkeypatch.setattr(content_pipeline, "PIPELINE_SCORE_WORKERS", 4)
+    fake.plan(generate=["g1", "g2", "g3"])
+    fake.generation_errors = {"g1", "g2", "g3"}
+
+    counts = fake.run()
+    assert counts["generation_failed"] == 3
+    assert counts["scored"] == 0
+    assert Checkpoint("bulk_generate", DAY).summary()["failed"] == 3
+
+
+def test_bad_drafts_do_not_kill_workers(fake, monkeypatch):
+    monkeypatch.setattr(content_pipeline, "PIPELINE_SCORE_WORKERS", 1)
+    fake.plan(generate=["g1", "g2", "g3", "g4"])
+    fake.broken = {"g1"}
+    fake.rejected = {"g2"}
+    fake.scores = {"g3": RuntimeError("GPT 500"), "g4": gpt(9)}
+
+    counts = fake.run()
+    assert counts["review_failed"] == 2
+    assert counts["scored"] == 2  # Reject zählt als gescored
+    assert fake.published == ["g4"]
+    assert Checkpoint("quality_filter", DAY).summary()["failed"] == 1
+
+
+def test_producer_error_propagates_instead_of_hanging(fake):
+    fake.plan(on_disk=["d1"], generate=["g1"])
+    (fake.drafts_dir / DAY / "d1.md").unlink()
+    fake.scores = {"g1": gpt(9)}
+
+    with pytest.raises(FileNotFoundError):
+        fake.run()
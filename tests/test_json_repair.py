@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from json_repair import JSONRepairError, parse_json, repair_json
+from llm_client import is_complete_score
+
+FULL_SCORE = {"quality": 8, "depth": 7, "seo": 6, "monetization": 5}
+
+
+def test_valid_json_is_parsed_directly():
+    assert parse_json(json.dumps(FULL_SCORE), validate=is_complete_score) == FULL_SCORE
+
+
+def test_fence_trailing_comma_and_python_literals_are_repaired():
+    raw = "Here you go:\n```json\n{'ok': True, 'items': [1, 2,],}\n```"
+    assert parse_json(raw) == {"ok": True, "items": [1, 2]}
+
+
+def test_truncated_object_is_cut_back_to_last_complete_element():
+    assert repair_json('{"snippets": [{"platform": "x", "text": "hi"}, {"platform": "li"') == {
+        "snippets": [{"platform": "x", "text": "hi"}]
+    }
+
+
+def test_truncated_score_is_not_accepted_as_partial_object():
+    with pytest.raises(JSONRepairError):
+        parse_json('{"quality": 8, "depth": 7, "seo', validate=is_complete_score)
+
+
+def test_truncated_score_goes_to_fixer():
+    calls = []
+
+    def fixer(raw):
+        calls.append(raw)
+        return json.dumps(FULL_SCORE)
+
+    assert parse_json('{"quality": 8, "depth": 7, "seo', fixer=fixer, validate=is_complete_score) == FULL_SCORE
+    assert calls == ['{"quality": 8, "depth": 7, "seo']
+
+
+def test_valid_but_incomplete_json_skips_local_repair_and_uses_fixer():
+    fixed = dict(FULL_SCORE, overall_score=6.5)
+    assert parse_json('{"quality": 8}', fixer=lambda raw: json.dumps(fixed), validate=is_complete_score) == fixed
+
+
+def test_incomplete_fixer_output_raises():
+    with pytest.raises(JSONRepairError):
+        parse_json('{"quality": 8, "dep', fixer=lambda raw: '{"quality": 8}', validate=is_complete_score)
+
+
+def test_no_json_at_all_raises():
+    with pytest.raises(JSONRepairError):
+        parse_json("Sorry, I cannot help with that.")
+
+
+def test_budget_stop_in_fixer_is_not_turned_into_parse_error():
+    from llm_budget import BudgetExceeded
+
+    def fixer(raw):
+        raise BudgetExceeded("LLM budget exhausted")
+
+    with pytest.raises(BudgetExceeded):
+        parse_json('{"quality": 8, "dep', fixer=fixer, validate=is_complete_score)
+
+
+def test_fixer_transport_error_becomes_parse_error():
+    def fixer(raw):
+        raise JSONRepairError("JSON fix call failed: connection reset")
+
+    with pytest.raises(JSONRepairError):
+        parse_json('{"quality": 8, "dep', fixer=fixer, validate=is_complete_score)
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import llm_budget
+import llm_ledger
+from llm_batch import BatchError, LocalFileBatchBackend, make_request, output_usage, run_batch
+
+
+def chat_body(content: str, prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+    }
+
+
+def ledger_entries():
+    return [json.loads(line) for line in llm_ledger.LLM_LEDGER_PATH.read_text(encoding="utf-8").splitlines()]
+
+
+def test_local_backend_keeps_usage_for_ledger_and_budget():
+    backend = LocalFileBatchBackend(responder=lambda body: chat_body(" ok ", 1000, 200))
+    requests = [make_request(f"q{i}", "Rate this.", model="gpt-4.1-mini") for i in range(3)]
+
+    results = run_batch("quality_filter", requests, backend=backend, poll_interval=0.01, max_wait=5)
+
+    assert results == {"q0": "ok", "q1": "ok", "q2": "ok"}
+    entry = ledger_entries()[-1]
+    assert (entry["engine"], entry["prompt_tokens"], entry["completion_tokens"]) == ("local-batch", 3000, 600)
+    assert llm_budget.get_budget().spent("quality_filter") > 0
+
+
+def test_plain_text_responder_still_works(tmp_path):
+    backend = LocalFileBatchBackend(responder=lambda body: "text only")
+    results = run_batch("qa", [make_request("a", "x")], backend=backend, poll_interval=0.01, max_wait=5)
+    assert results == {"a": "text only"}
+    assert ledger_entries()[-1]["prompt_tokens"] == 0
+
+
+def test_failed_items_become_batch_errors():
+    def responder(body):
+        if "boom" in body["messages"][-1]["content"]:
+            raise RuntimeError("upstream 500")
+        return chat_body("fine", 10, 5)
+
+    backend = LocalFileBatchBackend(responder=responder)
+    requests = [make_request("good", "hello"), make_request("bad", "boom")]
+    results = run_batch("qa", requests, backend=backend, poll_interval=0.01, max_wait=5)
+
+    assert results["good"] == "fine"
+    assert isinstance(results["bad"], BatchError)
+
+
+def test_output_usage_sums_cached_tokens(tmp_path):
+    path = tmp_path / "output.jsonl"
+    body = chat_body("x", 100, 10)
+    body["usage"]["prompt_tokens_details"] = {"cached_tokens": 60}
+    path.write_text(json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": body}}) + "\n")
+    assert output_usage(path) == {"prompt_tokens": 100, "completion_tokens": 10, "cached_tokens": 60}
+
+
+def test_timeout_raises_batch_error():
+    class Stuck(LocalFileBatchBackend):
+        def status(self, batch_id):
+            return "in_progress"
+
+    with pytest.raises(BatchError):
+        run_batch("qa", [make_request("a", "x")], backend=Stuck(responder=lambda b: "x"), poll_interval=0.01, max_wait=0.05)
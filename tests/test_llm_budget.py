@@ -0,0 +1,121 @@
+import pytest
+
+import llm_budget
+from llm_budget import Budget, BudgetExceeded, DEGRADE, OK, STOP, price_for
+
+MODEL = "gpt-4.1-mini"
+STAGE = "quality_filter"
+
+
+def spend(budget: Budget, usd: float, stage: str = STAGE) -> None:
+    # Nur Input-Tokens, damit sich der Betrag exakt treffen lässt
+    budget.record(stage, "openai", "gpt-4.1", prompt_tokens=round(usd / price_for("gpt-4.1")[0] * 1_000_000))
+
+
+@pytest.fixture
+def budget(tmp_path):
+    return Budget(day="2026-01-01", base_dir=tmp_path, day_limit=1.0, stage_limits={})
+
+
+def test_under_threshold_keeps_model_and_tokens(budget):
+    assert budget.state(STAGE) == OK
+    assert budget.plan(MODEL, 1000, 400, stage=STAGE) == (MODEL, 400)
+
+
+def test_degrades_model_and_output_near_limit(budget):
+    spend(budget, 0.85)
+    assert budget.state(STAGE) == DEGRADE
+    assert budget.plan(MODEL, 1000, 400, stage=STAGE) == (llm_budget.LLM_BUDGET_DEGRADE_MODEL, 200)
+
+
+def test_degraded_json_call_gets_output_cap(budget):
+    spend(budget, 0.85)
+    assert budget.plan(MODEL, 1000, stage=STAGE) == (llm_budget.LLM_BUDGET_DEGRADE_MODEL, None)
+    assert budget.plan(MODEL, 1000, stage=STAGE, degraded_max_tokens=150) == (
+        llm_budget.LLM_BUDGET_DEGRADE_MODEL,
+        150,
+    )
+
+
+def test_stops_when_even_degraded_call_exceeds_limit(budget):
+    spend(budget, 0.85)
+    budget.plan(MODEL, 1000, 400, stage=STAGE)
+    spend(budget, 0.15)
+    assert budget.state(STAGE) == STOP
+    with pytest.raises(BudgetExceeded):
+        budget.plan(MODEL, 1000, 400, stage=STAGE)
+
+
+def test_stage_limit_does_not_affect_other_stages(tmp_path):
+    budget = Budget(day="2026-01-01", base_dir=tmp_path, day_limit=0, stage_limits={STAGE: 0.5})
+    spend(budget, 0.5)
+    assert budget.state(STAGE) == STOP
+    assert budget.state("bulk_generate") == OK
+
+
+def test_no_limits_by_default(tmp_path):
+    budget = Budget(day="2026-01-01", base_dir=tmp_path, stage_limits={})
+    spend(budget, 100.0)
+    assert budget.state(STAGE) == OK
+
+
+def test_plan_call_degrades_then_stops(budget, monkeypatch):
+    monkeypatch.setattr(llm_budget, "LLM_BUDGET_ENABLED", True)
+    monkeypatch.setattr(llm_budget, "_budget", budget)
+    monkeypatch.setattr(llm_budget, "current_stage", lambda: STAGE)
+    prompt = "Rate this article. " * 50
+
+    assert llm_budget.plan_call(MODEL, prompt, 400) == (MODEL, 400)
+    spend(budget, 0.9)
+    assert llm_budget.plan_call(MODEL, prompt, degraded_max_tokens=150) == (llm_budget.LLM_BUDGET_DEGRADE_MODEL, 150)
+    spend(budget, 0.1)
+    with pytest.raises(BudgetExceeded):
+        llm_budget.plan_call(MODEL, prompt, 400)
+
+
+def _record_many(base_dir, count):
+    budget = Budget(day="2026-01-01", base_dir=base_dir, day_limit=0, stage_limits={})
+    for _ in range(count):
+        budget.record(STAGE, "openai", MODEL, prompt_tokens=1000, completion_tokens=100)
+
+
+def test_parallel_processes_do_not_lose_bookings(tmp_path):
+    import multiprocessing
+
+    workers = [multiprocessing.Process(target=_record_many, args=(tmp_path, 150)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    stages = Budget(day="2026-01-01", base_dir=tmp_path, stage_limits={})._load()["stages"]
+    assert stages[STAGE]["calls"] == 600
+    assert stages[STAGE]["prompt_tokens"] == 600_000
+
+
+def test_reader_picks_up_other_writers_incrementally(budget, tmp_path):
+    other = Budget(day="2026-01-01", base_dir=tmp_path, day_limit=1.0, stage_limits={})
+    spend(budget, 0.3)
+    assert other.spent() == pytest.approx(0.3)
+    spend(other, 0.2)
+    assert budget.spent() == pytest.approx(0.5)
+    assert budget.spent(STAGE) == pytest.approx(0.5)
+
+
+def test_half_written_line_is_read_once_complete(budget):
+    spend(budget, 0.1)
+    line = budget.path.read_bytes().splitlines(keepends=True)[0]
+    with budget.path.open("ab") as fh:
+        fh.write(line[:20])
+    assert budget._load()["stages"][STAGE]["calls"] == 1
+    with budget.path.open("ab") as fh:
+        fh.write(line[20:])
+    assert budget._load()["stages"][STAGE]["calls"] == 2
+
+
+def test_local_calls_are_not_booked(budget, monkeypatch):
+    monkeypatch.setattr(llm_budget, "_budget", budget)
+    llm_budget._on_ledger_entry({"stage": STAGE, "engine": "local", "model": "llama3", "prompt_tokens": 5000})
+    assert not budget.path.exists()
+    llm_budget._on_ledger_entry({"stage": STAGE, "engine": "openai", "model": MODEL, "prompt_tokens": 5000})
+    assert budget.spent(STAGE) > 0
@@ -0,0 +1,129 @@
+import pytest
+
+import llm_cache
+from llm_budget import BudgetExceeded
+from llm_cache import LLMCache, budgeted_completion
+
+REQUEST = dict(engine="openai", model="gpt-4.1-mini", prompt="Rate this.", max_tokens=400)
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    cache = LLMCache(tmp_path / "cache.sqlite", 10 * 1024 * 1024)
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+def test_cache_hit_skips_budget_planning():
+    budgeted_completion(lambda model, max_tokens: "fresh", lambda model, max_tokens: (model, max_tokens), **REQUEST)
+
+    def exhausted(model, max_tokens):
+        raise BudgetExceeded("LLM budget exhausted")
+
+    assert budgeted_completion(lambda model, max_tokens: "never", exhausted, **REQUEST) == "fresh"
+
+
+def test_miss_computes_with_planned_model_and_stores_under_it():
+    calls = []
+
+    def compute(model, max_tokens):
+        calls.append((model, max_tokens))
+        return f"{model}/{max_tokens}"
+
+    def degrade(model, max_tokens):
+        return "gpt-4.1-nano", 200
+
+    assert budgeted_completion(compute, degrade, **REQUEST) == "gpt-4.1-nano/200"
+    # Zweiter Lauf: degradierter Eintrag wird getroffen, kein neuer Call
+    assert budgeted_completion(compute, degrade, **REQUEST) == "gpt-4.1-nano/200"
+    assert calls == [("gpt-4.1-nano", 200)]
+
+
+def test_budget_stop_on_miss_is_raised():
+    def exhausted(model, max_tokens):
+        raise BudgetExceeded("LLM budget exhausted")
+
+    with pytest.raises(BudgetExceeded):
+        budgeted_completion(lambda model, max_tokens: "never", exhausted, **REQUEST)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_cache, "time", fake)
+    return fake
+
+
+def last_access(cache: LLMCache, key: str) -> float:
+    return cache._connect().execute("SELECT last_access FROM entries WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_evicts_least_recently_read_first(tmp_path, clock):
+    cache = LLMCache(tmp_path / "lru.sqlite", max_bytes=30, touch_interval=0)
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        cache.set(key, "x" * 10)
+    clock.now += 1
+    assert cache.get("a") == "x" * 10  # a ist jetzt jünger als b
+
+    clock.now += 1
+    cache.set("d", "y" * 10)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in ("a", "c", "d")] == [True, True, True]
+    assert cache.stats()["bytes"] == 30
+
+
+def test_oversized_entry_is_not_stored(tmp_path, clock):
+    cache = LLMCache(tmp_path / "big.sqlite", max_bytes=10)
+    cache.set("small", "ok")
+    cache.set("big", "z" * 11)
+    assert cache.get("big") is None
+    assert cache.get("small") == "ok"
+    assert cache.stats()["bytes"] == 2
+
+
+def test_replace_accounts_size_difference(tmp_path, clock):
+    path = tmp_path / "replace.sqlite"
+    cache = LLMCache(path, max_bytes=1000)
+    cache.set("k", "a" * 100)
+    cache.set("k", "b" * 40)
+    cache.set("other", "ü")  # 2 Bytes UTF-8
+    assert cache.stats()["bytes"] == 42
+    assert cache.stats()["entries"] == 2
+    # Neu geöffnet: Summe kommt aus der Datei
+    assert LLMCache(path, max_bytes=1000).stats()["bytes"] == 42
+
+
+def test_cap_holds_after_many_writes(tmp_path, clock):
+    cache = LLMCache(tmp_path / "cap.sqlite", max_bytes=500)
+    for i in range(200):
+        clock.now += 1
+        cache.set(f"k{i}", "v" * 37)
+    stats = cache.stats()
+    assert stats["bytes"] <= 500
+    assert stats["entries"] == 500 // 37
+    assert cache.get("k199") is not None and cache.get("k0") is None
+
+
+def test_hits_touch_last_access_only_after_interval(tmp_path, clock):
+    cache = LLMCache(tmp_path / "touch.sqlite", max_bytes=1000, touch_interval=60)
+    cache.set("k", "v")
+    written = last_access(cache, "k")
+
+    clock.now += 30
+    assert cache.get("k") == "v"
+    assert last_access(cache, "k") == written
+
+    clock.now += 31
+    assert cache.get("k") == "v"
+    assert last_access(cache, "k") == clock.now
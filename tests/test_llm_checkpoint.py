@@ -0,0 +1,69 @@
+import json
+
+from llm_checkpoint import DONE, FAILED, IN_FLIGHT, Checkpoint
+
+
+def test_done_result_survives_reload(tmp_path):
+    checkpoint = Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path)
+    checkpoint.mark_in_flight(["q1", "q2"])
+    checkpoint.mark_done("q1", {"score": {"overall_score": 7.5}, "snippets": []})
+
+    reloaded = Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path)
+    assert reloaded.is_done("q1")
+    assert reloaded.result("q1") == {"score": {"overall_score": 7.5}, "snippets": []}
+    # Abgebrochen mitten im Call -> gilt als unerledigt
+    assert reloaded.pending(["q1", "q2", "q3"]) == ["q2", "q3"]
+    assert reloaded.summary() == {DONE: 1, FAILED: 0, IN_FLIGHT: 1}
+
+
+def test_failed_item_is_retried_and_counts_attempts(tmp_path):
+    checkpoint = Checkpoint("bulk_generate", "2026-01-01", base_dir=tmp_path)
+    checkpoint.mark_in_flight(["q1"])
+    checkpoint.mark_failed("q1", RuntimeError("timeout"))
+    checkpoint.mark_in_flight(["q1"])
+    checkpoint.mark_done("q1")
+
+    entry = Checkpoint("bulk_generate", "2026-01-01", base_dir=tmp_path).items["q1"]
+    assert entry["status"] == DONE
+    assert entry["attempts"] == 2
+    assert "error" not in entry
+
+
+def test_version_mismatch_is_not_done(tmp_path):
+    checkpoint = Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path)
+    checkpoint.mark_done("q1", {"score": {}}, version="abc")
+
+    reloaded = Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path)
+    assert reloaded.is_done("q1")
+    assert reloaded.is_done("q1", "abc")
+    assert not reloaded.is_done("q1", "def")
+
+
+def test_marks_append_lines_and_reload_compacts(tmp_path):
+    checkpoint = Checkpoint("bulk_generate", "2026-01-01", base_dir=tmp_path)
+    checkpoint.mark_in_flight(["q1", "q2"])
+    checkpoint.mark_done("q1")
+    checkpoint.mark_failed("q2", RuntimeError("timeout"))
+    lines = checkpoint.path.read_text(encoding="utf-8").splitlines()
+    # 2 x in_flight + done + failed – nichts wird neu geschrieben
+    assert [json.loads(line)["item"] for line in lines] == ["q1", "q2", "q1", "q2"]
+
+    reloaded = Checkpoint("bulk_generate", "2026-01-01", base_dir=tmp_path)
+    assert reloaded.summary() == {DONE: 1, FAILED: 1, IN_FLIGHT: 0}
+    compacted = [json.loads(line) for line in reloaded.path.read_text(encoding="utf-8").splitlines()]
+    assert {event["item"]: event["entry"]["status"] for event in compacted} == {"q1": DONE, "q2": FAILED}
+    assert len(compacted) == 2
+    assert not list(reloaded.path.parent.glob("*.tmp"))
+
+
+def test_half_written_line_is_skipped(tmp_path):
+    checkpoint = Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path)
+    checkpoint.mark_done("q1")
+    with checkpoint.path.open("a", encoding="utf-8") as fh:
+        fh.write('{"item": "q2", "entry": {"sta')
+
+    reloaded = Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path)
+    assert list(reloaded.items) == ["q1"]
+    # Nach dem Kompaktieren wird sauber weiter angehängt
+    reloaded.mark_done("q2")
+    assert Checkpoint("quality_filter", "2026-01-01", base_dir=tmp_path).pending(["q1", "q2"]) == []
@@ -0,0 +1,124 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import llm_health
+from llm_endpoints import EndpointPool, parse_endpoints
+from llm_health import CLOSED, OPEN, CircuitOpenError
+
+
+def _pool(spec, **kwargs):
+    return EndpointPool(parse_endpoints(spec), **kwargs)
+
+
+def _acquire_in_thread(pool):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["endpoint"] = pool.acquire()
+        except CircuitOpenError as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def test_parse_endpoints_spec():
+    a, b = parse_endpoints("http://gpu-a:11434|2|4, http://gpu-b:11434/api/chat")
+    assert (a.url, a.weight, a.max_inflight) == ("http://gpu-a:11434/api/generate", 2.0, 4)
+    assert (b.url, b.weight, b.max_inflight) == ("http://gpu-b:11434/api/chat", 1.0, 0)
+    with pytest.raises(ValueError):
+        parse_endpoints("http://gpu-a:11434|two")
+
+
+def test_weighted_least_loaded_selection():
+    pool = _pool("http://a:1|2, http://b:1|1")
+    picks = [pool.acquire().name for _ in range(6)]
+    # a hat doppeltes Gewicht -> bekommt doppelt so viele Slots
+    assert picks.count("a:1") == 4 and picks.count("b:1") == 2
+    # Gleichstand bei der Last: das höhere Gewicht gewinnt
+    assert picks[0] == "a:1"
+
+    b = pool.endpoints[1]
+    pool.release(b)
+    assert pool.acquire().name == "b:1"
+
+
+def test_avoided_host_only_when_nothing_else_is_free():
+    pool = _pool("http://a:1||1, http://b:1||1")
+    first = pool.acquire(avoid={"http://a:1/api/generate"})
+    assert first.name == "b:1"
+    # b ist voll, a wird trotz avoid genommen statt zu blockieren
+    assert pool.acquire(avoid={"http://a:1/api/generate"}).name == "a:1"
+
+
+def test_full_pool_blocks_until_release():
+    pool = _pool("http://a:1||1")
+    held = pool.acquire()
+    thread, outcome = _acquire_in_thread(pool)
+    thread.join(0.2)
+    assert thread.is_alive()
+
+    pool.release(held, ok=True)
+    thread.join(2)
+    assert outcome["endpoint"] is held
+    assert held.inflight == 1
+
+
+def test_open_host_is_skipped_and_all_open_raises():
+    pool = _pool("http://a:1, http://b:1", failure_threshold=1, reset_timeout=60)
+    a, b = pool.endpoints
+    pool.release(pool.acquire(), ok=False)
+    assert a.breaker.state == OPEN
+    assert pool.acquire() is b
+
+    pool.release(b, ok=False)
+    with pytest.raises(CircuitOpenError):
+        pool.acquire()
+    assert a.inflight == 0 and b.inflight == 0
+
+
+@pytest.fixture
+def tripped_pool(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(llm_health, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    pool = _pool("http://a:1", failure_threshold=1, reset_timeout=60)
+    pool.release(pool.acquire(), ok=False)
+    now[0] += 60
+    trial = pool.acquire()
+    assert trial.breaker.trial_in_flight
+    return pool, trial
+
+
+@pytest.mark.parametrize("trial_ok", [True, False])
+def test_callers_wait_for_half_open_trial(tripped_pool, trial_ok):
+    pool, trial = tripped_pool
+    thread, outcome = _acquire_in_thread(pool)
+    thread.join(0.2)
+    # Kein sofortiger CircuitOpenError (-> GPT), solange der Test-Request läuft
+    assert thread.is_alive() and not outcome
+
+    pool.release(trial, ok=trial_ok)
+    thread.join(2)
+    if trial_ok:
+        assert outcome["endpoint"] is trial
+        assert trial.breaker.state == CLOSED
+    else:
+        assert isinstance(outcome["error"], CircuitOpenError)
+        assert trial.breaker.state == OPEN
+
+
+def test_neutral_release_of_trial_unblocks_waiters(tripped_pool):
+    pool, trial = tripped_pool
+    thread, outcome = _acquire_in_thread(pool)
+    thread.join(0.2)
+    assert thread.is_alive()
+
+    pool.release(trial)
+    thread.join(2)
+    # Der Wartende übernimmt den nächsten Test-Request
+    assert outcome["endpoint"] is trial
+    assert trial.breaker.trial_in_flight
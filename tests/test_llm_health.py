@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_health
+from llm_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_health, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_opens_after_consecutive_failures_only(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_lets_exactly_one_trial_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    _open_breaker(breaker)
+
+    clock[0] += 29
+    assert not breaker.allow_request()
+    clock[0] += 1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN and breaker.trial_in_flight
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED and not breaker.trial_in_flight
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_with_fresh_timeout(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    _open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.trial_in_flight
+    clock[0] += 10
+    assert not breaker.allow_request()
+    clock[0] += 20
+    assert breaker.allow_request()
+
+
+def test_cancelled_trial_allows_a_new_one(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    _open_breaker(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+
+    breaker.cancel_trial()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_probe_gates_the_trial(clock):
+    healthy = [False]
+    calls = []
+
+    def probe():
+        calls.append(clock[0])
+        if healthy[0] is None:
+            raise ConnectionError("refused")
+        return healthy[0]
+
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, probe=probe)
+    _open_breaker(breaker)
+    assert calls == []  # im geschlossenen Zustand wird nicht geprobt
+
+    clock[0] += 30
+    assert not breaker.allow_request()
+    assert breaker.state == OPEN and not breaker.trial_in_flight
+
+    healthy[0] = None
+    clock[0] += 30
+    assert not breaker.allow_request()
+    assert breaker.state == OPEN
+
+    healthy[0] = True
+    clock[0] += 30
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert len(calls) == 3
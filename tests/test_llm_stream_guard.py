@@ -0,0 +1,56 @@
+import pytest
+
+from llm_stream_guard import StreamAborted, StreamGuard
+
+PHRASE = "in diesem Abschnitt zeigen wir wie man das Problem sauber löst."
+
+
+def filler(words: int, seed: str) -> str:
+    # Lauter verschiedene Wörter -> keine zufälligen N-Gramm-Treffer
+    return " ".join(f"{seed}{i}" for i in range(words))
+
+
+def stream(guard: StreamGuard, text: str, chunk_size: int = 37) -> None:
+    for i in range(0, len(text), chunk_size):
+        guard.feed(text[i:i + chunk_size])
+
+
+def test_tight_loop_is_aborted_as_repetition():
+    guard = StreamGuard(max_tokens=0, heading_within=0, ngram=8, ngram_max_repeats=4, ngram_window=600)
+    with pytest.raises(StreamAborted) as exc:
+        stream(guard, "# Titel\n\n" + (PHRASE + " ") * 10)
+    assert exc.value.reason == "repetition"
+
+
+def test_phrase_reused_across_distant_sections_is_not_a_loop():
+    guard = StreamGuard(max_tokens=0, heading_within=0, ngram=8, ngram_max_repeats=4, ngram_window=600)
+    sections = [f"## Abschnitt {n}\n\n{PHRASE} {filler(250, f's{n}w')}\n" for n in range(8)]
+    stream(guard, "# Titel\n\n" + "\n".join(sections))
+
+
+def test_without_window_the_same_text_would_abort():
+    guard = StreamGuard(max_tokens=0, heading_within=0, ngram=8, ngram_max_repeats=4, ngram_window=0)
+    sections = [f"## Abschnitt {n}\n\n{PHRASE} {filler(250, f's{n}w')}\n" for n in range(8)]
+    with pytest.raises(StreamAborted):
+        stream(guard, "# Titel\n\n" + "\n".join(sections))
+
+
+def test_repeated_code_inside_fences_is_ignored():
+    guard = StreamGuard(max_tokens=0, heading_within=0, ngram=4, ngram_max_repeats=2, ngram_window=600)
+    code = "\n".join(["result = client.get(url, params=params, timeout=timeout)"] * 20)
+    stream(guard, f"# Titel\n\n```python\n{code}\n```\n\nEin kurzer Satz danach.\n")
+
+
+def test_max_tokens_aborts_and_reports_reason():
+    guard = StreamGuard(max_tokens=100, heading_within=0, ngram=0)
+    with pytest.raises(StreamAborted) as exc:
+        stream(guard, "# Titel\n\n" + filler(400, "w"))
+    assert exc.value.reason == "max_tokens"
+    assert guard.tokens > 100
+
+
+def test_missing_heading_aborts_early():
+    guard = StreamGuard(max_tokens=0, heading_within=50, ngram=0)
+    with pytest.raises(StreamAborted) as exc:
+        stream(guard, filler(200, "w"))
+    assert exc.value.reason == "no_heading"
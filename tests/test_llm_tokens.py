@@ -0,0 +1,96 @@
+import pytest
+
+from llm_tokens import (
+    CHARS_PER_TOKEN,
+    estimate_tokens,
+    fit_article,
+    pack_by_token_budget,
+    trim_article,
+)
+
+INTRO = "This intro explains why the topic matters for Python developers."
+
+
+def _section(n, paragraphs=8, code_lines=0):
+    lines = [f"## Section {n}", ""]
+    lines += [f"Paragraph {i} of section {n} talks about detail number {i} at some length." for i in range(paragraphs)]
+    if code_lines:
+        lines += ["", "```python"] + [f"value_{i} = compute({i})" for i in range(code_lines)] + ["```"]
+    return "\n".join(lines)
+
+
+ARTICLE = "\n\n".join(
+    ["# Title", INTRO] + [_section(n, code_lines=30 if n == 1 else 0) for n in range(1, 6)]
+)
+
+
+def test_article_within_budget_is_unchanged():
+    text, report = trim_article(ARTICLE, estimate_tokens(ARTICLE))
+    assert text == ARTICLE
+    assert report["saved_tokens"] == 0
+
+
+def test_long_code_block_is_collapsed_first():
+    budget = estimate_tokens(ARTICLE) - 10
+    text, report = trim_article(ARTICLE, budget)
+    assert "# ... 30 lines of code omitted ..." in text
+    assert "value_0 = compute(0)" not in text
+    # Prosa bleibt vollständig, wenn das schon reicht
+    assert "Paragraph 7 of section 5" in text
+    assert report["trimmed_tokens"] <= budget
+    assert report["saved_tokens"] == report["original_tokens"] - report["trimmed_tokens"]
+
+
+def test_sections_are_shortened_but_headings_and_intro_survive():
+    text, report = trim_article(ARTICLE, 250)
+    assert report["trimmed_tokens"] <= 250
+    assert "[… truncated …]" not in text
+    assert text.startswith("# Title")
+    assert INTRO in text
+    for n in range(1, 6):
+        assert f"## Section {n}" in text
+        assert f"Paragraph 0 of section {n}" in text
+    assert "Paragraph 7 of section 3" not in text
+    assert "[…]" in text
+
+
+def test_short_code_block_counts_as_one_line():
+    filler = [f"Line {i} of filler text that makes the section longer." for i in range(40)]
+    block = ["```", "x = 1", "y = 2", "```"]
+
+    # Block am Abschnittsanfang: bleibt komplett und zählt als eine Zeile
+    text, _ = trim_article("\n".join(["# T", "", "## A", ""] + block + filler), 40)
+    assert "```\nx = 1\ny = 2\n```" in text
+    assert "Line 1 of filler" in text and "Line 2 of filler" not in text
+
+    # Block hinter den behaltenen Zeilen: fällt komplett weg, kein halber Fence
+    text, _ = trim_article("\n".join(["# T", "", "## A", ""] + filler + block), 40)
+    assert "```" not in text and "x = 1" not in text
+
+
+def test_hard_cut_when_structure_alone_is_not_enough():
+    article = "## One\n\n" + "word " * 4000
+    text, report = trim_article(article, 100)
+    assert text.endswith("[… truncated …]")
+    assert len(text) <= 100 * CHARS_PER_TOKEN + len("\n\n[… truncated …]")
+    assert report["original_tokens"] == estimate_tokens(article)
+
+
+def test_fit_article_uses_call_type_budget_and_passes_unknown_types():
+    assert fit_article(ARTICLE, "no-such-call") == ARTICLE
+    assert estimate_tokens(fit_article(ARTICLE * 5, "snippets")) <= 1500 + 10
+
+
+@pytest.mark.parametrize(
+    "sizes, budget, max_items, expected",
+    [
+        ([("a", 40), ("b", 40), ("c", 40)], 100, 10, [["a", "b"], ["c"]]),
+        ([("a", 10), ("b", 10), ("c", 10)], 100, 2, [["a", "b"], ["c"]]),
+        # Ein Eintrag über dem Budget landet allein in seiner Gruppe
+        ([("a", 10), ("big", 500), ("c", 10)], 100, 10, [["a"], ["big"], ["c"]]),
+        ([("a", 100), ("b", 1)], 100, 10, [["a"], ["b"]]),
+        ([], 100, 10, []),
+    ],
+)
+def test_pack_by_token_budget(sizes, budget, max_items, expected):
+    assert pack_by_token_budget(sizes, budget, max_items) == expected